@@ -7,11 +7,20 @@ import asyncio
 import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .routes import router
 from .vapi_webhook import webhook_router
 from logging_config import configure_logging, logger
-from middleware import LoggingMiddleware
+from middleware import LoggingMiddleware, SelectiveGZipMiddleware
+from http_clients import close_http_clients
+from db.connection import close_connection, get_supabase_client
+
+try:
+    import orjson  # noqa: F401 - optional faster JSON encoder
+    DEFAULT_RESPONSE_CLASS = ORJSONResponse
+except ImportError:
+    DEFAULT_RESPONSE_CLASS = JSONResponse
 
 
 @asynccontextmanager
@@ -51,11 +60,27 @@ async def lifespan(app: FastAPI):
         app.state.calendar_email = None
         logger.error("Server will not be able to handle calendar requests")
     
+    # Startup: Create the pooled Supabase client (shared by every inventory request)
+    # and open a connection with a trivial query, so the first burst of requests
+    # doesn't pay for client setup and the TCP/TLS handshake
+    try:
+        logger.info("Initializing database client")
+        client = get_supabase_client()
+        await asyncio.to_thread(
+            lambda: client.table('inventory').select('id').limit(1).execute()
+        )
+        logger.info("Database client initialized successfully")
+    except Exception as e:
+        logger.error("Database client initialization failed", error=str(e), error_type=type(e).__name__)
+        logger.error("Server will not be able to handle inventory requests")
+    
     logger.info("Server startup complete")
     yield
     
     # Shutdown
     logger.info("Shutting down automotive voice agent server")
+    await close_http_clients()
+    close_connection()
 
 
 def create_app() -> FastAPI:
@@ -66,9 +91,19 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/docs",
         redoc_url="/redoc",
+        default_response_class=DEFAULT_RESPONSE_CLASS,
         lifespan=lifespan
     )
     
+    # Compress larger JSON payloads (inventory lists) for clients that accept gzip;
+    # added first so it sits innermost and sees complete response bodies. The NDJSON
+    # stream is left uncompressed so each vehicle line reaches the client immediately
+    app.add_middleware(
+        SelectiveGZipMiddleware,
+        minimum_size=1024,
+        exclude_paths=[f"{router.prefix}/inventory/check-inventory/stream"]
+    )
+    
     # Add logging middleware (before CORS for proper request tracking)
     app.add_middleware(LoggingMiddleware)
     
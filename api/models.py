@@ -3,7 +3,7 @@ Pydantic request and response models for automotive voice agent API.
 Simple, DRY models that match existing tool function signatures.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -130,6 +130,14 @@ class CheckInventoryRequest(BaseModel):
     max_price: Optional[int] = Field(None, ge=0)
     features: Optional[List[str]] = None
     status: str = Field("available", pattern="^(available|sold|reserved|all)$")
+    include_details: bool = False
+    
+    @model_validator(mode="after")
+    def check_price_range(self) -> "CheckInventoryRequest":
+        """Reject inverted price ranges at the API boundary."""
+        if self.min_price is not None and self.max_price is not None and self.min_price > self.max_price:
+            raise ValueError("min_price cannot be greater than max_price")
+        return self
 
 
 class GetExpectedDeliveryDatesRequest(BaseModel):
@@ -152,6 +160,7 @@ class GetSimilarVehiclesRequest(BaseModel):
     max_results: int = Field(5, ge=1, le=20)
     price_tolerance_percent: int = Field(20, ge=0, le=100)
     include_unavailable: bool = False
+    cursor: Optional[str] = None
 
 
 class GetVehicleDetailsRequest(BaseModel):
@@ -162,6 +171,12 @@ class GetVehicleDetailsRequest(BaseModel):
     include_similar: bool = False
 
 
+class GetVehicleDetailsBulkRequest(BaseModel):
+    """Request model for get_vehicle_details_bulk tool."""
+    vehicle_ids: List[str] = Field(..., min_length=1, max_length=50)
+    include_pricing: bool = True
+
+
 # =============================================================================
 # Response Models
 # =============================================================================
@@ -3,8 +3,10 @@ FastAPI routes for automotive voice agent tools.
 Simple, DRY endpoints that directly wrap existing tool functions.
 """
 
+import json
 import time
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 from logging_config import logger
 
@@ -20,7 +22,8 @@ from calendar_tools.tools.create_appointment import create_appointment
 from kb_tools import fetch_latest_kb, sync_knowledge_base
 from inventory import (
     check_inventory, get_expected_delivery_dates, get_prices,
-    get_similar_vehicles, get_vehicle_details
+    get_similar_vehicles, get_vehicle_details, get_vehicle_details_bulk,
+    stream_inventory
 )
 
 # Import request/response models
@@ -32,7 +35,7 @@ from .models import (
     FetchLatestKbRequest, SyncKnowledgeBaseRequest,
     # Inventory models
     CheckInventoryRequest, GetExpectedDeliveryDatesRequest, GetPricesRequest,
-    GetSimilarVehiclesRequest, GetVehicleDetailsRequest,
+    GetSimilarVehiclesRequest, GetVehicleDetailsRequest, GetVehicleDetailsBulkRequest,
     # Response models
     ToolResponse, HealthResponse
 )
@@ -171,7 +174,7 @@ async def health_check():
             "google_calendar": "available", 
             "vapi": "available"
         },
-        tools_available=13,
+        tools_available=14,
         timestamp=datetime.now().isoformat()
     )
 
@@ -347,10 +350,35 @@ async def check_inventory_endpoint(request_data: CheckInventoryRequest):
         min_price=request_data.min_price,
         max_price=request_data.max_price,
         features=request_data.features,
-        status=request_data.status
+        status=request_data.status,
+        include_details=request_data.include_details
     )
 
 
+@router.post("/inventory/check-inventory/stream")
+async def check_inventory_stream_endpoint(request_data: CheckInventoryRequest):
+    """Check vehicle inventory, streaming matches as NDJSON (one vehicle per line)."""
+    try:
+        vehicles = stream_inventory(
+            category=request_data.category,
+            model_name=request_data.model_name,
+            min_price=request_data.min_price,
+            max_price=request_data.max_price,
+            features=request_data.features,
+            status=request_data.status,
+            include_details=request_data.include_details
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def ndjson_lines():
+        async for vehicle in vehicles:
+            yield json.dumps(vehicle) + "\n"
+    
+    logger.info("Streaming tool results: check_inventory", tool_name="check_inventory", operation="stream")
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
 @router.post("/inventory/get-delivery-dates", response_model=ToolResponse)
 async def get_delivery_dates_endpoint(request_data: GetExpectedDeliveryDatesRequest):
     """Get expected delivery dates."""
@@ -384,7 +412,8 @@ async def get_similar_vehicles_endpoint(request_data: GetSimilarVehiclesRequest)
         reference_vehicle_id=request_data.reference_vehicle_id,
         max_results=request_data.max_results,
         price_tolerance_percent=request_data.price_tolerance_percent,
-        include_unavailable=request_data.include_unavailable
+        include_unavailable=request_data.include_unavailable,
+        cursor=request_data.cursor
     )
 
 
@@ -400,3 +429,14 @@ async def get_vehicle_details_endpoint(request_data: GetVehicleDetailsRequest):
         include_similar=request_data.include_similar
     )
 
+
+@router.post("/inventory/get-vehicle-details-bulk", response_model=ToolResponse)
+async def get_vehicle_details_bulk_endpoint(request_data: GetVehicleDetailsBulkRequest):
+    """Get details for several vehicles in one call."""
+    return await create_tool_response(
+        "get_vehicle_details_bulk",
+        get_vehicle_details_bulk,
+        vehicle_ids=request_data.vehicle_ids,
+        include_pricing=request_data.include_pricing
+    )
+
@@ -9,6 +9,11 @@ from typing import Dict, Any, Tuple, Optional, Callable, List
 from fastapi import APIRouter, Request, HTTPException
 from pydantic import BaseModel
 
+try:
+    import orjson  # Optional faster JSON encoder (pip install "automotive[speedups]")
+except ImportError:
+    orjson = None
+
 # Vapi SDK imports for proper request/response handling
 from vapi.types.server_message_response_tool_calls import ServerMessageResponseToolCalls
 from vapi.types.tool_call_result import ToolCallResult
@@ -71,6 +76,13 @@ TOOL_REGISTRY: Dict[str, Tuple[Callable, Optional[type], Dict[str, Any]]] = {
 # Tool Processing Functions
 # =============================================================================
 
+def _serialize_result(result: Any) -> str:
+    """Serialize a tool result to JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(result, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(result, default=str)
+
+
 async def process_tool_call(request: Request, tool_call: VapiToolCall) -> ToolCallResult:
     """
     Process a single tool call and return the result.
@@ -158,7 +170,7 @@ async def process_tool_call(request: Request, tool_call: VapiToolCall) -> ToolCa
         
         # Serialize result for Vapi response
         if isinstance(result, (dict, list)):
-            result_str = json.dumps(result, default=str)
+            result_str = _serialize_result(result)
         else:
             result_str = str(result)
         
@@ -11,6 +11,11 @@ import uuid
 from googleapiclient.errors import HttpError
 
 
+# Accepted option values, built once at import for hashed membership checks
+SEND_NOTIFICATION_OPTIONS = frozenset({"all", "external", "none"})
+VISIBILITY_OPTIONS = frozenset({"default", "public", "private", "confidential"})
+
+
 async def create_event(
     service,
     calendar_id: str,
@@ -75,11 +80,11 @@ async def create_event(
             raise ValueError("calendar_id, summary, start_time, and end_time are required")
         
         # Validate send_notifications parameter
-        if send_notifications not in ["all", "external", "none"]:
+        if send_notifications not in SEND_NOTIFICATION_OPTIONS:
             raise ValueError("send_notifications must be 'all', 'external', or 'none'")
         
         # Validate visibility parameter
-        if visibility not in ["default", "public", "private", "confidential"]:
+        if visibility not in VISIBILITY_OPTIONS:
             raise ValueError("visibility must be 'default', 'public', 'private', or 'confidential'")
         
         # Validate color_id if provided
@@ -4,7 +4,9 @@ Supabase database connection and configuration.
 
 import os
 from typing import Optional
+import httpx
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
 from dotenv import load_dotenv
 import logging
 
@@ -15,6 +17,15 @@ logger = logging.getLogger(__name__)
 
 # Global client instance (singleton pattern for connection reuse)
 _supabase_client: Optional[Client] = None
+_http_client: Optional[httpx.Client] = None
+
+# Keep-alive pool shared by all PostgREST queries
+POOL_LIMITS = httpx.Limits(
+    max_connections=50,
+    max_keepalive_connections=20,
+    keepalive_expiry=60
+)
+POSTGREST_TIMEOUT_SECONDS = 30
 
 
 def get_supabase_client() -> Client:
@@ -28,7 +39,7 @@ def get_supabase_client() -> Client:
         ValueError: If required environment variables are missing
         Exception: If connection fails
     """
-    global _supabase_client
+    global _supabase_client, _http_client
     
     if _supabase_client is not None:
         return _supabase_client
@@ -43,7 +54,18 @@ def get_supabase_client() -> Client:
         )
     
     try:
-        _supabase_client = create_client(supabase_url, supabase_key)
+        # Pooled HTTP client so every query reuses warm keep-alive connections
+        _http_client = httpx.Client(
+            limits=POOL_LIMITS,
+            timeout=POSTGREST_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            http2=True
+        )
+        _supabase_client = create_client(
+            supabase_url,
+            supabase_key,
+            options=SyncClientOptions(httpx_client=_http_client)
+        )
         logger.info("Supabase client initialized successfully")
         return _supabase_client
         
@@ -56,7 +78,10 @@ def close_connection():
     """
     Close the Supabase client connection (cleanup).
     """
-    global _supabase_client
+    global _supabase_client, _http_client
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
     if _supabase_client is not None:
         _supabase_client = None
         logger.info("Supabase client connection closed")
\ No newline at end of file
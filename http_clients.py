@@ -0,0 +1,160 @@
+"""
+Shared HTTP clients for outbound API calls.
+
+Process-wide httpx.AsyncClient instances so keep-alive connections (and their
+TLS sessions) are reused across tool invocations instead of being rebuilt per call.
+Clients are created lazily and closed from the FastAPI lifespan on shutdown.
+"""
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import random
+import httpx
+
+T = TypeVar("T")
+
+# Connection pool shared by every request made through a client
+HTTP_POOL_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20
+)
+DEFAULT_TIMEOUT_SECONDS = 30
+USER_AGENT = "Elite Motors KB Sync Tool/1.0"
+
+# Retry policy for transient failures (full-jitter exponential backoff)
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_ATTEMPTS = 4
+RETRY_BASE_SECONDS = 0.25
+RETRY_CAP_SECONDS = 8.0
+
+_github_client: Optional[httpx.AsyncClient] = None
+_vapi_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_github_client() -> httpx.AsyncClient:
+    """
+    Get the shared client for GitHub raw content downloads.
+
+    Returns:
+        httpx.AsyncClient: Pooled client (timeouts can be overridden per request)
+    """
+    global _github_client
+
+    if _github_client is None or _github_client.is_closed:
+        _github_client = httpx.AsyncClient(
+            timeout=DEFAULT_TIMEOUT_SECONDS,
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "text/plain, text/markdown, */*"
+            },
+            limits=HTTP_POOL_LIMITS,
+            http2=True
+        )
+    return _github_client
+
+
+def get_vapi_client(base_url: str) -> httpx.AsyncClient:
+    """
+    Get the shared client for the Vapi API at base_url.
+
+    Authentication headers are not stored on the client; pass them per request.
+
+    Args:
+        base_url: Vapi API base URL
+
+    Returns:
+        httpx.AsyncClient: Pooled client bound to base_url
+    """
+    client = _vapi_clients.get(base_url)
+
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=DEFAULT_TIMEOUT_SECONDS,
+            headers={"User-Agent": USER_AGENT},
+            limits=HTTP_POOL_LIMITS
+        )
+        _vapi_clients[base_url] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """
+    Close all shared HTTP clients (cleanup).
+    """
+    global _github_client
+
+    if _github_client is not None:
+        await _github_client.aclose()
+        _github_client = None
+
+    for client in _vapi_clients.values():
+        await client.aclose()
+    _vapi_clients.clear()
+
+
+async def with_retries(
+    request_fn: Callable[[], Awaitable[T]],
+    attempts: int = RETRY_ATTEMPTS,
+    base_seconds: float = RETRY_BASE_SECONDS,
+    cap_seconds: float = RETRY_CAP_SECONDS
+) -> T:
+    """
+    Run request_fn, retrying transient HTTP failures with full-jitter backoff.
+
+    Network errors, timeouts and HTTPStatusError with a retryable status
+    (429/5xx) are retried; request_fn must call raise_for_status() itself.
+    A 429 carrying Retry-After waits for the server-specified delay instead.
+
+    Args:
+        request_fn: Zero-argument coroutine function performing one attempt
+        attempts: Total number of attempts
+        base_seconds: Backoff base delay
+        cap_seconds: Maximum jittered backoff delay
+
+    Returns:
+        The result of the first successful attempt
+
+    Raises:
+        The last error once attempts are exhausted, or any non-retryable error
+    """
+    for attempt in range(attempts):
+        try:
+            return await request_fn()
+        except (httpx.NetworkError, httpx.TimeoutException, httpx.HTTPStatusError) as e:
+            if attempt == attempts - 1 or not _is_retryable(e):
+                raise
+            await asyncio.sleep(_retry_delay(e, attempt, base_seconds, cap_seconds))
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an httpx error is worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return True
+
+
+def _retry_delay(error: Exception, attempt: int, base_seconds: float, cap_seconds: float) -> float:
+    """Seconds to wait before the next attempt (Retry-After on 429, else full jitter)."""
+    if isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 429:
+        retry_after = _parse_retry_after(error.response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+    return random.uniform(0, min(cap_seconds, base_seconds * 2 ** attempt))
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -2,16 +2,18 @@
 Automotive inventory tools for vehicle discovery, pricing, and delivery estimation.
 """
 
-from .check_inventory import check_inventory
+from .check_inventory import check_inventory, stream_inventory
 from .get_expected_delivery_dates import get_expected_delivery_dates
 from .get_prices import get_prices
 from .get_similar_vehicles import get_similar_vehicles
-from .get_vehicle_details import get_vehicle_details
+from .get_vehicle_details import get_vehicle_details, get_vehicle_details_bulk
 
 __all__ = [
     'check_inventory',
+    'stream_inventory',
     'get_expected_delivery_dates', 
     'get_prices',
     'get_similar_vehicles',
-    'get_vehicle_details'
+    'get_vehicle_details',
+    'get_vehicle_details_bulk'
 ]
\ No newline at end of file
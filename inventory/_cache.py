@@ -0,0 +1,66 @@
+"""
+Short-lived, single-flight result cache shared by the inventory tools.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import copy
+import time
+
+
+class ResultCache:
+    """
+    TTL cache of tool responses that coalesces concurrent loads of the same key.
+    
+    Entries expire after ttl_seconds; once more than max_entries are stored,
+    expired and then oldest entries are evicted. Callers always receive deep
+    copies, so mutating a response never changes the cached entry.
+    """
+    
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[tuple, Tuple[float, Dict[str, Any]]] = {}
+        # One lock per key with a load in progress; removed when that load finishes
+        self._locks: Dict[tuple, asyncio.Lock] = {}
+    
+    def get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response for key if it is still fresh."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+            return None
+        return copy.deepcopy(entry[1])
+    
+    async def get_or_load(self, key: tuple, load: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return the cached response for key, running load() once for concurrent misses."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+            
+            try:
+                result = await load()
+                self._store(key, result)
+            finally:
+                # Callers already waiting hold a reference to this lock; later ones
+                # find the cached result (or start a fresh load after a failure)
+                if self._locks.get(key) is lock:
+                    del self._locks[key]
+            return copy.deepcopy(result)
+    
+    def _store(self, key: tuple, result: Dict[str, Any]) -> None:
+        """Cache a response, pruning expired and then oldest entries when full."""
+        now = time.monotonic()
+        self._entries.pop(key, None)
+        self._entries[key] = (now, result)
+        
+        if len(self._entries) > self.max_entries:
+            for stale_key in [k for k, (stored_at, _) in self._entries.items() if now - stored_at >= self.ttl_seconds]:
+                del self._entries[stale_key]
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
@@ -0,0 +1,115 @@
+"""
+Vehicle feature and pricing helpers shared by the inventory tools.
+"""
+
+from typing import Any, Dict, Optional
+from functools import lru_cache
+import re
+
+# Feature categorization keywords, checked in priority order (first match wins)
+_CATEGORY_KEYWORDS = {
+    'comfort': ('leather', 'heated', 'cooled', 'climate', 'seat', 'comfort'),
+    'technology': ('nav', 'bluetooth', 'usb', 'display', 'audio', 'tech', 'camera', 'screen'),
+    'safety': ('safety', 'brake', 'warning', 'assist', 'blind', 'collision', 'airbag'),
+    'performance': ('engine', 'turbo', 'sport', 'performance', 'suspension'),
+    'exterior': ('wheel', 'paint', 'roof', 'exterior', 'trim', 'light'),
+}
+_FEATURE_CATEGORY_ORDER = (*_CATEGORY_KEYWORDS, 'other')
+_CATEGORY_PATTERNS = tuple(
+    (category, re.compile('|'.join(map(re.escape, keywords))))
+    for category, keywords in _CATEGORY_KEYWORDS.items()
+)
+
+# Pricing columns embedded under a vehicle select (saves a separate round-trip)
+PRICING_COLUMNS = "pricing(id, base_price, feature_prices, discount_amount, is_current, effective_date, created_at)"
+
+
+def with_current_pricing(query, foreign_table: str):
+    """Order embedded pricing rows current-first, newest-first, and keep only the first."""
+    return query.order('is_current', desc=True, foreign_table=foreign_table) \
+        .order('effective_date', desc=True, foreign_table=foreign_table) \
+        .limit(1, foreign_table=foreign_table)
+
+
+def get_features_info(inventory_data: Optional[Dict[str, Any]], pricing_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Get features and options information."""
+    
+    included_features = inventory_data.get('features', []) if inventory_data else []
+    feature_prices = pricing_data.get('feature_prices', {}) if pricing_data else {}
+    
+    # Organize features by category, only allocating lists for categories that occur
+    categorized = {}
+    for feature in included_features:
+        categorized.setdefault(_categorize_feature(feature.lower()), []).append(feature)
+    
+    # Keep the canonical category order
+    feature_categories = {k: categorized[k] for k in _FEATURE_CATEGORY_ORDER if k in categorized}
+    
+    return {
+        'included_features': included_features,
+        'features_by_category': feature_categories,
+        'total_features': len(included_features),
+        'feature_pricing_available': len(feature_prices) > 0
+    }
+
+
+def _categorize_feature(feature_lower: str) -> str:
+    """Return the first category whose keyword pattern matches, else 'other'."""
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(feature_lower):
+            return category
+    return 'other'
+
+
+def get_pricing_info(vehicle_data: Dict[str, Any], inventory_data: Optional[Dict[str, Any]], pricing_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Get comprehensive pricing information."""
+    
+    base_price = vehicle_data['base_price']
+    current_price = inventory_data['current_price'] if inventory_data else base_price
+    
+    pricing_info = {
+        'base_price_dollars': base_price // 100,
+        'current_price_dollars': current_price // 100,
+        'price_currency': 'USD'
+    }
+    
+    if pricing_data:
+        discount = pricing_data.get('discount_amount', 0)
+        if discount > 0:
+            pricing_info['discount_applied_dollars'] = discount // 100
+            pricing_info['savings'] = discount // 100
+        
+        feature_prices = pricing_data.get('feature_prices', {})
+        if feature_prices:
+            pricing_info['available_options'] = {}
+            for feature, price in feature_prices.items():
+                pricing_info['available_options'][feature] = price // 100
+    
+    # Calculate financing estimate (rough)
+    monthly_payment = estimate_monthly_payment(current_price // 100)
+    pricing_info['estimated_monthly_payment_dollars'] = monthly_payment
+    
+    return pricing_info
+
+
+@lru_cache(maxsize=32)
+def _payment_factor(interest_rate: float, term_years: int) -> float:
+    """Closed-form annuity factor: monthly payment per dollar borrowed."""
+    
+    monthly_rate = (interest_rate / 100) / 12
+    num_payments = term_years * 12
+    
+    if monthly_rate == 0:
+        return 1 / num_payments
+    
+    growth = (1 + monthly_rate)**num_payments
+    return monthly_rate * growth / (growth - 1)
+
+
+def estimate_monthly_payment(price_dollars: int, down_payment_percent: float = 10, interest_rate: float = 6.5, term_years: int = 5) -> int:
+    """Estimate monthly payment for financing."""
+    
+    down_payment = price_dollars * (down_payment_percent / 100)
+    loan_amount = price_dollars - down_payment
+    
+    return int(loan_amount * _payment_factor(interest_rate, term_years))
@@ -4,13 +4,35 @@ Check inventory tool for automotive vehicles.
 Provides comprehensive vehicle inventory search with filtering capabilities.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
+import asyncio
+import json
 import logging
+import os
 import time
 from logging_config import database_logger
+from ._cache import ResultCache
+from ._vehicle_info import PRICING_COLUMNS, get_features_info, get_pricing_info, with_current_pricing
 
 logger = logging.getLogger(__name__)
 
+# Short-lived cache of search results keyed by the normalized filters; popular
+# searches repeat far more often than inventory changes
+RESULT_CACHE_TTL_SECONDS = 30
+RESULT_CACHE_MAX_ENTRIES = 1024
+_RESULT_CACHE = ResultCache(RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_MAX_ENTRIES)
+
+# An uncached search queries directly; searches arriving while a query of the same
+# filter shape (everything but category) is in flight are collected for
+# INVENTORY_BATCH_WINDOW_MS, served by one query, and split per caller (0 disables)
+INVENTORY_BATCH_WINDOW_MS = int(os.getenv("INVENTORY_BATCH_WINDOW_MS", "5"))
+_IN_FLIGHT_SHAPES: set = set()
+_PENDING_BATCHES: Dict[tuple, List[Tuple[Optional[str], asyncio.Future]]] = {}
+_BATCH_TASKS: set = set()
+
+# Rows fetched per round-trip when streaming inventory results
+STREAM_PAGE_SIZE = 200
+
 
 async def check_inventory(
     category: Optional[str] = None,        # "sedan", "suv", "truck", "coupe"
@@ -18,7 +40,8 @@ async def check_inventory(
     min_price: Optional[int] = None,       # Price in dollars
     max_price: Optional[int] = None,       # Price in dollars
     features: Optional[List[str]] = None,  # Must have ALL these features
-    status: str = "available"              # "available", "sold", "reserved", "all"
+    status: str = "available",             # "available", "sold", "reserved", "all"
+    include_details: bool = False          # Inline features/pricing blocks per vehicle
 ) -> Dict[str, Any]:
     """
     Search vehicle inventory with comprehensive filtering options.
@@ -30,6 +53,8 @@ async def check_inventory(
         max_price: Maximum price filter in dollars
         features: List of required features (must have ALL)
         status: Inventory status filter
+        include_details: Embed each vehicle's features and pricing blocks (as returned
+            by get_vehicle_details) so callers can skip a follow-up details request
         
     Returns:
         Dict containing vehicles list, total count, and applied filters
@@ -38,11 +63,74 @@ async def check_inventory(
         ValueError: For invalid parameters
         Exception: For database connection or query errors
     """
-    from db.connection import get_supabase_client
-    
     # Input validation
     _validate_inputs(category, model_name, min_price, max_price, features, status)
     
+    cache_key = (category, model_name, min_price, max_price, tuple(features or ()), status, include_details)
+    # Coalesce concurrent identical searches into a single query
+    return await _RESULT_CACHE.get_or_load(
+        cache_key,
+        lambda: _search_inventory(category, model_name, min_price, max_price, features, status, include_details)
+    )
+
+
+def stream_inventory(
+    category: Optional[str] = None,
+    model_name: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    features: Optional[List[str]] = None,
+    status: str = "available",
+    include_details: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream matching vehicles one at a time instead of building the full result list.
+    
+    Inputs are validated eagerly, so invalid filters raise before any output is
+    produced. Rows are then fetched STREAM_PAGE_SIZE at a time, in the same price
+    order and vehicle format as check_inventory. Results are not cached or batched.
+    
+    Args:
+        category: Vehicle category filter
+        model_name: Text search in brand and model fields
+        min_price: Minimum price filter in dollars
+        max_price: Maximum price filter in dollars
+        features: List of required features (must have ALL)
+        status: Inventory status filter
+        include_details: Embed each vehicle's features and pricing blocks
+        
+    Returns:
+        Async iterator of vehicle dicts
+        
+    Raises:
+        ValueError: For invalid parameters
+    """
+    _validate_inputs(category, model_name, min_price, max_price, features, status)
+    return _stream_inventory_pages(category, model_name, min_price, max_price, features, status, include_details)
+
+
+async def _stream_inventory_pages(category, model_name, min_price, max_price, features, status, include_details):
+    """Yield formatted vehicles page by page using PostgREST range requests."""
+    from db.connection import get_supabase_client
+    
+    client = get_supabase_client()
+    offset = 0
+    while True:
+        # id breaks price ties so pages don't overlap or skip rows
+        query = _build_inventory_query(client, category, model_name, min_price, max_price, features, status, include_details) \
+            .order('id').range(offset, offset + STREAM_PAGE_SIZE - 1)
+        response = await asyncio.to_thread(query.execute)
+        
+        for item in response.data:
+            yield _format_vehicle(item, include_details)
+        
+        if len(response.data) < STREAM_PAGE_SIZE:
+            return
+        offset += STREAM_PAGE_SIZE
+
+
+async def _search_inventory(category, model_name, min_price, max_price, features, status, include_details):
+    """Query and format inventory search results (uncached path of check_inventory)."""
     # Log database call
     database_logger.log_call(
         "search_inventory",
@@ -51,7 +139,8 @@ async def check_inventory(
             "model_name": model_name,
             "price_range": f"{min_price}-{max_price}" if min_price or max_price else None,
             "features_count": len(features) if features else 0,
-            "status": status
+            "status": status,
+            "include_details": include_details
         },
         level="debug"
     )
@@ -59,17 +148,11 @@ async def check_inventory(
     start_time = time.time()
     
     try:
-        # Get database client
-        client = get_supabase_client()
-        
-        # Build query with filters
-        query = _build_inventory_query(client, category, model_name, min_price, max_price, features, status)
-        
-        # Execute query
-        response = query.execute()
+        # Fetch matching rows (possibly shared with concurrent searches)
+        rows = await _fetch_inventory_rows(category, model_name, min_price, max_price, features, status, include_details)
         
         # Process and format results
-        result = _format_inventory_response(response.data, category, model_name, min_price, max_price, features, status)
+        result = _format_inventory_response(rows, category, model_name, min_price, max_price, features, status, include_details)
         
         duration_ms = (time.time() - start_time) * 1000
         
@@ -99,6 +182,80 @@ async def check_inventory(
         raise Exception(f"Inventory search failed: {str(e)}")
 
 
+async def _fetch_inventory_rows(category, model_name, min_price, max_price, features, status, include_details):
+    """Fetch raw inventory rows, batching with concurrent searches of the same filter shape."""
+    if INVENTORY_BATCH_WINDOW_MS <= 0:
+        return await _query_inventory_rows(category, model_name, min_price, max_price, features, status, include_details)
+    
+    shape = (model_name, min_price, max_price, tuple(features or ()), status, include_details)
+    batch = _PENDING_BATCHES.get(shape)
+    if batch is None and shape not in _IN_FLIGHT_SHAPES:
+        # Nothing to share a query with: run it now, and let searches of this shape
+        # arriving meanwhile batch up behind it
+        _IN_FLIGHT_SHAPES.add(shape)
+        try:
+            return await _query_inventory_rows(category, model_name, min_price, max_price, features, status, include_details)
+        finally:
+            _IN_FLIGHT_SHAPES.discard(shape)
+    
+    if batch is None:
+        # First search to join opens the batch window
+        batch = _PENDING_BATCHES[shape] = []
+        task = asyncio.create_task(_flush_batch(shape, INVENTORY_BATCH_WINDOW_MS / 1000))
+        _BATCH_TASKS.add(task)
+        task.add_done_callback(_BATCH_TASKS.discard)
+    
+    future = asyncio.get_running_loop().create_future()
+    batch.append((category, future))
+    return await future
+
+
+async def _flush_batch(shape: tuple, delay_seconds: float) -> None:
+    """Run one query for every search collected under shape and resolve each caller's future."""
+    await asyncio.sleep(delay_seconds)
+    batch = _PENDING_BATCHES.pop(shape)
+    model_name, min_price, max_price, features, status, include_details = shape
+    
+    # An unfiltered search needs every category anyway; otherwise fetch just the requested ones
+    categories = {category for category, _ in batch}
+    if None in categories:
+        category_filter = None
+    elif len(categories) == 1:
+        category_filter = next(iter(categories))
+    else:
+        category_filter = sorted(categories)
+    
+    try:
+        rows = await _query_inventory_rows(category_filter, model_name, min_price, max_price, list(features), status, include_details)
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+    
+    for category, future in batch:
+        if not future.done():
+            future.set_result(
+                rows if category is None or category == category_filter
+                else [row for row in rows if row['vehicles']['category'] == category]
+            )
+
+
+async def _query_inventory_rows(category, model_name, min_price, max_price, features, status, include_details):
+    """Build and execute the inventory query off the event loop."""
+    from db.connection import get_supabase_client
+    
+    # Get database client
+    client = get_supabase_client()
+    
+    # Build query with filters
+    query = _build_inventory_query(client, category, model_name, min_price, max_price, features, status, include_details)
+    
+    # Execute query (the Supabase client is synchronous)
+    response = await asyncio.to_thread(query.execute)
+    return response.data
+
+
 def _validate_inputs(category, model_name, min_price, max_price, features, status):
     """Validate input parameters."""
     valid_categories = ['sedan', 'suv', 'truck', 'coupe']
@@ -120,11 +277,13 @@ def _validate_inputs(category, model_name, min_price, max_price, features, statu
         raise ValueError("min_price cannot be greater than max_price")
 
 
-def _build_inventory_query(client, category, model_name, min_price, max_price, features, status):
+def _build_inventory_query(client, category, model_name, min_price, max_price, features, status, include_details=False):
     """Build Supabase query with all filters applied."""
+    # Detail requests also embed the vehicle's base price and current pricing row
+    detail_columns = f", base_price, {PRICING_COLUMNS}" if include_details else ""
     
     # Base query joining inventory with vehicles
-    query = client.table('inventory').select("""
+    query = client.table('inventory').select(f"""
         id,
         vehicle_id,
         vin,
@@ -139,9 +298,11 @@ def _build_inventory_query(client, category, model_name, min_price, max_price, f
             model,
             year,
             category,
-            is_active
+            is_active{detail_columns}
         )
     """)
+    if include_details:
+        query = with_current_pricing(query, 'vehicles.pricing')
     
     # Filter by vehicle status (only active vehicles unless specified)
     query = query.eq('vehicles.is_active', True)
@@ -150,8 +311,10 @@ def _build_inventory_query(client, category, model_name, min_price, max_price, f
     if status != 'all':
         query = query.eq('status', status)
     
-    # Filter by category
-    if category:
+    # Filter by category (a list when serving a batch of searches)
+    if isinstance(category, list):
+        query = query.in_('vehicles.category', category)
+    elif category:
         query = query.eq('vehicles.category', category)
     
     # Filter by model name (text search in brand or model)  
@@ -171,11 +334,10 @@ def _build_inventory_query(client, category, model_name, min_price, max_price, f
         max_price_cents = int(max_price * 100)
         query = query.lte('current_price', max_price_cents)
     
-    # Filter by features (must have ALL specified features)
+    # Filter by features (must have ALL specified features) with a single JSONB
+    # containment predicate, served by the GIN index on inventory.features
     if features and len(features) > 0:
-        for feature in features:
-            # Use PostgreSQL JSONB containment operator with proper JSON format
-            query = query.filter('features', 'cs', f'["{feature}"]')
+        query = query.filter('features', 'cs', json.dumps(features))
     
     # Order by price (ascending)
     query = query.order('current_price')
@@ -183,25 +345,10 @@ def _build_inventory_query(client, category, model_name, min_price, max_price, f
     return query
 
 
-def _format_inventory_response(data, category, model_name, min_price, max_price, features, status):
+def _format_inventory_response(data, category, model_name, min_price, max_price, features, status, include_details=False):
     """Format the response data into agent-friendly structure."""
     
-    vehicles = []
-    for item in data:
-        vehicle_info = item['vehicles']
-        
-        vehicles.append({
-            'inventory_id': item['id'],
-            'vehicle_id': item['vehicle_id'],
-            'brand': vehicle_info['brand'],
-            'model': vehicle_info['model'],
-            'category': vehicle_info['category'],
-            'color': item['color'],
-            'features': item['features'],
-            'price': int(item['current_price'] / 100),  # Convert cents to dollars
-            'status': item['status'],
-            'delivery_date': item['expected_delivery_date']
-        })
+    vehicles = [_format_vehicle(item, include_details) for item in data]
     
     # Build filters_applied object (only include non-None/non-default values)
     filters_applied = {}
@@ -221,4 +368,32 @@ def _format_inventory_response(data, category, model_name, min_price, max_price,
         'vehicles': vehicles,
         'total_count': len(vehicles),
         'filters_applied': filters_applied
-    }
\ No newline at end of file
+    }
+
+def _format_vehicle(item: Dict[str, Any], include_details: bool = False) -> Dict[str, Any]:
+    """Flatten one inventory row (with its embedded vehicle) into the agent-facing vehicle dict."""
+    vehicle_info = item['vehicles']
+    
+    vehicle = {
+        'inventory_id': item['id'],
+        'vehicle_id': item['vehicle_id'],
+        'brand': vehicle_info['brand'],
+        'model': vehicle_info['model'],
+        'category': vehicle_info['category'],
+        'color': item['color'],
+        'features': item['features'],
+        'price': int(item['current_price'] / 100),  # Convert cents to dollars
+        'status': item['status'],
+        'delivery_date': item['expected_delivery_date']
+    }
+    
+    # Same features/pricing blocks get_vehicle_details returns for this unit
+    if include_details:
+        # Batched callers share these rows, so read the embedded pricing without popping it
+        pricing_rows = vehicle_info.get('pricing')
+        pricing_data = pricing_rows[0] if pricing_rows else None
+        vehicle['year'] = vehicle_info['year']
+        vehicle['feature_details'] = get_features_info(item, pricing_data)
+        vehicle['pricing'] = get_pricing_info(vehicle_info, item, pricing_data)
+    
+    return vehicle
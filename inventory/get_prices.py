@@ -4,6 +4,7 @@ Get prices tool for automotive vehicles.
 Provides pricing information with feature-based calculations.
 """
 
+from collections import defaultdict
 from typing import Dict, List, Optional, Any
 import logging
 
@@ -328,19 +329,13 @@ async def _get_price_range_overview(client) -> Dict[str, Any]:
     
     # Calculate price statistics
     prices = [item['current_price'] // 100 for item in response.data]  # Convert to dollars
-    categories = {}
+    categories = defaultdict(lambda: {'prices': [], 'examples': []})
     
-    for item in response.data:
-        category = item['vehicles']['category']
-        price = item['current_price'] // 100
-        
-        if category not in categories:
-            categories[category] = {'prices': [], 'examples': []}
-        
-        categories[category]['prices'].append(price)
-        categories[category]['examples'].append(
-            f"{item['vehicles']['brand']} {item['vehicles']['model']}"
-        )
+    for item, price in zip(response.data, prices):
+        vehicle = item['vehicles']
+        category = categories[vehicle['category']]
+        category['prices'].append(price)
+        category['examples'].append(f"{vehicle['brand']} {vehicle['model']}")
     
     # Calculate overall statistics
     min_price = min(prices)
@@ -4,17 +4,35 @@ Get similar vehicles tool for automotive inventory.
 Finds alternative vehicles when the preferred option is unavailable.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+import base64
+import json
 import logging
+from db.connection import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+# Number of human-readable similarity reasons returned per alternative
+MAX_SIMILARITY_REASONS = 4
+
+# Postgres function that scores, ranks and keyset-paginates candidates
+# (supabase/migrations/20250908090000_similar_vehicle_candidates.sql)
+_CANDIDATES_RPC = 'similar_vehicle_candidates'
+
+# Columns of each RPC row that belong to the inventory unit rather than the vehicle model
+_INVENTORY_COLUMNS = (
+    'vehicle_id', 'vin', 'color', 'features', 'current_price',
+    'status', 'expected_delivery_date', 'location'
+)
+_VEHICLE_COLUMNS = ('brand', 'model', 'year', 'category', 'base_price')
+
 
 async def get_similar_vehicles(
     reference_vehicle_id: str,                    # Vehicle to find alternatives for
     max_results: int = 5,                        # Maximum number of alternatives
     price_tolerance_percent: int = 20,           # Price range tolerance
-    include_unavailable: bool = False            # Include sold/reserved vehicles
+    include_unavailable: bool = False,           # Include sold/reserved vehicles
+    cursor: Optional[str] = None                 # Opaque cursor from a previous page
 ) -> Dict[str, Any]:
     """
     Find similar vehicles based on category, price range, and features.
@@ -24,16 +42,16 @@ async def get_similar_vehicles(
         max_results: Maximum number of similar vehicles to return
         price_tolerance_percent: Price tolerance as percentage (e.g., 20 = ±20%)
         include_unavailable: Whether to include sold/reserved vehicles
+        cursor: next_cursor value from a previous response to fetch the next page
         
     Returns:
-        Dict containing similar vehicles ranked by similarity
+        Dict containing similar vehicles ranked by similarity, plus next_cursor
+        when more alternatives are available
         
     Raises:
         ValueError: For invalid parameters
         Exception: For database connection or query errors
     """
-    from db.connection import get_supabase_client
-    
     # Input validation
     if not reference_vehicle_id or not reference_vehicle_id.strip():
         raise ValueError("reference_vehicle_id is required")
@@ -44,6 +62,8 @@ async def get_similar_vehicles(
     if price_tolerance_percent < 0 or price_tolerance_percent > 100:
         raise ValueError("price_tolerance_percent must be between 0 and 100")
     
+    after = _decode_cursor(cursor) if cursor else None
+    
     try:
         client = get_supabase_client()
         
@@ -56,11 +76,18 @@ async def get_similar_vehicles(
             reference_vehicle, 
             max_results, 
             price_tolerance_percent, 
-            include_unavailable
+            include_unavailable,
+            after
         )
         
+        # One extra row is fetched to detect whether another page exists
+        next_cursor = None
+        if len(similar_vehicles) > max_results:
+            similar_vehicles = similar_vehicles[:max_results]
+            next_cursor = _encode_cursor(_ranking_key(similar_vehicles[-1]))
+        
         # Rank and format results
-        result = _format_similarity_response(reference_vehicle, similar_vehicles, max_results)
+        result = _format_similarity_response(reference_vehicle, similar_vehicles, max_results, next_cursor)
         
         logger.info(f"Found {len(similar_vehicles)} similar vehicles for {reference_vehicle['brand']} {reference_vehicle['model']}")
         return result
@@ -125,161 +152,75 @@ async def _get_reference_vehicle(client, vehicle_id: str) -> Dict[str, Any]:
     return vehicle_data
 
 
-async def _find_similar_vehicles(client, reference_vehicle: Dict, max_results: int, price_tolerance: int, include_unavailable: bool) -> List[Dict[str, Any]]:
-    """Find vehicles similar to the reference vehicle."""
+async def _find_similar_vehicles(client, reference_vehicle: Dict, max_results: int, price_tolerance: int, include_unavailable: bool, after: Optional[Tuple[float, str]] = None) -> List[Dict[str, Any]]:
+    """Fetch one page of vehicles similar to the reference, ranked in Postgres (up to max_results + 1 rows)."""
     
     reference_price = reference_vehicle['sample_current_price'] or reference_vehicle['base_price']
     price_min = reference_price * (100 - price_tolerance) // 100
     price_max = reference_price * (100 + price_tolerance) // 100
     
-    # Build query to find similar vehicles
-    query = client.table('inventory').select("""
-        id,
-        vehicle_id,
-        vin,
-        color,
-        features,
-        current_price,
-        status,
-        expected_delivery_date,
-        location,
-        vehicles!inner(
-            id,
-            brand,
-            model,
-            year,
-            category,
-            base_price,
-            is_active
-        )
-    """)
-    
-    # Filter by active vehicles
-    query = query.eq('vehicles.is_active', True)
-    
-    # Exclude the reference vehicle
-    query = query.neq('vehicle_id', reference_vehicle['id'])
-    
-    # Filter by category (same category)
-    query = query.eq('vehicles.category', reference_vehicle['category'])
-    
-    # Filter by price range
-    query = query.gte('current_price', price_min)
-    query = query.lte('current_price', price_max)
-    
-    # Filter by availability status
-    if not include_unavailable:
-        query = query.eq('status', 'available')
-    
-    # Execute query
-    response = query.execute()
-    
-    if not response.data:
-        # If no exact category matches, try broader search (remove category filter)
-        query = client.table('inventory').select("""
-            id,
-            vehicle_id,
-            vin,
-            color,
-            features,
-            current_price,
-            status,
-            expected_delivery_date,
-            location,
-            vehicles!inner(
-                id,
-                brand,
-                model,
-                year,
-                category,
-                base_price,
-                is_active
-            )
-        """)
-        query = query.eq('vehicles.is_active', True)
-        query = query.neq('vehicle_id', reference_vehicle['id'])
-        query = query.gte('current_price', price_min)
-        query = query.lte('current_price', price_max)
-        
-        if not include_unavailable:
-            query = query.eq('status', 'available')
-        
-        response = query.execute()
-    
-    # Calculate similarity scores and rank results
-    vehicles_with_scores = []
-    for item in response.data:
-        vehicle_info = item['vehicles']
-        similarity_score = _calculate_similarity_score(reference_vehicle, vehicle_info, item)
-        
-        vehicles_with_scores.append({
-            'inventory_data': item,
-            'vehicle_data': vehicle_info,
-            'similarity_score': similarity_score
-        })
+    # Scoring, the same-category/broader fallback, the keyset predicate and the
+    # limit all run in the database, so only this page's rows are shipped
+    params = {
+        'p_reference_vehicle_id': reference_vehicle['id'],
+        'p_category': reference_vehicle['category'],
+        'p_brand': reference_vehicle['brand'],
+        'p_year': reference_vehicle['year'],
+        'p_features': reference_vehicle.get('sample_features') or [],
+        'p_price_min': price_min,
+        'p_price_max': price_max,
+        'p_include_unavailable': include_unavailable,
+        'p_limit': max_results + 1
+    }
+    if after is not None:
+        params['p_after_score'], params['p_after_id'] = after
     
-    # Sort by similarity score (descending) and limit results
-    vehicles_with_scores.sort(key=lambda x: x['similarity_score'], reverse=True)
-    return vehicles_with_scores[:max_results]
+    rows = client.rpc(_CANDIDATES_RPC, params).execute().data
+    return [_split_candidate_row(row) for row in rows]
 
 
-def _calculate_similarity_score(reference_vehicle: Dict, vehicle_info: Dict, inventory_item: Dict) -> float:
-    """Calculate similarity score between reference and candidate vehicle."""
-    
-    score = 0.0
-    max_score = 0.0
+def _split_candidate_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Reshape a flat RPC row into the inventory/vehicle/score record used for formatting."""
+    inventory_data = {'id': row['inventory_id']}
+    inventory_data.update((column, row[column]) for column in _INVENTORY_COLUMNS)
     
-    # Category match (40% weight)
-    category_weight = 40
-    max_score += category_weight
-    if vehicle_info['category'] == reference_vehicle['category']:
-        score += category_weight
-    
-    # Brand match (25% weight)
-    brand_weight = 25
-    max_score += brand_weight
-    if vehicle_info['brand'].lower() == reference_vehicle['brand'].lower():
-        score += brand_weight
-    
-    # Year proximity (15% weight)
-    year_weight = 15
-    max_score += year_weight
-    year_diff = abs(vehicle_info['year'] - reference_vehicle['year'])
-    if year_diff == 0:
-        score += year_weight
-    elif year_diff == 1:
-        score += year_weight * 0.7
-    elif year_diff == 2:
-        score += year_weight * 0.4
-    elif year_diff <= 3:
-        score += year_weight * 0.2
-    
-    # Feature similarity (20% weight)
-    feature_weight = 20
-    max_score += feature_weight
-    reference_features = set(reference_vehicle.get('sample_features', []))
-    candidate_features = set(inventory_item.get('features', []))
+    vehicle_data = {'id': row['vehicle_id']}
+    vehicle_data.update((column, row[column]) for column in _VEHICLE_COLUMNS)
     
-    if reference_features or candidate_features:
-        if reference_features:
-            # Calculate overlap percentage
-            overlap = len(reference_features.intersection(candidate_features))
-            overlap_ratio = overlap / len(reference_features)
-            score += feature_weight * overlap_ratio
-        else:
-            # If reference has no features, give some score for any features
-            score += feature_weight * 0.5
-    else:
-        # Both have no features - perfect match for this aspect
-        score += feature_weight
-    
-    # Normalize score to percentage
-    return (score / max_score) * 100 if max_score > 0 else 0
+    return {
+        'inventory_data': inventory_data,
+        'vehicle_data': vehicle_data,
+        'similarity_score': row['similarity_score']
+    }
+
+
+def _ranking_key(vehicle: Dict[str, Any]) -> Tuple[float, str]:
+    """Total ordering for ranked results: similarity score, then inventory id as tie-breaker."""
+    return vehicle['similarity_score'], vehicle['inventory_data']['id']
+
+
+def _encode_cursor(position: Tuple[float, str]) -> str:
+    """Encode a (score, inventory_id) keyset position as an opaque base64url cursor."""
+    payload = json.dumps(list(position), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
 
 
-def _format_similarity_response(reference_vehicle: Dict, similar_vehicles: List[Dict], max_results: int) -> Dict[str, Any]:
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, inventory_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(score), str(inventory_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _format_similarity_response(reference_vehicle: Dict, similar_vehicles: List[Dict], max_results: int, next_cursor: Optional[str] = None) -> Dict[str, Any]:
     """Format the similarity search response."""
     
+    # Reference price (cents) resolved once for every candidate's price comparison
+    ref_price = reference_vehicle['sample_current_price'] or reference_vehicle['base_price']
+    
     alternatives = []
     for vehicle_data in similar_vehicles:
         inventory_item = vehicle_data['inventory_data']
@@ -300,7 +241,7 @@ def _format_similarity_response(reference_vehicle: Dict, similar_vehicles: List[
             'location': inventory_item['location'],
             'delivery_date': inventory_item['expected_delivery_date'],
             'similarity_score': round(similarity_score, 1),
-            'similarity_reasons': _get_similarity_reasons(reference_vehicle, vehicle_info, inventory_item, similarity_score)
+            'similarity_reasons': _get_similarity_reasons(reference_vehicle, vehicle_info, inventory_item, similarity_score, ref_price)
         })
     
     return {
@@ -314,16 +255,17 @@ def _format_similarity_response(reference_vehicle: Dict, similar_vehicles: List[
         'alternatives': alternatives,
         'total_found': len(alternatives),
         'max_requested': max_results,
+        'next_cursor': next_cursor,
         'search_criteria': {
             'same_category': reference_vehicle['category'],
             'price_range_tolerance': 'within configured range',
-            'availability_filter': 'available vehicles only' if len([v for v in alternatives if v['status'] == 'available']) == len(alternatives) else 'includes all statuses'
+            'availability_filter': 'available vehicles only' if all(v['status'] == 'available' for v in alternatives) else 'includes all statuses'
         }
     }
 
 
-def _get_similarity_reasons(reference_vehicle: Dict, vehicle_info: Dict, inventory_item: Dict, similarity_score: float) -> List[str]:
-    """Generate human-readable reasons for similarity."""
+def _get_similarity_reasons(reference_vehicle: Dict, vehicle_info: Dict, inventory_item: Dict, similarity_score: float, ref_price: int) -> List[str]:
+    """Generate human-readable reasons for similarity, stopping once MAX_SIMILARITY_REASONS are found."""
     
     reasons = []
     
@@ -342,7 +284,7 @@ def _get_similarity_reasons(reference_vehicle: Dict, vehicle_info: Dict, invento
     elif year_diff <= 2:
         reasons.append(f"Similar year ({vehicle_info['year']} vs {reference_vehicle['year']})")
     
-    # Feature overlap
+    # Feature overlap (category, brand and year give at most 3 reasons, so this always runs)
     reference_features = set(reference_vehicle.get('sample_features', []))
     candidate_features = set(inventory_item.get('features', []))
     
@@ -350,14 +292,14 @@ def _get_similarity_reasons(reference_vehicle: Dict, vehicle_info: Dict, invento
         overlap = reference_features.intersection(candidate_features)
         if overlap:
             reasons.append(f"Shared features: {', '.join(list(overlap)[:3])}")  # Show first 3
+            if len(reasons) >= MAX_SIMILARITY_REASONS:
+                return reasons
     
-    # Price comparison
-    ref_price = reference_vehicle.get('sample_current_price', reference_vehicle['base_price'])
-    candidate_price = inventory_item['current_price']
-    price_diff_percent = abs(candidate_price - ref_price) / ref_price * 100
-    
-    if price_diff_percent < 10:
+    # Price comparison: within 10% of the reference, in integer cents (|diff| * 10 < ref)
+    if abs(inventory_item['current_price'] - ref_price) * 10 < ref_price:
         reasons.append("Similar price range")
+        if len(reasons) >= MAX_SIMILARITY_REASONS:
+            return reasons
     
     # Overall similarity
     if similarity_score >= 80:
@@ -367,4 +309,4 @@ def _get_similarity_reasons(reference_vehicle: Dict, vehicle_info: Dict, invento
     elif similarity_score >= 40:
         reasons.append("Reasonable option")
     
-    return reasons[:4]  # Limit to 4 most relevant reasons
\ No newline at end of file
+    return reasons[:MAX_SIMILARITY_REASONS]
\ No newline at end of file
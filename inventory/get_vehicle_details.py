@@ -4,17 +4,50 @@ Get vehicle details tool for automotive inventory.
 Provides comprehensive information about specific vehicles.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Mapping, Optional, Any, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+import asyncio
 import logging
+import re
+
+from db.connection import get_supabase_client
+from ._cache import ResultCache
+from ._vehicle_info import (
+    PRICING_COLUMNS, estimate_monthly_payment, get_features_info, get_pricing_info, with_current_pricing
+)
 
 logger = logging.getLogger(__name__)
 
+# Short-lived cache of formatted responses; voice flows re-ask about the same vehicle within seconds
+RESULT_CACHE_TTL_SECONDS = 30
+RESULT_CACHE_MAX_ENTRIES = 1024
+_RESULT_CACHE = ResultCache(RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_MAX_ENTRIES)
+
+# Upper bound on vehicle IDs per get_vehicle_details_bulk call (keeps IN lists and URLs small)
+MAX_BULK_VEHICLES = 50
+
+# Inventory columns for the sample unit shown with a vehicle
+_INVENTORY_COLUMNS = """
+    id,
+    vehicle_id,
+    vin,
+    color,
+    features,
+    status,
+    current_price,
+    expected_delivery_date,
+    location,
+    created_at
+"""
+
 
 async def get_vehicle_details(
     vehicle_id: Optional[str] = None,      # Vehicle ID to get details for
     inventory_id: Optional[str] = None,    # Specific inventory item ID
     include_pricing: bool = True,          # Include detailed pricing information
-    include_similar: bool = False          # Include similar vehicle suggestions
+    include_similar: bool = False,         # Include similar vehicle suggestions
+    client=None                            # Optional Supabase client (defaults to shared client)
 ) -> Dict[str, Any]:
     """
     Get comprehensive details about a specific vehicle or inventory item.
@@ -24,6 +57,7 @@ async def get_vehicle_details(
         inventory_id: UUID of specific inventory item (preferred)
         include_pricing: Whether to include detailed pricing breakdown
         include_similar: Whether to include similar vehicle suggestions
+        client: Optional Supabase client to use instead of the shared pooled client
         
     Returns:
         Dict containing comprehensive vehicle information
@@ -32,39 +66,56 @@ async def get_vehicle_details(
         ValueError: For invalid parameters
         Exception: For database connection or query errors
     """
-    from db.connection import get_supabase_client
-    
+    # Only responses built with the shared client are cached
+    if client is not None:
+        return await _load_vehicle_details(vehicle_id, inventory_id, include_pricing, include_similar, client)
+    
+    cache_key = (vehicle_id, inventory_id, include_pricing, include_similar)
+    # Coalesce concurrent requests for the same key into a single load
+    return await _RESULT_CACHE.get_or_load(
+        cache_key,
+        lambda: _load_vehicle_details(vehicle_id, inventory_id, include_pricing, include_similar)
+    )
+
+
+async def _load_vehicle_details(
+    vehicle_id: Optional[str],
+    inventory_id: Optional[str],
+    include_pricing: bool,
+    include_similar: bool,
+    client=None
+) -> Dict[str, Any]:
+    """Query and format vehicle details (uncached path of get_vehicle_details)."""
     try:
-        client = get_supabase_client()
+        if client is None:
+            client = get_supabase_client()
         
         # Input validation - if no specific vehicle requested, return all vehicle details
         if not vehicle_id and not inventory_id:
             return await _get_all_vehicle_details(client, include_pricing, include_similar)
         
-        # Get vehicle and inventory information
-        if inventory_id:
-            vehicle_data, inventory_data = await _get_inventory_details(client, inventory_id)
-        else:
-            vehicle_data, inventory_data = await _get_vehicle_details(client, vehicle_id)
+        # When the vehicle_id is known up front, start the similar-vehicles lookup
+        # alongside the main queries instead of after them
+        similar_task = None
+        if include_similar and not inventory_id:
+            similar_task = asyncio.create_task(_get_similar_alternatives(vehicle_id))
         
-        # Get pricing information if requested
-        pricing_data = None
-        if include_pricing:
-            pricing_data = await _get_pricing_details(client, vehicle_data['id'])
+        # Get vehicle, inventory and (embedded) pricing information
+        try:
+            if inventory_id:
+                vehicle_data, inventory_data, pricing_data = await _get_inventory_details(client, inventory_id, include_pricing)
+            else:
+                vehicle_data, inventory_data, pricing_data = await _get_vehicle_details(client, vehicle_id, include_pricing)
+        except BaseException:
+            if similar_task:
+                similar_task.cancel()
+            raise
         
-        # Get similar vehicles if requested
         similar_vehicles = []
         if include_similar and inventory_data:
-            try:
-                from .get_similar_vehicles import get_similar_vehicles
-                similar_response = await get_similar_vehicles(
-                    reference_vehicle_id=vehicle_data['id'],
-                    max_results=3,
-                    include_unavailable=False
-                )
-                similar_vehicles = similar_response.get('alternatives', [])
-            except Exception as e:
-                logger.warning(f"Could not get similar vehicles: {str(e)}")
+            similar_vehicles = await (similar_task or _get_similar_alternatives(vehicle_data['id']))
+        elif similar_task:
+            similar_task.cancel()
         
         # Format comprehensive response
         result = _format_vehicle_details_response(
@@ -90,10 +141,146 @@ async def get_vehicle_details(
         raise Exception(f"Vehicle details query failed: {error_msg}")
 
 
-async def _get_inventory_details(client, inventory_id: str) -> tuple[Dict[str, Any], Dict[str, Any]]:
-    """Get vehicle details via inventory ID."""
+async def get_vehicle_details_bulk(
+    vehicle_ids: List[str],                # Vehicle IDs to get details for
+    include_pricing: bool = True,          # Include detailed pricing information
+    client=None                            # Optional Supabase client (defaults to shared client)
+) -> Dict[str, Any]:
+    """
+    Get details for several vehicles with a fixed number of queries.
+    
+    Issues one vehicles query with each vehicle's available unit and (optionally)
+    current pricing row embedded, regardless of how many vehicle IDs are
+    requested. Only vehicles without an available unit cost a second query,
+    which embeds one unit of any status for each of them.
+    
+    Args:
+        vehicle_ids: UUIDs of the vehicles to get details for
+        include_pricing: Whether to include detailed pricing breakdown
+        client: Optional Supabase client to use instead of the shared pooled client
+        
+    Returns:
+        Dict containing per-vehicle details (in request order) and IDs that were
+        not found or are no longer active. Availability entries carry only a
+        message_code; render it with format_availability_message when needed.
+        
+    Raises:
+        ValueError: For invalid parameters
+        Exception: For database connection or query errors
+    """
+    if not vehicle_ids:
+        raise ValueError("vehicle_ids must contain at least one vehicle ID")
+    
+    vehicle_ids = list(dict.fromkeys(vehicle_ids))  # De-duplicate, keep order
+    if len(vehicle_ids) > MAX_BULK_VEHICLES:
+        raise ValueError(f"Too many vehicle_ids: maximum is {MAX_BULK_VEHICLES}")
     
-    response = client.table('inventory').select("""
+    try:
+        if client is None:
+            client = get_supabase_client()
+        
+        # One row per vehicle: the embedded inventory and pricing filters narrow the
+        # embedded rows (not the vehicles), and each embed is limited per vehicle
+        pricing_columns = f", {PRICING_COLUMNS}" if include_pricing else ""
+        vehicle_query = client.table('vehicles').select(f"""
+            id,
+            brand,
+            model,
+            year,
+            category,
+            base_price,
+            image_url,
+            is_active,
+            created_at,
+            updated_at,
+            inventory({_INVENTORY_COLUMNS}){pricing_columns}
+        """).in_('id', vehicle_ids).eq('inventory.status', 'available') \
+            .limit(1, foreign_table='inventory').limit(len(vehicle_ids))
+        if include_pricing:
+            vehicle_query = with_current_pricing(vehicle_query.eq('pricing.is_current', True), 'pricing')
+        
+        vehicle_response = await asyncio.to_thread(vehicle_query.execute)
+        vehicle_rows = vehicle_response.data
+        
+        pricing_by_vehicle = {row['id']: _pop_pricing(row) for row in vehicle_rows}
+        inventory_by_vehicle = {row['id']: _pop_inventory(row) for row in vehicle_rows}
+        
+        # No available units; fall back to any unit, for all such vehicles at once
+        without_units = [row['id'] for row in vehicle_rows if row['is_active'] and inventory_by_vehicle[row['id']] is None]
+        if without_units:
+            fallback_query = client.table('vehicles').select(f"id, inventory({_INVENTORY_COLUMNS})") \
+                .in_('id', without_units).limit(1, foreign_table='inventory')
+            fallback_response = await asyncio.to_thread(fallback_query.execute)
+            for row in fallback_response.data:
+                inventory_by_vehicle[row['id']] = _pop_inventory(row)
+        
+        vehicles_by_id = {row['id']: row for row in vehicle_rows if row['is_active']}
+        
+        vehicles = []
+        not_found = []
+        for vehicle_id in vehicle_ids:
+            vehicle_data = vehicles_by_id.get(vehicle_id)
+            if vehicle_data is None:
+                not_found.append(vehicle_id)
+                continue
+            vehicles.append(_format_vehicle_details_response(
+                vehicle_data,
+                inventory_by_vehicle.get(vehicle_id),
+                pricing_by_vehicle.get(vehicle_id),
+                [],
+                include_availability_message=False
+            ))
+        
+        logger.info(f"Bulk vehicle details retrieved for {len(vehicles)} of {len(vehicle_ids)} vehicles")
+        return {
+            'vehicles': vehicles,
+            'total_vehicles': len(vehicles),
+            'not_found': not_found
+        }
+        
+    except ValueError:
+        raise
+    except Exception as e:
+        error_msg = str(e)
+        if "invalid input syntax for type uuid" in error_msg:
+            raise ValueError(f"Invalid vehicle_ids format: {vehicle_ids}")
+        logger.error(f"Error getting bulk vehicle details: {error_msg}")
+        raise Exception(f"Bulk vehicle details query failed: {error_msg}")
+
+
+async def _get_similar_alternatives(vehicle_id: str) -> List[Dict[str, Any]]:
+    """Get up to 3 available alternatives; failures are logged and yield no suggestions."""
+    
+    try:
+        from .get_similar_vehicles import get_similar_vehicles
+        similar_response = await get_similar_vehicles(
+            reference_vehicle_id=vehicle_id,
+            max_results=3,
+            include_unavailable=False
+        )
+        return similar_response.get('alternatives', [])
+    except Exception as e:
+        logger.warning(f"Could not get similar vehicles: {str(e)}")
+        return []
+
+
+def _pop_pricing(vehicle_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Detach the embedded pricing row (if any) from a vehicle record."""
+    pricing_rows = vehicle_data.pop('pricing', None)
+    return pricing_rows[0] if pricing_rows else None
+
+
+def _pop_inventory(vehicle_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Detach the embedded inventory unit (if any) from a vehicle record."""
+    inventory_rows = vehicle_data.pop('inventory', None)
+    return inventory_rows[0] if inventory_rows else None
+
+
+async def _get_inventory_details(client, inventory_id: str, include_pricing: bool = False) -> tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Get vehicle details (and optionally current pricing) via inventory ID."""
+    
+    pricing_columns = f", {PRICING_COLUMNS}" if include_pricing else ""
+    query = client.table('inventory').select(f"""
         id,
         vehicle_id,
         vin,
@@ -114,27 +301,33 @@ async def _get_inventory_details(client, inventory_id: str) -> tuple[Dict[str, A
             image_url,
             is_active,
             created_at,
-            updated_at
+            updated_at{pricing_columns}
         )
-    """).eq('id', inventory_id).execute()
+    """).eq('id', inventory_id)
+    if include_pricing:
+        query = with_current_pricing(query, 'vehicles.pricing')
+    
+    response = await asyncio.to_thread(query.execute)
     
     if not response.data:
         raise ValueError(f"Inventory item '{inventory_id}' not found")
     
     inventory_item = response.data[0]
     vehicle_data = inventory_item['vehicles']
+    pricing_data = _pop_pricing(vehicle_data)
     
     if not vehicle_data['is_active']:
         raise ValueError("Vehicle is no longer active")
     
-    return vehicle_data, inventory_item
+    return vehicle_data, inventory_item, pricing_data
 
 
-async def _get_vehicle_details(client, vehicle_id: str) -> tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
-    """Get vehicle details via vehicle ID."""
+async def _get_vehicle_details(client, vehicle_id: str, include_pricing: bool = False) -> tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Get vehicle details (and optionally current pricing) via vehicle ID."""
     
-    # Get vehicle information
-    vehicle_response = client.table('vehicles').select("""
+    # Vehicle information
+    pricing_columns = f", {PRICING_COLUMNS}" if include_pricing else ""
+    vehicle_query = client.table('vehicles').select(f"""
         id,
         brand,
         model,
@@ -144,60 +337,53 @@ async def _get_vehicle_details(client, vehicle_id: str) -> tuple[Dict[str, Any],
         image_url,
         is_active,
         created_at,
-        updated_at
-    """).eq('id', vehicle_id).execute()
+        updated_at{pricing_columns}
+    """).eq('id', vehicle_id)
+    if include_pricing:
+        vehicle_query = with_current_pricing(vehicle_query, 'pricing')
+    
+    # Sample inventory item - a single available unit
+    inventory_query = client.table('inventory').select(_INVENTORY_COLUMNS) \
+        .eq('vehicle_id', vehicle_id).eq('status', 'available').limit(1)
+    
+    # Both queries only need vehicle_id, so run the round-trips concurrently
+    # (supabase-py executes synchronously, hence the worker threads)
+    vehicle_response, inventory_response = await asyncio.gather(
+        asyncio.to_thread(vehicle_query.execute),
+        asyncio.to_thread(inventory_query.execute)
+    )
     
     if not vehicle_response.data:
         raise ValueError(f"Vehicle '{vehicle_id}' not found")
     
     vehicle_data = vehicle_response.data[0]
+    pricing_data = _pop_pricing(vehicle_data)
     
     if not vehicle_data['is_active']:
         raise ValueError("Vehicle is no longer active")
     
-    # Get sample inventory item (prefer available ones)
-    inventory_response = client.table('inventory').select("""
-        id,
-        vehicle_id,
-        vin,
-        color,
-        features,
-        status,
-        current_price,
-        expected_delivery_date,
-        location,
-        created_at
-    """).eq('vehicle_id', vehicle_id).order('status').execute()  # This will put 'available' first alphabetically
+    if not inventory_response.data:
+        # No available units; fall back to any unit
+        fallback_query = client.table('inventory').select(_INVENTORY_COLUMNS) \
+            .eq('vehicle_id', vehicle_id).limit(1)
+        inventory_response = await asyncio.to_thread(fallback_query.execute)
     
     inventory_data = inventory_response.data[0] if inventory_response.data else None
     
-    return vehicle_data, inventory_data
-
-
-async def _get_pricing_details(client, vehicle_id: str) -> Optional[Dict[str, Any]]:
-    """Get comprehensive pricing information."""
-    
-    response = client.table('pricing').select("""
-        id,
-        base_price,
-        feature_prices,
-        discount_amount,
-        is_current,
-        effective_date,
-        created_at
-    """).eq('vehicle_id', vehicle_id).order('is_current', desc=True).order('effective_date', desc=True).execute()
-    
-    return response.data[0] if response.data else None
+    return vehicle_data, inventory_data, pricing_data
 
 
 def _format_vehicle_details_response(
     vehicle_data: Dict[str, Any], 
     inventory_data: Optional[Dict[str, Any]], 
     pricing_data: Optional[Dict[str, Any]], 
-    similar_vehicles: List[Dict[str, Any]]
+    similar_vehicles: List[Dict[str, Any]],
+    include_availability_message: bool = True
 ) -> Dict[str, Any]:
     """Format comprehensive vehicle details response."""
     
+    spec_key = _spec_key(vehicle_data)
+    
     # Basic vehicle information
     result = {
         'vehicle': {
@@ -209,14 +395,14 @@ def _format_vehicle_details_response(
             'image_url': vehicle_data.get('image_url'),
             'is_active': vehicle_data['is_active']
         },
-        'specifications': _get_vehicle_specifications(vehicle_data),
-        'availability': _get_availability_info(inventory_data),
-        'features': _get_features_info(inventory_data, pricing_data)
+        'specifications': _thaw(_get_vehicle_specifications(spec_key)),
+        'availability': _get_availability_info(inventory_data, include_availability_message),
+        'features': get_features_info(inventory_data, pricing_data)
     }
     
     # Add pricing information if available
     if pricing_data or inventory_data:
-        result['pricing'] = _get_pricing_info(vehicle_data, inventory_data, pricing_data)
+        result['pricing'] = get_pricing_info(vehicle_data, inventory_data, pricing_data)
     
     # Add inventory-specific information if available
     if inventory_data:
@@ -234,17 +420,55 @@ def _format_vehicle_details_response(
         result['similar_vehicles'] = similar_vehicles[:3]  # Limit to 3
     
     # Add warranty and additional information
-    result['additional_info'] = _get_additional_info(vehicle_data)
+    result['additional_info'] = _thaw(_get_additional_info(spec_key))
     
     return result
 
 
-def _get_vehicle_specifications(vehicle_data: Dict[str, Any]) -> Dict[str, Any]:
+# Brand tiers used by the derived-info helpers (matched against lowercased brand words)
+_PREMIUM_BRANDS = frozenset({'bmw', 'mercedes', 'audi'})
+_ECONOMY_BRANDS = frozenset({'toyota', 'honda'})
+
+
+@lru_cache(maxsize=128)
+def _brand_tier(brand: str) -> str:
+    """Classify a lowercased brand as 'premium', 'economy' or 'standard'."""
+    brand_words = frozenset(re.findall(r'[a-z]+', brand))
+    if not _PREMIUM_BRANDS.isdisjoint(brand_words):
+        return 'premium'
+    if not _ECONOMY_BRANDS.isdisjoint(brand_words):
+        return 'economy'
+    return 'standard'
+
+
+def _spec_key(vehicle_data: Dict[str, Any]) -> Tuple[str, str, int]:
+    """Hashable (brand_lower, category, year) key for the cached derived-info helpers."""
+    return vehicle_data['brand'].lower(), vehicle_data['category'], vehicle_data['year']
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively wrap dicts in read-only MappingProxyType views."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Recursively convert read-only mappings back into fresh dicts."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    return value
+
+
+# The derived-info helpers below are pure functions of the spec key and are cached.
+# Cached mappings are shared between calls, so they are frozen here and thawed
+# into fresh dicts when embedded in a response.
+
+@lru_cache(maxsize=512)
+def _get_vehicle_specifications(spec_key: Tuple[str, str, int]) -> Mapping[str, Any]:
     """Generate vehicle specifications based on category and brand."""
     
-    category = vehicle_data['category']
-    brand = vehicle_data['brand'].lower()
-    year = vehicle_data['year']
+    brand, category, year = spec_key
     
     # Basic specs that apply to all vehicles
     specs = {
@@ -301,132 +525,77 @@ def _get_vehicle_specifications(vehicle_data: Dict[str, Any]) -> Dict[str, Any]:
         })
         specs.pop('fuel_economy_city_mpg', None)
         specs.pop('fuel_economy_highway_mpg', None)
-    elif 'bmw' in brand or 'mercedes' in brand or 'audi' in brand:
+    elif _brand_tier(brand) == 'premium':
         specs['transmission'] = 'Automatic (Premium)'
         if category in ['sedan', 'coupe']:
             specs['drivetrain'] = 'RWD'
     
-    return specs
+    return _freeze(specs)
+
+
+# Availability message templates, keyed by message_code and formatted from the availability dict
+_AVAILABILITY_MESSAGES = {
+    'unknown': 'No inventory information available',
+    'available': 'Available for immediate viewing and purchase',
+    'available_elsewhere': 'Available at {location}, can be transferred to main dealership',
+    'reserved': 'Currently reserved by another customer',
+    'sold': 'This vehicle has been sold',
+    'other': 'Vehicle status: {status}'
+}
+
+
+def format_availability_message(availability: Dict[str, Any]) -> str:
+    """
+    Render the user-facing message for an availability dict.
+    
+    Args:
+        availability: Availability info containing 'message_code' (plus 'status'/'location')
+        
+    Returns:
+        Human-readable availability message
+    """
+    return _AVAILABILITY_MESSAGES[availability['message_code']].format(**availability)
 
 
-def _get_availability_info(inventory_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-    """Get availability information."""
+def _get_availability_info(inventory_data: Optional[Dict[str, Any]], include_message: bool = True) -> Dict[str, Any]:
+    """Get availability information (message rendering can be skipped by callers that don't need it)."""
     
     if not inventory_data:
-        return {
+        availability = {
             'status': 'unknown',
-            'message': 'No inventory information available',
+            'message_code': 'unknown',
             'in_stock': False
         }
-    
-    status = inventory_data['status']
-    location = inventory_data['location']
-    delivery_date = inventory_data.get('expected_delivery_date')
-    
-    availability = {
-        'status': status,
-        'location': location,
-        'in_stock': status == 'available',
-        'delivery_date': delivery_date
-    }
-    
-    # Add user-friendly message
-    if status == 'available':
-        if location == 'main_dealership':
-            availability['message'] = 'Available for immediate viewing and purchase'
-        else:
-            availability['message'] = f'Available at {location}, can be transferred to main dealership'
-    elif status == 'reserved':
-        availability['message'] = 'Currently reserved by another customer'
-    elif status == 'sold':
-        availability['message'] = 'This vehicle has been sold'
     else:
-        availability['message'] = f'Vehicle status: {status}'
-    
-    return availability
-
-
-def _get_features_info(inventory_data: Optional[Dict[str, Any]], pricing_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-    """Get features and options information."""
-    
-    included_features = inventory_data.get('features', []) if inventory_data else []
-    feature_prices = pricing_data.get('feature_prices', {}) if pricing_data else {}
-    
-    # Organize features by category
-    feature_categories = {
-        'comfort': [],
-        'technology': [],
-        'safety': [],
-        'performance': [],
-        'exterior': [],
-        'other': []
-    }
-    
-    # Categorize features
-    for feature in included_features:
-        feature_lower = feature.lower()
-        if any(word in feature_lower for word in ['leather', 'heated', 'cooled', 'climate', 'seat', 'comfort']):
-            feature_categories['comfort'].append(feature)
-        elif any(word in feature_lower for word in ['nav', 'bluetooth', 'usb', 'display', 'audio', 'tech', 'camera', 'screen']):
-            feature_categories['technology'].append(feature)
-        elif any(word in feature_lower for word in ['safety', 'brake', 'warning', 'assist', 'blind', 'collision', 'airbag']):
-            feature_categories['safety'].append(feature)
-        elif any(word in feature_lower for word in ['engine', 'turbo', 'sport', 'performance', 'suspension']):
-            feature_categories['performance'].append(feature)
-        elif any(word in feature_lower for word in ['wheel', 'paint', 'roof', 'exterior', 'trim', 'light']):
-            feature_categories['exterior'].append(feature)
+        status = inventory_data['status']
+        location = inventory_data['location']
+        
+        if status == 'available':
+            message_code = 'available' if location == 'main_dealership' else 'available_elsewhere'
+        elif status in ('reserved', 'sold'):
+            message_code = status
         else:
-            feature_categories['other'].append(feature)
-    
-    # Remove empty categories
-    feature_categories = {k: v for k, v in feature_categories.items() if v}
-    
-    return {
-        'included_features': included_features,
-        'features_by_category': feature_categories,
-        'total_features': len(included_features),
-        'feature_pricing_available': len(feature_prices) > 0
-    }
-
-
-def _get_pricing_info(vehicle_data: Dict[str, Any], inventory_data: Optional[Dict[str, Any]], pricing_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-    """Get comprehensive pricing information."""
-    
-    base_price = vehicle_data['base_price']
-    current_price = inventory_data['current_price'] if inventory_data else base_price
-    
-    pricing_info = {
-        'base_price_dollars': base_price // 100,
-        'current_price_dollars': current_price // 100,
-        'price_currency': 'USD'
-    }
-    
-    if pricing_data:
-        discount = pricing_data.get('discount_amount', 0)
-        if discount > 0:
-            pricing_info['discount_applied_dollars'] = discount // 100
-            pricing_info['savings'] = discount // 100
+            message_code = 'other'
         
-        feature_prices = pricing_data.get('feature_prices', {})
-        if feature_prices:
-            pricing_info['available_options'] = {}
-            for feature, price in feature_prices.items():
-                pricing_info['available_options'][feature] = price // 100
+        availability = {
+            'status': status,
+            'location': location,
+            'in_stock': status == 'available',
+            'delivery_date': inventory_data.get('expected_delivery_date'),
+            'message_code': message_code
+        }
     
-    # Calculate financing estimate (rough)
-    monthly_payment = _estimate_monthly_payment(current_price // 100)
-    pricing_info['estimated_monthly_payment_dollars'] = monthly_payment
+    if include_message:
+        availability['message'] = format_availability_message(availability)
     
-    return pricing_info
+    return availability
 
 
-def _get_additional_info(vehicle_data: Dict[str, Any]) -> Dict[str, Any]:
+@lru_cache(maxsize=512)
+def _get_additional_info(spec_key: Tuple[str, str, int]) -> Mapping[str, Any]:
     """Get additional vehicle information."""
     
-    year = vehicle_data['year']
-    brand = vehicle_data['brand']
-    
-    return {
+    return _freeze({
         'warranty': {
             'basic_years': 3,
             'basic_miles': 36000,
@@ -438,23 +607,22 @@ def _get_additional_info(vehicle_data: Dict[str, Any]) -> Dict[str, Any]:
             'year_3_percent': 35,
             'year_5_percent': 55
         },
-        'insurance_group': _estimate_insurance_group(vehicle_data),
+        'insurance_group': _estimate_insurance_group(spec_key),
         'maintenance': {
             'first_service_miles': 7500,
             'service_interval_miles': 7500,
-            'estimated_annual_cost_dollars': _estimate_maintenance_cost(vehicle_data)
+            'estimated_annual_cost_dollars': _estimate_maintenance_cost(spec_key)
         }
-    }
+    })
 
 
-def _estimate_insurance_group(vehicle_data: Dict[str, Any]) -> str:
+@lru_cache(maxsize=512)
+def _estimate_insurance_group(spec_key: Tuple[str, str, int]) -> str:
     """Estimate insurance group based on vehicle characteristics."""
     
-    category = vehicle_data['category']
-    year = vehicle_data['year']
-    brand = vehicle_data['brand'].lower()
+    brand, category, year = spec_key
     
-    if 'bmw' in brand or 'mercedes' in brand or 'audi' in brand:
+    if _brand_tier(brand) == 'premium':
         return 'Premium'
     elif category == 'truck':
         return 'Standard'
@@ -464,17 +632,17 @@ def _estimate_insurance_group(vehicle_data: Dict[str, Any]) -> str:
         return 'Standard'
 
 
-def _estimate_maintenance_cost(vehicle_data: Dict[str, Any]) -> int:
+@lru_cache(maxsize=512)
+def _estimate_maintenance_cost(spec_key: Tuple[str, str, int]) -> int:
     """Estimate annual maintenance cost."""
     
-    category = vehicle_data['category']
-    brand = vehicle_data['brand'].lower()
+    brand, category, _year = spec_key
     
     base_cost = 800  # Base maintenance cost
     
-    if 'bmw' in brand or 'mercedes' in brand or 'audi' in brand:
+    if _brand_tier(brand) == 'premium':
         base_cost *= 1.5
-    elif 'toyota' in brand or 'honda' in brand:
+    elif _brand_tier(brand) == 'economy':
         base_cost *= 0.8
     
     if category == 'truck':
@@ -485,93 +653,64 @@ def _estimate_maintenance_cost(vehicle_data: Dict[str, Any]) -> int:
     return int(base_cost)
 
 
-def _estimate_monthly_payment(price_dollars: int, down_payment_percent: float = 10, interest_rate: float = 6.5, term_years: int = 5) -> int:
-    """Estimate monthly payment for financing."""
-    
-    down_payment = price_dollars * (down_payment_percent / 100)
-    loan_amount = price_dollars - down_payment
-    monthly_rate = (interest_rate / 100) / 12
-    num_payments = term_years * 12
-    
-    if monthly_rate == 0:
-        monthly_payment = loan_amount / num_payments
-    else:
-        monthly_payment = loan_amount * (monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
-    
-    return int(monthly_payment)
-
-
 async def _get_all_vehicle_details(client, include_pricing: bool, include_similar: bool) -> Dict[str, Any]:
     """Get details for all available vehicles when no specific vehicle requested."""
     
-    # Query all available vehicles with basic information
-    response = client.table('vehicles').select("""
-        id,
-        brand,
-        model,
-        year,
-        category,
-        base_price,
-        is_active,
-        inventory!inner(
-            id,
-            vin,
-            color,
-            features,
-            current_price,
-            status
-        )
-    """).eq('is_active', True).eq('inventory.status', 'available').execute()
+    # Flat projection of available inventory (view) and per-category stats (RPC),
+    # fetched concurrently; aggregation happens in Postgres
+    inventory_query = client.from_('v_available_inventory').select(
+        'vehicle_id,inventory_id,brand,model,year,category,color,vin,features,current_price,status'
+    ).order('vehicle_id')
+    stats_query = client.rpc('inventory_category_stats')
     
-    if not response.data:
+    inventory_response, stats_response = await asyncio.gather(
+        asyncio.to_thread(inventory_query.execute),
+        asyncio.to_thread(stats_query.execute)
+    )
+    
+    if not inventory_response.data:
         return {
             'message': 'No vehicles available in inventory',
             'vehicles': []
         }
     
     vehicles_summary = []
-    categories = {}
     
-    for vehicle_record in response.data:
-        vehicle_data = vehicle_record
-        inventory_items = vehicle_record.get('inventory', [])
+    for item in inventory_response.data:
+        # Basic vehicle info
+        vehicle_info = {
+            'vehicle_id': item['vehicle_id'],
+            'inventory_id': item['inventory_id'],
+            'brand': item['brand'],
+            'model': item['model'],
+            'year': item['year'],
+            'category': item['category'],
+            'color': item['color'],
+            'vin': item['vin'],
+            'features': item.get('features', []),
+            'current_price_dollars': item['current_price'] // 100,
+            'status': item['status']
+        }
         
-        for inventory_item in inventory_items:
-            # Basic vehicle info
-            vehicle_info = {
-                'vehicle_id': vehicle_data['id'],
-                'inventory_id': inventory_item['id'],
-                'brand': vehicle_data['brand'],
-                'model': vehicle_data['model'],
-                'year': vehicle_data['year'],
-                'category': vehicle_data['category'],
-                'color': inventory_item['color'],
-                'vin': inventory_item['vin'],
-                'features': inventory_item.get('features', []),
-                'current_price_dollars': inventory_item['current_price'] // 100,
-                'status': inventory_item['status']
+        # Add pricing if requested
+        if include_pricing:
+            vehicle_info['financing_estimate'] = {
+                'estimated_monthly_payment_dollars': estimate_monthly_payment(item['current_price'] // 100)
             }
-            
-            # Add pricing if requested
-            if include_pricing:
-                vehicle_info['financing_estimate'] = {
-                    'estimated_monthly_payment_dollars': _estimate_monthly_payment(inventory_item['current_price'] // 100)
-                }
-            
-            vehicles_summary.append(vehicle_info)
-            
-            # Category statistics
-            category = vehicle_data['category']
-            if category not in categories:
-                categories[category] = {'count': 0, 'price_range': {'min': None, 'max': None}}
-            
-            categories[category]['count'] += 1
-            price = inventory_item['current_price'] // 100
-            
-            if categories[category]['price_range']['min'] is None or price < categories[category]['price_range']['min']:
-                categories[category]['price_range']['min'] = price
-            if categories[category]['price_range']['max'] is None or price > categories[category]['price_range']['max']:
-                categories[category]['price_range']['max'] = price
+        
+        vehicles_summary.append(vehicle_info)
+    
+    # Category statistics (prices converted from cents)
+    categories = {
+        stats['category']: {
+            'count': stats['count'],
+            'price_range': {
+                'min': stats['min_price'] // 100,
+                'max': stats['max_price'] // 100
+            }
+        }
+        for stats in stats_response.data or []
+    }
     
     return {
         'message': f'Found {len(vehicles_summary)} vehicles available in inventory',
@@ -581,4 +720,4 @@ async def _get_all_vehicle_details(client, include_pricing: bool, include_simila
             'by_category': categories,
             'helpful_hint': 'Ask for details about specific vehicles using their vehicle_id or inventory_id'
         }
-    }
\ No newline at end of file
+    }
@@ -5,10 +5,11 @@ This package provides tools for synchronizing knowledge base content
 between GitHub repositories and Vapi's knowledge base system.
 """
 
-from .fetch_latest_kb import fetch_latest_kb
+from .fetch_latest_kb import fetch_latest_kb, GitHubRateLimitError
 from .sync_knowledge_base import sync_knowledge_base
 
 __all__ = [
     "fetch_latest_kb",
+    "GitHubRateLimitError",
     "sync_knowledge_base"
 ]
@@ -6,19 +6,60 @@ for car dealership voice agent knowledge synchronization.
 """
 
 import asyncio
+import copy
 import httpx
+import json
 import os
 import time
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from urllib.parse import urlparse
 import re
 from dotenv import load_dotenv
-from logging_config import github_api_logger
+from logging_config import github_api_logger, logger
+from http_clients import DEFAULT_TIMEOUT_SECONDS, get_github_client, with_retries
 
 # Load environment variables
 load_dotenv()
 
+# Downloads are aborted once a file exceeds this multiple of KB_MAX_FILE_SIZE_MB
+# (files between 1x and this limit are still processed, with a warning)
+HARD_SIZE_LIMIT_MULTIPLIER = 5
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Rate-limited fetches wait for the reset only when it is this close; otherwise fail fast
+RATE_LIMIT_MAX_WAIT_SECONDS = 120
+
+# GitHub raw URL pattern used by URL validation
+_GITHUB_RAW_RE = re.compile(r'https://raw\.githubusercontent\.com/[\w\-\.]+/[\w\-\.]+/[\w\-\.]+/.+\.md$')
+
+# Per-URL cache: url -> (fetched_at, etag, last_modified, file_data)
+_KB_CACHE: Dict[str, Tuple[datetime, Optional[str], Optional[str], Dict[str, Any]]] = {}
+# Per-URL locks so concurrent callers don't fetch the same file twice
+_KB_LOCKS: Dict[str, asyncio.Lock] = {}
+
+# Optional on-disk copy of _KB_CACHE (in KB_CACHE_DIR) so ETags survive restarts
+KB_CACHE_FILE_NAME = "kb_fetch_cache.json"
+_disk_cache_loaded_from: Optional[str] = None
+_disk_cache_dirty = False
+
+# Whole-result cache: tuple(urls) -> (monotonic timestamp, result)
+_RESULT_CACHE: Dict[Tuple[str, ...], Tuple[float, Dict[str, Any]]] = {}
+# Per-URL-set locks, held only while that set is being fetched
+_RESULT_LOCKS: Dict[Tuple[str, ...], asyncio.Lock] = {}
+
+
+class GitHubRateLimitError(Exception):
+    """GitHub rate limit exhausted with a reset too far away to wait for."""
+    
+    def __init__(self, reset_in_seconds: int):
+        self.reset_in_seconds = reset_in_seconds
+        super().__init__(
+            f"GitHub API rate limit exceeded; resets in {reset_in_seconds}s. "
+            "Set GITHUB_TOKEN to raise the limit from 60 to 5000 requests/hour"
+        )
+
 
 async def fetch_latest_kb() -> Dict[str, Any]:
     """
@@ -26,10 +67,15 @@ async def fetch_latest_kb() -> Dict[str, Any]:
     All parameters are loaded from environment variables for consistent voice agent operation.
         
     Returns:
-        Dict containing files data, metadata, and any warnings
+        Dict containing files data, metadata, and any warnings. Files that failed
+        to fetch are listed under "errors" as {url, error} when others succeeded.
+        Results served from the in-process cache carry "cached": True.
+        "unchanged" is True when every file matched its cached copy (served
+        within the cache window or revalidated with a 304).
         
     Raises:
         ValueError: Missing or invalid environment configuration
+        GitHubRateLimitError: Rate limit exhausted and not resetting soon
         Exception: Network, HTTP, or processing errors
     """
     # Load configuration from environment variables
@@ -37,19 +83,99 @@ async def fetch_latest_kb() -> Dict[str, Any]:
     if not github_raw_urls_str:
         raise ValueError("GITHUB_RAW_URLS environment variable is required")
     
-    github_raw_urls = [url.strip() for url in github_raw_urls_str.split(",")]
-    cache_duration_minutes = int(os.getenv("KB_CACHE_DURATION_MINUTES", "30"))
-    max_file_size_mb = int(os.getenv("KB_MAX_FILE_SIZE_MB", "10"))
-    timeout_seconds = int(os.getenv("KB_TIMEOUT_SECONDS", "30"))
+    github_raw_urls, cache_duration_minutes, max_file_size_mb, timeout_seconds, max_concurrency = _parse_kb_config(
+        github_raw_urls_str,
+        os.getenv("KB_CACHE_DURATION_MINUTES", "30"),
+        os.getenv("KB_MAX_FILE_SIZE_MB", "10"),
+        os.getenv("KB_TIMEOUT_SECONDS", "30"),
+        os.getenv("KB_MAX_CONCURRENCY", "10")
+    )
+    cache_dir = os.getenv("KB_CACHE_DIR")
+    
+    # Serve repeated calls within the cache window from the last complete result;
+    # the per-URL-set lock makes concurrent callers share a single fan-out fetch
+    cache_key = github_raw_urls
+    cached = _get_cached_result(cache_key, cache_duration_minutes)
+    if cached is not None:
+        return cached
+    
+    lock = _RESULT_LOCKS.setdefault(cache_key, asyncio.Lock())
+    async with lock:
+        try:
+            cached = _get_cached_result(cache_key, cache_duration_minutes)
+            if cached is not None:
+                return cached
+            
+            result = await _fetch_all_files(
+                github_raw_urls,
+                cache_duration_minutes,
+                max_file_size_mb,
+                timeout_seconds,
+                max_concurrency,
+                cache_dir
+            )
+        finally:
+            # Waiting callers hold their own reference; later ones find the cached result
+            if _RESULT_LOCKS.get(cache_key) is lock:
+                del _RESULT_LOCKS[cache_key]
+        
+        # Partial results are not cached so failed files are retried next call
+        if "errors" not in result:
+            _RESULT_CACHE[cache_key] = (time.monotonic(), result)
+        # Callers get their own files list, so mutating it never changes the cached result
+        return copy.deepcopy(result)
+
+
+def _get_cached_result(cache_key: Tuple[str, ...], cache_duration_minutes: int) -> Optional[Dict[str, Any]]:
+    """Return a deep copy of the cached result for cache_key if it is within the cache window."""
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached and time.monotonic() - cached[0] < cache_duration_minutes * 60:
+        return dict(copy.deepcopy(cached[1]), cached=True, unchanged=True)
+    return None
+
+
+@lru_cache(maxsize=8)
+def _parse_kb_config(
+    github_raw_urls_str: str,
+    cache_duration_minutes: str,
+    max_file_size_mb: str,
+    timeout_seconds: str,
+    max_concurrency: str
+) -> Tuple[Tuple[str, ...], int, int, int, int]:
+    """Parse and validate the raw KB environment values (cached per distinct set of values)."""
+    github_raw_urls = tuple(url.strip() for url in github_raw_urls_str.split(","))
     
     # Validate URLs
     for url in github_raw_urls:
         if not _is_valid_url(url):
             raise ValueError(f"Invalid URL format in GITHUB_RAW_URLS: {url}")
     
+    return (
+        github_raw_urls,
+        int(cache_duration_minutes),
+        int(max_file_size_mb),
+        int(timeout_seconds),
+        int(max_concurrency)
+    )
+
+
+async def _fetch_all_files(
+    github_raw_urls: Tuple[str, ...],
+    cache_duration_minutes: int,
+    max_file_size_mb: int,
+    timeout_seconds: int,
+    max_concurrency: int,
+    cache_dir: Optional[str]
+) -> Dict[str, Any]:
+    """Fetch every configured file and build the fetch_latest_kb result."""
+    if cache_dir and _disk_cache_loaded_from != cache_dir:
+        await asyncio.to_thread(_load_disk_cache, cache_dir)
+    
     start_time = datetime.now()
     files = []
     warnings = []
+    errors = []
+    any_modified = False
     
     # Log the fetch operation start
     github_api_logger.log_call(
@@ -58,31 +184,63 @@ async def fetch_latest_kb() -> Dict[str, Any]:
             "url_count": len(github_raw_urls),
             "cache_duration": cache_duration_minutes,
             "max_file_size_mb": max_file_size_mb,
-            "timeout": timeout_seconds
+            "timeout": timeout_seconds,
+            "max_concurrency": max_concurrency
         }
     )
     
-    # Configure HTTP client with proper headers and timeout
-    headers = {
-        "User-Agent": "Elite Motors KB Sync Tool/1.0",
-        "Accept": "text/plain, text/markdown, */*"
-    }
+    # Shared pooled client (headers set on the client, timeout per request)
+    client = get_github_client()
+    
+    # Bound in-flight requests so large URL lists don't exhaust the pool or hit rate limits
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def bounded_fetch(url: str):
+        async with semaphore:
+            try:
+                return await _fetch_single_file(
+                    client, url, max_file_size_mb, cache_duration_minutes, timeout_seconds
+                )
+            except GitHubRateLimitError:
+                raise
+            except Exception as e:
+                # Per-file failures are reported alongside the other files
+                return e
     
     try:
-        async with httpx.AsyncClient(timeout=timeout_seconds, headers=headers) as client:
-            # Fetch all files concurrently
-            tasks = [_fetch_single_file(client, url, max_file_size_mb) for url in github_raw_urls]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Fetch all files concurrently. Every URL shares the same exhausted rate
+        # limit, so a rate limit error cancels the remaining downloads
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                tasks = [task_group.create_task(bounded_fetch(url)) for url in github_raw_urls]
+        except* GitHubRateLimitError as rate_limit_errors:
+            raise rate_limit_errors.exceptions[0]
+        
+        # Process results - keep successful files, report failures per URL
+        for url, task in zip(github_raw_urls, tasks):
+            result = task.result()
+            if isinstance(result, Exception):
+                errors.append({"url": url, "error": str(result)})
+                continue
             
-            # Process results
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    raise Exception(f"Failed to fetch {github_raw_urls[i]}: {str(result)}")
-                
-                file_data, file_warnings = result
-                files.append(file_data)
-                warnings.extend(file_warnings)
+            file_data, file_warnings, modified = result
+            any_modified = any_modified or modified
+            files.append(file_data)
+            warnings.extend(file_warnings)
+        
+        if not files:
+            first_error = errors[0]
+            raise Exception(f"Failed to fetch {first_error['url']}: {first_error['error']}")
     
+    except GitHubRateLimitError as e:
+        fetch_duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        github_api_logger.log_response(
+            "fetch_knowledge_base",
+            success=False,
+            error=str(e),
+            duration_ms=fetch_duration_ms
+        )
+        raise
     except httpx.NetworkError as e:
         fetch_duration_ms = (datetime.now() - start_time).total_seconds() * 1000
         github_api_logger.log_response(
@@ -113,6 +271,9 @@ async def fetch_latest_kb() -> Dict[str, Any]:
             raise
         raise Exception(f"Error fetching knowledge base: {str(e)}")
     
+    if cache_dir and _disk_cache_dirty:
+        await asyncio.to_thread(_save_disk_cache, cache_dir)
+    
     end_time = datetime.now()
     fetch_duration_ms = (end_time - start_time).total_seconds() * 1000
     
@@ -124,7 +285,8 @@ async def fetch_latest_kb() -> Dict[str, Any]:
         response={
             "files_count": len(files),
             "total_size_kb": round(total_size / 1024, 1),
-            "warnings_count": len(warnings)
+            "warnings_count": len(warnings),
+            "errors_count": len(errors)
         },
         duration_ms=fetch_duration_ms
     )
@@ -134,50 +296,138 @@ async def fetch_latest_kb() -> Dict[str, Any]:
         "total_files": len(files),
         "last_updated": end_time.isoformat(),
         "fetch_duration_ms": round(fetch_duration_ms, 2),
-        "cache_duration_minutes": cache_duration_minutes
+        "cache_duration_minutes": cache_duration_minutes,
+        "unchanged": not errors and not any_modified
     }
     
     if warnings:
         result["warnings"] = warnings
     
+    if errors:
+        result["errors"] = errors
+    
     return result
 
 
 async def _fetch_single_file(
     client: httpx.AsyncClient, 
     url: str, 
-    max_file_size_mb: int
-) -> tuple[Dict[str, Any], List[str]]:
+    max_file_size_mb: int,
+    cache_duration_minutes: int = 0,
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS
+) -> tuple[Dict[str, Any], List[str], bool]:
     """
-    Fetch a single file from GitHub raw URL
+    Fetch a single file from GitHub raw URL, reusing the cached copy when possible
+    
+    Cached files younger than cache_duration_minutes are returned without a request.
+    Older entries are revalidated with If-None-Match/If-Modified-Since, and a 304
+    response reuses the cached content.
     
     Args:
         client: HTTP client instance
         url: GitHub raw URL
         max_file_size_mb: Maximum file size warning threshold
+        cache_duration_minutes: How long a cached file is served without revalidation
+        timeout_seconds: Request timeout
         
     Returns:
-        Tuple of (file_data, warnings)
+        Tuple of (file_data, warnings, modified), where modified is False when
+        the cached copy was reused
     """
-    fetch_start = datetime.now()
     warnings = []
     
+    lock = _KB_LOCKS.setdefault(url, asyncio.Lock())
+    async with lock:
+        file_data, modified = await _fetch_file_data(
+            client, url, max_file_size_mb, cache_duration_minutes, timeout_seconds
+        )
+    
+    # Check file size and warn if large
+    size_mb = file_data["size_bytes"] / (1024 * 1024)
+    if size_mb > max_file_size_mb:
+        warnings.append(f"Large file warning: {file_data['filename']} is {size_mb:.1f}MB")
+    
+    return file_data, warnings, modified
+
+
+async def _fetch_file_data(
+    client: httpx.AsyncClient,
+    url: str,
+    max_file_size_mb: int,
+    cache_duration_minutes: int,
+    timeout_seconds: float
+) -> Tuple[Dict[str, Any], bool]:
+    """Fetch a single file's data and whether it changed, consulting and updating the per-URL cache."""
+    fetch_start = datetime.now()
+    
+    cached = _KB_CACHE.get(url)
+    if cached:
+        fetched_at, etag, last_modified, cached_data = cached
+        if fetch_start - fetched_at < timedelta(minutes=cache_duration_minutes):
+            return dict(cached_data), False
+    
+    # Conditional request headers for revalidating a cached copy
+    conditional_headers = {}
+    if cached:
+        if etag:
+            conditional_headers["If-None-Match"] = etag
+        if last_modified:
+            conditional_headers["If-Modified-Since"] = last_modified
+    
+    request_headers = dict(conditional_headers)
+    github_token = os.getenv("GITHUB_TOKEN")
+    if github_token:
+        request_headers["Authorization"] = f"token {github_token}"
+    
+    hard_limit_bytes = max_file_size_mb * HARD_SIZE_LIMIT_MULTIPLIER * 1024 * 1024
+    
+    async def download() -> Tuple[httpx.Response, Optional[bytearray]]:
+        # Stream the body so oversized files are aborted instead of fully buffered
+        async with client.stream("GET", url, headers=request_headers, timeout=timeout_seconds) as response:
+            if response.status_code == 304 and cached:
+                return response, None
+            
+            response.raise_for_status()
+            
+            content_length = response.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > hard_limit_bytes:
+                raise Exception(f"File too large: {int(content_length) / (1024 * 1024):.1f}MB")
+            
+            body = bytearray()
+            async for chunk in response.aiter_bytes(chunk_size=STREAM_CHUNK_SIZE):
+                body.extend(chunk)
+                if len(body) > hard_limit_bytes:
+                    raise Exception(
+                        f"File too large: exceeds {max_file_size_mb * HARD_SIZE_LIMIT_MULTIPLIER}MB limit"
+                    )
+            return response, body
+    
     try:
-        response = await client.get(url)
-        response.raise_for_status()
+        # Transient failures (network, timeouts, 429/5xx) are retried with backoff
+        try:
+            response, body = await with_retries(download)
+        except httpx.HTTPStatusError as e:
+            reset_in_seconds = _rate_limit_reset_wait(e.response)
+            if reset_in_seconds is None:
+                raise
+            if reset_in_seconds > RATE_LIMIT_MAX_WAIT_SECONDS:
+                raise GitHubRateLimitError(reset_in_seconds)
+            # Reset is imminent: wait it out and retry once
+            await asyncio.sleep(reset_in_seconds)
+            response, body = await with_retries(download)
+        
+        if body is None:
+            file_data = dict(cached_data, fetch_time=fetch_start.isoformat())
+            _store_cache_entry(url, fetch_start, etag, last_modified, file_data)
+            return dict(file_data), False
         
         # Extract filename from URL
         filename = url.split('/')[-1]
         if not filename.endswith('.md'):
             filename += '.md'
         
-        content = response.text
-        size_bytes = len(content.encode('utf-8'))
-        
-        # Check file size and warn if large
-        size_mb = size_bytes / (1024 * 1024)
-        if size_mb > max_file_size_mb:
-            warnings.append(f"Large file warning: {filename} is {size_mb:.1f}MB")
+        content = body.decode(response.encoding or 'utf-8', errors='replace')
+        size_bytes = len(body)
         
         file_data = {
             "filename": filename,
@@ -187,7 +437,15 @@ async def _fetch_single_file(
             "fetch_time": fetch_start.isoformat()
         }
         
-        return file_data, warnings
+        _store_cache_entry(
+            url,
+            fetch_start,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            file_data
+        )
+        
+        return dict(file_data), True
         
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 403 and "X-RateLimit-Remaining" in e.response.headers:
@@ -200,6 +458,98 @@ async def _fetch_single_file(
         raise Exception("Request timeout")
 
 
+def _store_cache_entry(
+    url: str,
+    fetched_at: datetime,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    file_data: Dict[str, Any]
+) -> None:
+    """Record a fetched file in the per-URL cache and mark the disk copy stale."""
+    global _disk_cache_dirty
+    _KB_CACHE[url] = (fetched_at, etag, last_modified, file_data)
+    _disk_cache_dirty = True
+
+
+def _rate_limit_reset_wait(response: httpx.Response) -> Optional[int]:
+    """Seconds until the GitHub rate limit resets, or None if the response isn't a rate-limit 403."""
+    if response.status_code != 403 or response.headers.get("X-RateLimit-Remaining") != "0":
+        return None
+    reset_at = response.headers.get("X-RateLimit-Reset", "")
+    if not reset_at.isdigit():
+        return None
+    return max(0, int(reset_at) - int(time.time()))
+
+
+def _load_disk_cache(cache_dir: str) -> None:
+    """Populate _KB_CACHE from the JSON cache file in cache_dir, if present."""
+    global _disk_cache_loaded_from
+    _disk_cache_loaded_from = cache_dir
+    cache_path = os.path.join(cache_dir, KB_CACHE_FILE_NAME)
+    
+    try:
+        with open(cache_path, encoding="utf-8") as cache_file:
+            entries = json.load(cache_file)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable KB cache file", path=cache_path, error=str(e))
+        return
+    
+    if not isinstance(entries, dict):
+        logger.warning("Ignoring unreadable KB cache file", path=cache_path, error="expected a JSON object")
+        return
+    
+    for url, entry in entries.items():
+        # Entries already fetched in this process are newer than the disk copy
+        if url in _KB_CACHE:
+            continue
+        try:
+            _KB_CACHE[url] = _parse_disk_cache_entry(entry)
+        except (KeyError, TypeError, ValueError) as e:
+            # Malformed or old-format entry: leave it out so the file is fetched again
+            logger.warning("Ignoring invalid KB cache entry", url=url, error=repr(e))
+
+
+def _parse_disk_cache_entry(entry: Dict[str, Any]) -> Tuple[datetime, Optional[str], Optional[str], Dict[str, Any]]:
+    """Convert a JSON cache file entry to a _KB_CACHE value; raises KeyError/TypeError/ValueError if malformed."""
+    fetched_at = datetime.fromisoformat(entry["fetched_at"])
+    if fetched_at.tzinfo is not None:
+        raise ValueError("fetched_at must be a naive local timestamp")
+    
+    file_data = entry["file_data"]
+    for field, field_type in (("filename", str), ("content", str), ("size_bytes", int)):
+        if not isinstance(file_data[field], field_type):
+            raise TypeError(f"file_data.{field} must be {field_type.__name__}")
+    
+    return fetched_at, entry.get("etag"), entry.get("last_modified"), file_data
+
+
+def _save_disk_cache(cache_dir: str) -> None:
+    """Atomically write _KB_CACHE to the JSON cache file in cache_dir."""
+    global _disk_cache_dirty
+    cache_path = os.path.join(cache_dir, KB_CACHE_FILE_NAME)
+    entries = {
+        url: {
+            "fetched_at": fetched_at.isoformat(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "file_data": file_data
+        }
+        for url, (fetched_at, etag, last_modified, file_data) in _KB_CACHE.items()
+    }
+    
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(entries, cache_file)
+        os.replace(tmp_path, cache_path)
+        _disk_cache_dirty = False
+    except OSError as e:
+        logger.warning("Could not write KB cache file", path=cache_path, error=str(e))
+
+
 def _is_valid_url(url: str) -> bool:
     """
     Validate URL format
@@ -210,6 +560,10 @@ def _is_valid_url(url: str) -> bool:
     Returns:
         True if valid URL format
     """
+    # Cheap rejection before the comparatively expensive urlparse
+    if not url[:8].lower().startswith(('http://', 'https://')):
+        return False
+    
     try:
         parsed = urlparse(url)
         # Basic URL validation
@@ -217,8 +571,7 @@ def _is_valid_url(url: str) -> bool:
             return False
         
         # GitHub raw URL pattern validation
-        github_raw_pattern = r'https://raw\.githubusercontent\.com/[\w\-\.]+/[\w\-\.]+/[\w\-\.]+/.+\.md$'
-        if not re.match(github_raw_pattern, url):
+        if not _GITHUB_RAW_RE.match(url):
             # Allow other valid URLs but prefer GitHub raw URLs
             return parsed.scheme in ['http', 'https'] and len(parsed.netloc) > 0
         
@@ -9,16 +9,31 @@ Complete workflow for synchronizing knowledge base files with Vapi:
 """
 
 import asyncio
+import hashlib
 import httpx
 import os
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
-import io
+from http_clients import get_vapi_client, with_retries
 
 # Load environment variables
 load_dotenv()
 
+# Maximum concurrent Vapi file deletes/uploads during a sync
+VAPI_MAX_CONCURRENCY = 10
+
+# Uploaded files are named {prefix}{content_hash}_{filename} so unchanged files can be kept
+CONTENT_HASH_LENGTH = 8
+
+# Only these Vapi requests are retried; a retried upload POST could create a duplicate
+# file, and the next sync uploads whatever is still missing anyway
+IDEMPOTENT_METHODS = frozenset({"GET", "DELETE", "PATCH"})
+
+# File names last synced per (Vapi base URL, tool ID, prefix); when the fetch reports
+# every file unchanged and the names match, the sync is skipped without listing Vapi files
+_SYNCED_FILE_NAMES: Dict[tuple, frozenset] = {}
+
 
 async def sync_knowledge_base() -> Dict[str, Any]:
     """
@@ -27,7 +42,11 @@ async def sync_knowledge_base() -> Dict[str, Any]:
     All parameters are loaded from environment variables for consistent voice agent operation.
         
     Returns:
-        Dict containing sync results and metadata
+        Dict containing sync results and metadata. Only files whose content
+        changed are uploaded and only stale files are deleted; "skipped" is True
+        when Vapi already held every file, in which case the tool is not updated.
+        An unchanged fetch of the files this process last synced makes no Vapi
+        requests at all.
         
     Raises:
         ValueError: Missing or invalid environment configuration
@@ -56,48 +75,74 @@ async def sync_knowledge_base() -> Dict[str, Any]:
         if not markdown_files:
             raise ValueError("No markdown files found from knowledge base fetch")
         
+        # Files missing from the fetch would be deleted as stale, so never sync a partial fetch
+        if kb_result.get("errors"):
+            failed_urls = ", ".join(error["url"] for error in kb_result["errors"])
+            raise Exception(f"Failed to fetch {failed_urls}")
+        
     except Exception as e:
         raise Exception(f"Failed to fetch knowledge base content: {str(e)}")
     
     start_time = datetime.now()
     
-    # Configure HTTP client with authentication
-    headers = {
-        "Authorization": f"Bearer {vapi_api_key}",
-        "User-Agent": "Elite Motors KB Sync Tool/1.0"
+    # Shared pooled client; authentication and timeout are applied per request
+    client = get_vapi_client(vapi_base_url)
+    request_options = {
+        "headers": {"Authorization": f"Bearer {vapi_api_key}"},
+        "timeout": timeout_seconds
     }
     
+    files_by_name = {
+        _kb_file_name(file_name_prefix, file_data): file_data
+        for file_data in markdown_files
+    }
+    sync_key = (vapi_base_url, knowledge_base_tool_id, file_name_prefix)
+    
+    if kb_result.get("unchanged") and _SYNCED_FILE_NAMES.get(sync_key) == frozenset(files_by_name):
+        return _sync_result(knowledge_base_tool_id, start_time, files_unchanged=len(files_by_name), skipped=True)
+    
     files_deleted = 0
     files_uploaded = 0
     new_file_ids = []
     
     try:
-        async with httpx.AsyncClient(
-            timeout=timeout_seconds, 
-            headers=headers,
-            base_url=vapi_base_url
-        ) as client:
-            
-            # Step 1: List existing files
-            existing_files = await _list_existing_files(client)
-            
-            # Step 2: Delete matching knowledge base files
-            kb_files_to_delete = [
-                file for file in existing_files 
-                if file.get("name", "").startswith(file_name_prefix)
-            ]
-            
-            if kb_files_to_delete:
-                files_deleted = await _delete_existing_files(client, kb_files_to_delete)
+        # Step 1: List existing files
+        existing_files = await _list_existing_files(client, request_options)
+        
+        # Step 2: Diff existing knowledge base files against the fetched content
+        kept_file_ids = {}
+        stale_files = []
+        for file in existing_files:
+            name = file.get("name")
+            if not name or not name.startswith(file_name_prefix):
+                continue
+            if name in files_by_name and name not in kept_file_ids:
+                kept_file_ids[name] = file["id"]
+            else:
+                stale_files.append(file)
+        
+        files_to_upload = [
+            file_data for name, file_data in files_by_name.items()
+            if name not in kept_file_ids
+        ]
+        skipped = not files_to_upload and not stale_files
+        
+        if not skipped:
+            # Step 3: Upload changed markdown files
+            if files_to_upload:
+                new_file_ids = await _upload_markdown_files(
+                    client, files_to_upload, file_name_prefix, request_options
+                )
+                files_uploaded = len(new_file_ids)
             
-            # Step 3: Upload new markdown files
-            new_file_ids = await _upload_markdown_files(
-                client, markdown_files, file_name_prefix
+            # Step 4: Point the knowledge base tool at kept + new files before removing stale ones
+            await _update_knowledge_base_tool(
+                client, knowledge_base_tool_id, list(kept_file_ids.values()) + new_file_ids, request_options
             )
-            files_uploaded = len(new_file_ids)
             
-            # Step 4: Update knowledge base tool with new file IDs
-            await _update_knowledge_base_tool(client, knowledge_base_tool_id, new_file_ids)
+            # Step 5: Delete stale knowledge base files
+            if stale_files:
+                files_deleted = await _delete_existing_files(client, stale_files, request_options)
     
     except httpx.NetworkError as e:
         raise Exception(f"Network error during sync: {str(e)}")
@@ -109,6 +154,29 @@ async def sync_knowledge_base() -> Dict[str, Any]:
             raise
         raise Exception(f"Error during knowledge base sync: {str(e)}")
     
+    _SYNCED_FILE_NAMES[sync_key] = frozenset(files_by_name)
+    
+    return _sync_result(
+        knowledge_base_tool_id,
+        start_time,
+        files_deleted=files_deleted,
+        files_uploaded=files_uploaded,
+        files_unchanged=len(kept_file_ids),
+        new_file_ids=new_file_ids,
+        skipped=skipped
+    )
+
+
+def _sync_result(
+    knowledge_base_tool_id: str,
+    start_time: datetime,
+    files_deleted: int = 0,
+    files_uploaded: int = 0,
+    files_unchanged: int = 0,
+    new_file_ids: Optional[List[str]] = None,
+    skipped: bool = False
+) -> Dict[str, Any]:
+    """Build the sync_knowledge_base result dict."""
     end_time = datetime.now()
     sync_duration_ms = (end_time - start_time).total_seconds() * 1000
     
@@ -116,27 +184,38 @@ async def sync_knowledge_base() -> Dict[str, Any]:
         "success": True,
         "files_deleted": files_deleted,
         "files_uploaded": files_uploaded,
-        "new_file_ids": new_file_ids,
-        "tool_updated": True,
+        "files_unchanged": files_unchanged,
+        "new_file_ids": new_file_ids or [],
+        "tool_updated": not skipped,
+        "skipped": skipped,
         "knowledge_base_tool_id": knowledge_base_tool_id,
         "sync_duration_ms": round(sync_duration_ms, 2),
         "timestamp": end_time.isoformat()
     }
 
 
-async def _list_existing_files(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+def _kb_file_name(file_name_prefix: str, file_data: Dict[str, Any]) -> str:
+    """Vapi file name for a fetched file: {prefix}{content_hash}_{filename}."""
+    content_hash = hashlib.blake2b(file_data["content"].encode("utf-8"), digest_size=16).hexdigest()
+    return f"{file_name_prefix}{content_hash[:CONTENT_HASH_LENGTH]}_{file_data['filename']}"
+
+
+async def _list_existing_files(
+    client: httpx.AsyncClient,
+    request_options: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
     """
     List all existing files in Vapi
     
     Args:
         client: HTTP client instance
+        request_options: Per-request httpx options (auth headers, timeout)
         
     Returns:
         List of existing file objects
     """
     try:
-        response = await client.get("/file")
-        response.raise_for_status()
+        response = await _send_with_retries(client, "GET", "/file", request_options)
         return response.json()
     except httpx.HTTPStatusError as e:
         raise Exception(f"Failed to list files: HTTP {e.response.status_code}")
@@ -146,7 +225,8 @@ async def _list_existing_files(client: httpx.AsyncClient) -> List[Dict[str, Any]
 
 async def _delete_existing_files(
     client: httpx.AsyncClient, 
-    files_to_delete: List[Dict[str, Any]]
+    files_to_delete: List[Dict[str, Any]],
+    request_options: Optional[Dict[str, Any]] = None
 ) -> int:
     """
     Delete existing knowledge base files
@@ -154,33 +234,36 @@ async def _delete_existing_files(
     Args:
         client: HTTP client instance
         files_to_delete: List of file objects to delete
+        request_options: Per-request httpx options (auth headers, timeout)
         
     Returns:
         Number of files successfully deleted
     """
-    deleted_count = 0
+    semaphore = asyncio.Semaphore(VAPI_MAX_CONCURRENCY)
     
-    for file_data in files_to_delete:
-        file_id = file_data.get("id")
-        if not file_id:
-            continue
-            
-        try:
-            response = await client.delete(f"/file/{file_id}")
-            response.raise_for_status()
-            deleted_count += 1
-        except httpx.HTTPStatusError as e:
-            raise Exception(f"Failed to delete file {file_id}: HTTP {e.response.status_code}")
-        except Exception as e:
-            raise Exception(f"Failed to delete file {file_id}: {str(e)}")
+    async def delete_file(file_id: str) -> None:
+        async with semaphore:
+            try:
+                await _send_with_retries(client, "DELETE", f"/file/{file_id}", request_options)
+            except httpx.HTTPStatusError as e:
+                raise Exception(f"Failed to delete file {file_id}: HTTP {e.response.status_code}")
+            except Exception as e:
+                raise Exception(f"Failed to delete file {file_id}: {str(e)}")
+    
+    file_ids = [file_data["id"] for file_data in files_to_delete if file_data.get("id")]
+    results = await asyncio.gather(*(delete_file(file_id) for file_id in file_ids), return_exceptions=True)
     
-    return deleted_count
+    # Let every delete finish, then surface the first failure
+    _raise_first_error(results)
+    
+    return len(file_ids)
 
 
 async def _upload_markdown_files(
     client: httpx.AsyncClient,
     markdown_files: List[Dict[str, str]],
-    file_name_prefix: str
+    file_name_prefix: str,
+    request_options: Optional[Dict[str, Any]] = None
 ) -> List[str]:
     """
     Upload new markdown files to Vapi
@@ -189,51 +272,82 @@ async def _upload_markdown_files(
         client: HTTP client instance
         markdown_files: List of markdown file data
         file_name_prefix: Prefix for file names
+        request_options: Per-request httpx options (auth headers, timeout)
         
     Returns:
         List of new file IDs
     """
-    new_file_ids = []
+    semaphore = asyncio.Semaphore(VAPI_MAX_CONCURRENCY)
     
-    for file_data in markdown_files:
+    async def upload_file(file_data: Dict[str, str]) -> str:
         filename = file_data["filename"]
         content = file_data["content"]
         
-        # Create prefixed filename
-        prefixed_filename = f"{file_name_prefix}{filename}"
+        # Create prefixed, content-hashed filename
+        prefixed_filename = _kb_file_name(file_name_prefix, file_data)
         
         # Prepare multipart file data
-        file_obj = io.StringIO(content)
         files = {
-            "file": (prefixed_filename, file_obj, "text/markdown")
+            "file": (prefixed_filename, content.encode("utf-8"), "text/markdown")
         }
         
-        try:
-            response = await client.post("/file", files=files)
-            response.raise_for_status()
-            
-            upload_result = response.json()
-            file_id = upload_result.get("id")
-            
-            if not file_id:
-                raise Exception(f"No file ID returned for {filename}")
-            
-            new_file_ids.append(file_id)
-            
-        except httpx.HTTPStatusError as e:
-            raise Exception(f"Failed to upload file {filename}: HTTP {e.response.status_code}")
-        except Exception as e:
-            raise Exception(f"Failed to upload file {filename}: {str(e)}")
-        finally:
-            file_obj.close()
+        async with semaphore:
+            try:
+                response = await _send_with_retries(client, "POST", "/file", request_options, files=files)
+                
+                upload_result = response.json()
+                file_id = upload_result.get("id")
+                
+                if not file_id:
+                    raise Exception(f"No file ID returned for {filename}")
+                
+                return file_id
+                
+            except httpx.HTTPStatusError as e:
+                raise Exception(f"Failed to upload file {filename}: HTTP {e.response.status_code}")
+            except Exception as e:
+                raise Exception(f"Failed to upload file {filename}: {str(e)}")
+    
+    # Upload concurrently; gather keeps the IDs in input order
+    results = await asyncio.gather(*(upload_file(file_data) for file_data in markdown_files), return_exceptions=True)
     
-    return new_file_ids
+    # Let every upload finish, then surface the first failure
+    _raise_first_error(results)
+    
+    return list(results)
+
+
+async def _send_with_retries(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    request_options: Optional[Dict[str, Any]],
+    **kwargs
+) -> httpx.Response:
+    """Send a Vapi request, retrying transient failures of idempotent methods; raises HTTPStatusError on error status."""
+    
+    async def send() -> httpx.Response:
+        response = await client.request(method, path, **kwargs, **(request_options or {}))
+        response.raise_for_status()
+        return response
+    
+    if method not in IDEMPOTENT_METHODS:
+        return await send()
+    return await with_retries(send)
+
+
+def _raise_first_error(results: List[Any]) -> None:
+    """Re-raise the first exception from an asyncio.gather(return_exceptions=True) result list."""
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
 
 
 async def _update_knowledge_base_tool(
     client: httpx.AsyncClient,
     tool_id: str, 
-    new_file_ids: List[str]
+    new_file_ids: List[str],
+    request_options: Optional[Dict[str, Any]] = None
 ) -> None:
     """
     Update knowledge base tool with new file IDs
@@ -242,14 +356,14 @@ async def _update_knowledge_base_tool(
         client: HTTP client instance
         tool_id: Knowledge base tool ID to update
         new_file_ids: List of new file IDs to associate with tool
+        request_options: Per-request httpx options (auth headers, timeout)
     """
     tool_update_data = {
         "fileIds": new_file_ids
     }
     
     try:
-        response = await client.patch(f"/tool/{tool_id}", json=tool_update_data)
-        response.raise_for_status()
+        await _send_with_retries(client, "PATCH", f"/tool/{tool_id}", request_options, json=tool_update_data)
     except httpx.HTTPStatusError as e:
         raise Exception(f"Failed to update tool {tool_id}: HTTP {e.response.status_code}")
     except Exception as e:
@@ -6,13 +6,19 @@ Provides structured logging with request correlation and service call tracking.
 import os
 import sys
 import json
-import uuid
+import logging
+import secrets
 from contextvars import ContextVar
 from typing import Any, Dict, Optional
 from datetime import datetime
 import structlog
 from structlog.contextvars import bind_contextvars, clear_contextvars
 
+try:
+    import orjson  # Optional faster JSON encoder (pip install "automotive[speedups]")
+except ImportError:
+    orjson = None
+
 
 # Context variable for request correlation
 request_id_ctx: ContextVar[str] = ContextVar('request_id', default='')
@@ -24,9 +30,9 @@ def get_request_id() -> str:
 
 
 def set_request_id(request_id: str = None) -> str:
-    """Set request ID in context. Generates UUID if not provided."""
+    """Set request ID in context. Generates a random 8-hex-char ID if not provided."""
     if not request_id:
-        request_id = str(uuid.uuid4())[:8]
+        request_id = secrets.token_hex(4)
     request_id_ctx.set(request_id)
     bind_contextvars(request_id=request_id)
     return request_id
@@ -37,13 +43,25 @@ def clear_request_context():
     clear_contextvars()
 
 
+def is_debug_enabled() -> bool:
+    """Whether the application logger emits debug records (checked on the stdlib logger)."""
+    return logging.getLogger("automotive_api").isEnabledFor(logging.DEBUG)
+
+
+def _dumps(value: Any) -> str:
+    """Serialize a log value to compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(value, separators=(',', ':'))
+
+
 class JSONProcessor:
     """Custom JSON processor for structured logging."""
     
     def __call__(self, logger, method_name, event_dict):
         """Process log entry into JSON format."""
-        # Extract standard fields
-        timestamp = datetime.utcnow().isoformat() + 'Z'
+        # Extract standard fields (timestamp comes from TimeStamper earlier in the chain)
+        timestamp = event_dict.pop('timestamp', None) or datetime.utcnow().isoformat() + 'Z'
         level = event_dict.pop('level', 'info').upper()
         event = event_dict.pop('event', '')
         request_id = event_dict.pop('request_id', get_request_id())
@@ -60,7 +78,7 @@ class JSONProcessor:
         if event_dict:
             log_entry.update(event_dict)
         
-        return json.dumps(log_entry, separators=(',', ':'))
+        return _dumps(log_entry)
 
 
 class HumanProcessor:
@@ -68,7 +86,7 @@ class HumanProcessor:
     
     def __call__(self, logger, method_name, event_dict):
         """Process log entry into human-readable format."""
-        timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
+        timestamp = (event_dict.pop('timestamp', None) or datetime.now().strftime('%H:%M:%S.%f'))[:-3]
         level = event_dict.pop('level', 'info').upper()
         event = event_dict.pop('event', '')
         request_id = event_dict.pop('request_id', get_request_id())
@@ -81,7 +99,7 @@ class HumanProcessor:
             context_items = []
             for key, value in event_dict.items():
                 if isinstance(value, (dict, list)):
-                    value = json.dumps(value)
+                    value = _dumps(value)
                 context_items.append(f"{key}={value}")
             
             if context_items:
@@ -109,7 +127,7 @@ def configure_logging():
         processors = [
             structlog.stdlib.filter_by_level,
             structlog.contextvars.merge_contextvars,
-            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.TimeStamper(fmt="%H:%M:%S.%f", utc=False),
             HumanProcessor(),
         ]
     
@@ -122,7 +140,6 @@ def configure_logging():
     )
     
     # Configure standard library logger
-    import logging
     logging.basicConfig(
         format="%(message)s",
         stream=sys.stdout,
@@ -149,7 +166,7 @@ class ServiceLogger:
             "operation": operation,
             "status": "calling"
         }
-        if params and level.lower() == "debug":
+        if params and level.lower() == "debug" and is_debug_enabled():
             log_data["params"] = params
             
         getattr(self.logger, level.lower())(
@@ -173,10 +190,12 @@ class ServiceLogger:
         if not success and error:
             log_data["error"] = error
             
-        if success and response is not None and level.lower() == "debug":
+        # Serializing the response is only worth it when debug output is actually emitted
+        if success and response is not None and level.lower() == "debug" \
+                and is_debug_enabled():
             # Truncate large responses for logging
             if isinstance(response, (dict, list)):
-                response_str = json.dumps(response)
+                response_str = _dumps(response)
                 if len(response_str) > 1000:
                     log_data["response_size"] = len(response_str)
                     log_data["response_preview"] = response_str[:200] + "..."
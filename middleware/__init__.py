@@ -1,3 +1,4 @@
+from .gzip_middleware import SelectiveGZipMiddleware
 from .logging_middleware import LoggingMiddleware
 
-__all__ = ['LoggingMiddleware']
\ No newline at end of file
+__all__ = ['LoggingMiddleware', 'SelectiveGZipMiddleware']
\ No newline at end of file
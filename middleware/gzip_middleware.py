@@ -0,0 +1,22 @@
+"""
+FastAPI middleware for gzip response compression with per-path exclusions.
+"""
+
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes responses for excluded path prefixes through uncompressed."""
+    
+    def __init__(self, app: ASGIApp, exclude_paths: list = None, **kwargs):
+        super().__init__(app, **kwargs)
+        # Streaming endpoints go here: the gzip compressor buffers small chunks, so
+        # clients would not see a line until the buffer fills or the stream ends
+        self.exclude_paths = tuple(exclude_paths or [])
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
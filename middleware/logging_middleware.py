@@ -7,7 +7,10 @@ import json
 from typing import Callable
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from logging_config import logger, set_request_id, clear_request_context
+from logging_config import logger, set_request_id, clear_request_context, is_debug_enabled
+
+# Larger request bodies are logged by size only
+MAX_LOGGED_BODY_BYTES = 4096
 
 
 class LoggingMiddleware(BaseHTTPMiddleware):
@@ -15,31 +18,47 @@ class LoggingMiddleware(BaseHTTPMiddleware):
     
     def __init__(self, app, exclude_paths: list = None):
         super().__init__(app)
-        # Paths to exclude from logging (e.g., health checks)
-        self.exclude_paths = exclude_paths or ["/docs", "/openapi.json", "/redoc"]
+        # Path prefixes to exclude from logging (e.g., health checks); a tuple so
+        # str.startswith can test them all in one call
+        self.exclude_paths = tuple(exclude_paths or ["/docs", "/openapi.json", "/redoc"])
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Process request with logging and correlation."""
         
         # Skip logging for excluded paths
-        if any(request.url.path.startswith(path) for path in self.exclude_paths):
+        if request.url.path.startswith(self.exclude_paths):
             return await call_next(request)
         
         # Set request ID and start timing
         request_id = set_request_id()
         start_time = time.time()
         
-        # Read request body for logging (if present)
+        # Read request body for logging (debug level, JSON bodies only)
         request_body = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                body = await request.body()
-                if body:
-                    request_body = json.loads(body) if body else None
-            except (json.JSONDecodeError, UnicodeDecodeError):
-                request_body = "<binary_or_invalid_json>"
-            except Exception:
-                request_body = "<error_reading_body>"
+        body_size = 0
+        content_type = request.headers.get("content-type") or ""
+        if (
+            request.method in ["POST", "PUT", "PATCH"]
+            and "json" in content_type
+            and is_debug_enabled()
+        ):
+            content_length = request.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > MAX_LOGGED_BODY_BYTES:
+                # Skip reading large bodies entirely; the size header is enough
+                body_size = int(content_length)
+                request_body = f"<{body_size} bytes elided>"
+            else:
+                try:
+                    body = await request.body()
+                    body_size = len(body)
+                    if body_size > MAX_LOGGED_BODY_BYTES:
+                        request_body = f"<{body_size} bytes elided>"
+                    elif body:
+                        request_body = json.loads(body)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    request_body = "<binary_or_invalid_json>"
+                except Exception:
+                    request_body = "<error_reading_body>"
         
         # Log incoming request
         logger.info(
@@ -48,15 +67,15 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             path=request.url.path,
             query_params=dict(request.query_params) if request.query_params else None,
             user_agent=request.headers.get("user-agent"),
-            content_type=request.headers.get("content-type")
+            content_type=content_type or None
         )
         
         # Debug level: include request body
         if request_body is not None:
-            logger.info(
+            logger.debug(
                 "Request body received",
                 body=request_body,
-                body_size=len(str(request_body)) if request_body else 0
+                body_size=body_size
             )
         
         # Process request
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Simple server entry point for automotive voice agent tools.
-Runs FastAPI server exposing all 13 tools via HTTP endpoints.
+Runs FastAPI server exposing all 14 tools via HTTP endpoints.
 """
 
 import os
@@ -15,13 +15,25 @@ def main():
     # Get log level from environment variable, default to DEBUG
     log_level = os.getenv('LOG_LEVEL', 'DEBUG').lower()
     
+    # Auto-reload (file watcher + supervisor process) is opt-in for local development
+    reload = os.getenv('UVICORN_RELOAD', '0') == '1'
+    
+    # One worker process per core unless overridden; uvicorn can't combine reload with workers
+    workers = 1 if reload else int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1))
+    
     uvicorn.run(
-        "api.app:create_app",
+        # Reload and multiple workers need an import string; otherwise pass the factory directly
+        "api.app:create_app" if reload or workers > 1 else create_app,
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=reload,
+        workers=workers,
         log_level=log_level,
-        factory=True
+        factory=True,
+        # Pin the C event loop and HTTP parser (from uvicorn[standard]) instead of
+        # silently falling back to asyncio/h11 when auto-detection fails
+        loop="uvloop",
+        http="httptools"
     )
 
 if __name__ == "__main__":
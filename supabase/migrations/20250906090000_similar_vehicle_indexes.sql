@@ -0,0 +1,20 @@
+-- Indexes aligned with the get_similar_vehicles candidate filter
+-- The candidate query filters inventory by status + current_price range and
+-- joins back to active vehicles of the same category.
+-- Verify with EXPLAIN ANALYZE that the generated PostgREST query uses these
+-- instead of sequential scans on inventory/vehicles.
+
+-- Partial index for the common path (available vehicles only), ordered by price
+-- so the range predicate is an index range scan; vehicle_id covers the join key
+CREATE INDEX IF NOT EXISTS idx_inventory_available_price
+    ON inventory(current_price, vehicle_id)
+    WHERE status = 'available';
+
+-- Composite index for include_unavailable searches across all statuses
+CREATE INDEX IF NOT EXISTS idx_inventory_status_price
+    ON inventory(status, current_price);
+
+-- Partial index on active vehicles by category, covering the join key
+CREATE INDEX IF NOT EXISTS idx_vehicles_active_category
+    ON vehicles(category, id)
+    WHERE is_active;
@@ -0,0 +1,43 @@
+-- Flattened available-inventory view and per-category stats for get_vehicle_details
+-- Lets the "all vehicles" listing fetch only the projected columns in one flat
+-- query and moves the per-category count/min/max aggregation into Postgres.
+
+-- One row per available inventory item of an active vehicle
+CREATE OR REPLACE VIEW v_available_inventory
+WITH (security_invoker = true) AS
+SELECT
+    v.id AS vehicle_id,
+    i.id AS inventory_id,
+    v.brand,
+    v.model,
+    v.year,
+    v.category,
+    i.color,
+    i.vin,
+    i.features,
+    i.current_price,
+    i.status
+FROM inventory i
+JOIN vehicles v ON v.id = i.vehicle_id
+WHERE v.is_active AND i.status = 'available';
+
+-- Per-category counts and price range (cents) over the same rows
+CREATE OR REPLACE FUNCTION inventory_category_stats()
+RETURNS TABLE (
+    category VARCHAR,
+    count BIGINT,
+    min_price INTEGER,
+    max_price INTEGER
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        category,
+        COUNT(*) AS count,
+        MIN(current_price) AS min_price,
+        MAX(current_price) AS max_price
+    FROM v_available_inventory
+    GROUP BY category
+    ORDER BY category;
+$$;
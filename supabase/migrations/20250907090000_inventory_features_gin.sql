@@ -0,0 +1,6 @@
+-- GIN index for the check_inventory features filter
+-- check_inventory sends the required features as a single JSONB containment
+-- predicate (features @> '["Leather Seats", "Navigation System"]'), which
+-- jsonb_path_ops answers with index probes instead of scanning every row.
+CREATE INDEX IF NOT EXISTS idx_inventory_features_gin
+    ON inventory USING GIN (features jsonb_path_ops);
@@ -0,0 +1,123 @@
+-- Similarity-ranked, keyset-paginated candidates for get_similar_vehicles
+-- Scores the in-range candidates in Postgres (same weights the tool used in
+-- Python: category 40, brand 25, year 15, features 20) and returns one page
+-- after the (similarity_score, inventory_id) cursor, so each page ships at
+-- most p_limit rows instead of the whole candidate set. Same-category
+-- candidates are used when any exist, otherwise every category is ranked.
+
+CREATE OR REPLACE FUNCTION similar_vehicle_candidates(
+    p_reference_vehicle_id UUID,
+    p_category VARCHAR,
+    p_brand VARCHAR,
+    p_year INTEGER,
+    p_features JSONB,
+    p_price_min INTEGER,
+    p_price_max INTEGER,
+    p_include_unavailable BOOLEAN,
+    p_limit INTEGER,
+    p_after_score DOUBLE PRECISION DEFAULT NULL,
+    p_after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    inventory_id UUID,
+    vehicle_id UUID,
+    vin VARCHAR,
+    color VARCHAR,
+    features JSONB,
+    current_price INTEGER,
+    status VARCHAR,
+    expected_delivery_date DATE,
+    location VARCHAR,
+    brand VARCHAR,
+    model VARCHAR,
+    year INTEGER,
+    category VARCHAR,
+    base_price INTEGER,
+    similarity_score DOUBLE PRECISION
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH reference_features AS (
+        SELECT COALESCE(array_agg(DISTINCT name), '{}') AS names
+        FROM jsonb_array_elements_text(COALESCE(p_features, '[]'::jsonb)) AS name
+    ),
+    candidates AS (
+        SELECT
+            i.id AS inventory_id,
+            i.vehicle_id,
+            i.vin,
+            i.color,
+            COALESCE(i.features, '[]'::jsonb) AS features,
+            i.current_price,
+            i.status,
+            i.expected_delivery_date,
+            i.location,
+            v.brand,
+            v.model,
+            v.year,
+            v.category,
+            v.base_price
+        FROM inventory i
+        JOIN vehicles v ON v.id = i.vehicle_id
+        WHERE v.is_active
+          AND i.vehicle_id <> p_reference_vehicle_id
+          AND i.current_price BETWEEN p_price_min AND p_price_max
+          AND (p_include_unavailable OR i.status = 'available')
+    ),
+    scoped AS (
+        SELECT *
+        FROM candidates c
+        WHERE c.category = p_category
+           OR NOT EXISTS (SELECT 1 FROM candidates WHERE candidates.category = p_category)
+    ),
+    scored AS (
+        SELECT
+            s.*,
+            (
+                CASE WHEN s.category = p_category THEN 40 ELSE 0 END
+                + CASE WHEN lower(s.brand) = lower(p_brand) THEN 25 ELSE 0 END
+                + CASE abs(s.year - p_year)
+                    WHEN 0 THEN 15
+                    WHEN 1 THEN 10.5
+                    WHEN 2 THEN 6
+                    WHEN 3 THEN 3
+                    ELSE 0
+                  END
+                + CASE
+                    -- Share of the reference features the candidate also has
+                    WHEN cardinality(r.names) > 0 THEN 20.0 * (
+                        SELECT count(DISTINCT name)
+                        FROM jsonb_array_elements_text(s.features) AS name
+                        WHERE name = ANY (r.names)
+                    ) / cardinality(r.names)
+                    -- Reference has no features: partial credit if the candidate has any
+                    WHEN jsonb_array_length(s.features) > 0 THEN 10
+                    ELSE 20
+                  END
+            )::DOUBLE PRECISION AS similarity_score
+        FROM scoped s
+        CROSS JOIN reference_features r
+    )
+    SELECT
+        inventory_id,
+        vehicle_id,
+        vin,
+        color,
+        features,
+        current_price,
+        status,
+        expected_delivery_date,
+        location,
+        brand,
+        model,
+        year,
+        category,
+        base_price,
+        similarity_score
+    FROM scored
+    WHERE p_after_score IS NULL
+       OR (similarity_score, inventory_id) < (p_after_score, p_after_id)
+    ORDER BY similarity_score DESC, inventory_id DESC
+    LIMIT p_limit;
+$$;
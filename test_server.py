@@ -9,69 +9,94 @@ import httpx
 import json
 from datetime import datetime
 
+try:
+    import uvloop  # Faster event loop (installed with uvicorn[standard])
+except ImportError:
+    uvloop = None
+
+BASE_URL = "https://voice-agent-tools-library-production.up.railway.app/api/v1"
+
 
 async def test_server():
     """Test the server endpoints."""
-    base_url = "https://voice-agent-tools-library-production.up.railway.app/api/v1"
+    # One pooled client for every request so keep-alive connections are reused
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=30.0
+    ) as client:
+        await run_server_checks(client)
+
+
+async def run_server_checks(client: httpx.AsyncClient):
+    """Run the endpoint checks using a client bound to the API base URL."""
+    print("🚗 Testing Automotive Voice Agent API Server")
+    print("=" * 50)
     
-    async with httpx.AsyncClient() as client:
-        print("🚗 Testing Automotive Voice Agent API Server")
-        print("=" * 50)
-        
-        # Test health endpoint
-        print("1. Testing health endpoint...")
-        response = await client.get(f"{base_url}/health")
-        print(f"   Status: {response.status_code}")
-        print(f"   Response: {response.json()}")
+    inventory_request = {
+        "category": "sedan",
+        "max_price": 30000,
+        "status": "available",
+        "include_details": True
+    }
+    
+    # Health and inventory checks are independent, so issue them concurrently
+    health_response, inventory_response = await asyncio.gather(
+        client.get("/health"),
+        client.post("/inventory/check-inventory", json=inventory_request)
+    )
+    
+    # Test health endpoint
+    print("1. Testing health endpoint...")
+    print(f"   Status: {health_response.status_code}")
+    print(f"   Response: {health_response.json()}")
+    print()
+    
+    # Test inventory check endpoint
+    print("2. Testing inventory check endpoint...")
+    print(f"   Status: {inventory_response.status_code}")
+    data = inventory_response.json()
+    print(f"   Found {data['data']['total_count']} vehicles")
+    print(f"   Execution time: {data.get('execution_time_ms', 0):.2f}ms")
+    
+    # Show first vehicle
+    if data['data']['vehicles']:
+        vehicle = data['data']['vehicles'][0]
+        print(f"   Sample vehicle: {vehicle['brand']} {vehicle['model']} - ${vehicle['price']:,}")
+    print()
+    
+    # Vehicle details come inline with include_details, so no follow-up request is needed
+    if data['data']['vehicles']:
+        print("3. Checking inline vehicle details...")
+        vehicle = data['data']['vehicles'][0]
+        print(f"   Vehicle: {vehicle['brand']} {vehicle['model']}")
+        print(f"   Category: {vehicle['category']}")
+        if 'feature_details' in vehicle:
+            print(f"   Features: {vehicle['feature_details']['total_features']} features")
+        if 'pricing' in vehicle:
+            print(f"   Price: ${vehicle['pricing'].get('current_price_dollars', 0):,}")
         print()
-        
-        # Test inventory check endpoint
-        print("2. Testing inventory check endpoint...")
-        inventory_request = {
-            "category": "sedan",
-            "max_price": 30000,
-            "status": "available"
-        }
-        response = await client.post(f"{base_url}/inventory/check-inventory", json=inventory_request)
+
+    # Test streaming inventory endpoint (NDJSON, one vehicle per line)
+    print("4. Testing streaming inventory endpoint...")
+    streamed_count = 0
+    async with client.stream("POST", "/inventory/check-inventory/stream", json={"status": "all"}) as response:
         print(f"   Status: {response.status_code}")
-        data = response.json()
-        print(f"   Found {data['data']['total_count']} vehicles")
-        print(f"   Execution time: {data.get('execution_time_ms', 0):.2f}ms")
-        
-        # Show first vehicle
-        if data['data']['vehicles']:
-            vehicle = data['data']['vehicles'][0]
-            print(f"   Sample vehicle: {vehicle['brand']} {vehicle['model']} - ${vehicle['price']:,}")
-        print()
-        
-        # Test vehicle details endpoint
-        if data['data']['vehicles']:
-            print("3. Testing vehicle details endpoint...")
-            vehicle_id = data['data']['vehicles'][0]['vehicle_id']
-            details_request = {
-                "vehicle_id": vehicle_id,
-                "include_pricing": True
-            }
-            response = await client.post(f"{base_url}/inventory/get-vehicle-details", json=details_request)
-            print(f"   Status: {response.status_code}")
-            if response.status_code == 200:
-                details_data = response.json()
-                vehicle_data = details_data['data']
-                vehicle_info = vehicle_data.get('vehicle', {})
-                print(f"   Vehicle: {vehicle_info.get('brand', 'N/A')} {vehicle_info.get('model', 'N/A')}")
-                print(f"   Category: {vehicle_info.get('category', 'N/A')}")
-                if 'features' in vehicle_data:
-                    print(f"   Features: {len(vehicle_data['features'])} features")
-                if 'pricing' in vehicle_data:
-                    pricing = vehicle_data['pricing']
-                    print(f"   Price: ${pricing.get('current_price_dollars', 0):,}")
-            else:
-                print(f"   Error: {response.text}")
-            print()
-        
-        print("✅ Server test completed successfully!")
-        print("📖 View full API documentation at: http://localhost:8000/docs")
+        async for line in response.aiter_lines():
+            if line:
+                streamed_count += 1
+                if streamed_count == 1:
+                    vehicle = json.loads(line)
+                    print(f"   First vehicle: {vehicle['brand']} {vehicle['model']} - ${vehicle['price']:,}")
+    print(f"   Streamed {streamed_count} vehicles")
+    print()
+
+    print("✅ Server test completed successfully!")
+    print("📖 View full API documentation at: http://localhost:8000/docs")
 
 
 if __name__ == "__main__":
-    asyncio.run(test_server())
+    if uvloop is not None:
+        uvloop.run(test_server())
+    else:
+        asyncio.run(test_server())
@@ -4,20 +4,177 @@ Provides test environment setup for service account authentication.
 """
 
 import os
+import copy
+import importlib
+import json
+import httpx
 import pytest
-import asyncio
+import pytest_asyncio
+from pathlib import Path
+from types import SimpleNamespace
 
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
+from inventory._cache import ResultCache
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+try:
+    import uvloop  # Faster event loop (installed with uvicorn[standard])
+except ImportError:
+    uvloop = None
+
+TESTS_DIR = Path(__file__).parent
+FIXTURES_DIR = TESTS_DIR / "fixtures"
+
+# Fixtures that replace external services; tests using them run without credentials
+LOCAL_FIXTURES = frozenset({"fake_supabase", "mock_service", "github_transport", "vapi_transport", "retry_delays"})
+
+
+class FakeQuery:
+    """In-memory stand-in for the PostgREST query builder used by the inventory tools."""
+    
+    def __init__(self, rows, orders=()):
+        self.rows = rows
+        self.orders = orders
+    
+    def select(self, *args, **kwargs):
+        return self
+    
+    def eq(self, column, value):
+        return self._where(column, lambda field: field == value)
+    
+    def ilike(self, column, pattern):
+        needle = pattern.strip('%').lower()
+        return self._where(column, lambda field: needle in str(field).lower())
+    
+    def in_(self, column, values):
+        return self._where(column, lambda field: field in values)
+    
+    def gte(self, column, value):
+        return self._where(column, lambda field: field >= value)
+    
+    def lte(self, column, value):
+        return self._where(column, lambda field: field <= value)
+    
+    def filter(self, column, operator, criteria):
+        if operator != 'cs':
+            raise NotImplementedError(f"FakeQuery does not support operator '{operator}'")
+        required = json.loads(criteria)
+        return self._where(column, lambda field: all(item in field for item in required))
+    
+    def order(self, column, desc=False, foreign_table=None):
+        if foreign_table:
+            # Embedded fixture rows are stored already ordered
+            return self
+        # Later order() calls break ties of earlier ones, as in PostgREST
+        orders = self.orders + ((column, desc),)
+        rows = self.rows
+        for key_column, key_desc in reversed(orders):
+            rows = sorted(rows, key=lambda row: _lookup(row, key_column), reverse=key_desc)
+        return FakeQuery(rows, orders)
+    
+    def limit(self, size, foreign_table=None):
+        if foreign_table:
+            return self._map_embedded(foreign_table, lambda rows: rows[:size])
+        return FakeQuery(self.rows[:size], self.orders)
+    
+    def range(self, start, end):
+        return FakeQuery(self.rows[start:end + 1], self.orders)
+    
+    def execute(self):
+        return SimpleNamespace(data=copy.deepcopy(self.rows))
+    
+    def _where(self, column, predicate):
+        embed, _, field = column.rpartition('.')
+        if embed and self.rows and isinstance(_lookup(self.rows[0], embed), list):
+            # Filters on a to-many embed narrow the embedded rows, not the parent rows
+            return self._map_embedded(embed, lambda rows: [row for row in rows if predicate(row[field])])
+        return FakeQuery([row for row in self.rows if predicate(_lookup(row, column))], self.orders)
+    
+    def _map_embedded(self, path, transform):
+        """Replace the embedded row list at path (e.g. 'vehicles.pricing') of every row with transform(list)."""
+        def apply(row, parts):
+            if row.get(parts[0]) is None:
+                return row
+            value = transform(row[parts[0]]) if len(parts) == 1 else apply(row[parts[0]], parts[1:])
+            return dict(row, **{parts[0]: value})
+        return FakeQuery([apply(row, path.split('.')) for row in self.rows], self.orders)
+
+
+class FakeSupabaseClient:
+    """Supabase client double serving table rows loaded from JSON fixtures."""
+    
+    def __init__(self, tables, functions=None):
+        self.tables = tables
+        # Postgres function stand-ins: name -> callable(tables, params) returning rows
+        self.functions = functions or {}
+    
+    def table(self, name):
+        return FakeQuery(self.tables[name])
+    
+    def rpc(self, name, params=None):
+        return FakeQuery(self.functions[name](self.tables, params or {}))
+
+
+def _lookup(row, column):
+    """Resolve a PostgREST column path such as 'vehicles.category' against a row."""
+    value = row
+    for part in column.split('.'):
+        value = value[part]
+    return value
+
+
+# Run async tests on uvloop; pytest-asyncio creates and closes the loops. Newer
+# releases take a loop factory hook and deprecate overriding event_loop_policy,
+# which older releases (such as the locked one) still need
+if uvloop is not None and hasattr(pytest_asyncio.plugin, "PytestAsyncioSpecs"):
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_asyncio_loop_factories(config, item):
+        """Create test event loops with uvloop."""
+        return {"uvloop": uvloop.new_event_loop}
+elif uvloop is not None:
+    @pytest.fixture(scope="session")
+    def event_loop_policy():
+        """Create test event loops with uvloop."""
+        return uvloop.EventLoopPolicy()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def http_client():
+    """Shared HTTP client for API integration tests, reused across the whole session."""
+    async with httpx.AsyncClient(
+        base_url=os.getenv("API_BASE_URL", "http://localhost:8000/api/v1"),
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=50),
+        timeout=30.0
+    ) as client:
+        yield client
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def service():
+    """Authenticated Google Calendar service, built once and shared by the whole session."""
+    from calendar_tools.auth import create_service
+    
+    email = os.getenv('EMAIL_FOR_TESTING')
+    if not email:
+        pytest.skip("EMAIL_FOR_TESTING environment variable not set")
+    return await create_service(email)
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """Serve Supabase queries from tests/fixtures JSON instead of the real database."""
+    with open(FIXTURES_DIR / "inventory_rows.json") as f:
+        client = FakeSupabaseClient({"inventory": json.load(f)})
+    monkeypatch.setattr("db.connection.get_supabase_client", lambda: client)
+    # Start every test with an empty search cache so results come from the fixture rows
+    # (the inventory package re-exports check_inventory, shadowing the module attribute)
+    check_inventory_module = importlib.import_module("inventory.check_inventory")
+    monkeypatch.setattr(check_inventory_module, "_RESULT_CACHE", ResultCache(
+        check_inventory_module.RESULT_CACHE_TTL_SECONDS, check_inventory_module.RESULT_CACHE_MAX_ENTRIES
+    ))
+    return client
 
 
 @pytest.fixture
@@ -38,21 +195,20 @@ def pytest_configure(config):
 
 
 def pytest_collection_modifyitems(config, items):
-    """Auto-mark tests based on their dependencies."""
-    for item in items:
-        # Mark tests that use real calendar services
-        if "create_service" in item.nodeid or "get_availability" in item.nodeid:
-            item.add_marker(pytest.mark.integration)
-
-
-@pytest.fixture(autouse=True)
-def setup_test_environment():
-    """Ensure proper test environment setup."""
-    # Verify required environment variables
+    """Auto-mark tests based on their dependencies and skip those missing credentials."""
+    # Required environment variables don't change during a run, so check them once
+    # here instead of in a per-test autouse fixture
     required_vars = ['GOOGLE_SERVICE_ACCOUNT_JSON']
     missing_vars = [var for var in required_vars if not os.getenv(var)]
+    skip_missing = pytest.mark.skip(reason=f"Missing required environment variables: {missing_vars}")
     
-    if missing_vars:
-        pytest.skip(f"Missing required environment variables: {missing_vars}")
-    
-    yield
\ No newline at end of file
+    for item in items:
+        # Mark tests that use real calendar services
+        if "create_service" in item.nodeid or "get_availability" in item.nodeid \
+                or "service" in getattr(item, "fixturenames", ()):
+            item.add_marker(pytest.mark.integration)
+        
+        # Tests running against local fixtures or mocks need no external credentials
+        if missing_vars and item.path.is_relative_to(TESTS_DIR) \
+                and LOCAL_FIXTURES.isdisjoint(getattr(item, "fixturenames", ())):
+            item.add_marker(skip_missing)
@@ -1,14 +1,51 @@
 """
 Tests for check_inventory tool.
 
-Tests use real Supabase database integration following TDD methodology.
+TestCheckInventory uses real Supabase database integration following TDD methodology
+(marked integration; deselect with -m "not integration"). TestCheckInventoryLocal runs
+the same tool against tests/fixtures/inventory_rows.json via the fake_supabase fixture.
 """
 
 import pytest
 import asyncio
-from inventory.check_inventory import check_inventory
+import httpx
+import importlib
+from inventory.check_inventory import check_inventory, stream_inventory
 
+# The inventory package re-exports check_inventory, shadowing the module attribute
+inventory_module = importlib.import_module("inventory.check_inventory")
 
+
+def _assert_sedans_only(result):
+    """All returned vehicles should be sedans."""
+    assert result["filters_applied"]["category"] == "sedan"
+    for vehicle in result["vehicles"]:
+        assert vehicle["category"] == "sedan"
+
+
+def _assert_within_price_range(result):
+    """All returned vehicles should be within the 20000-40000 price range."""
+    assert result["filters_applied"]["min_price"] == 20000
+    assert result["filters_applied"]["max_price"] == 40000
+    for vehicle in result["vehicles"]:
+        assert 20000 <= vehicle["price"] <= 40000
+
+
+def _assert_reserved_only(result):
+    """All returned vehicles should be reserved."""
+    assert result["filters_applied"]["status"] == "reserved"
+    for vehicle in result["vehicles"]:
+        assert vehicle["status"] == "reserved"
+
+
+def _assert_any_status(result):
+    """Should include vehicles with different statuses."""
+    if result["vehicles"]:
+        statuses = set(vehicle["status"] for vehicle in result["vehicles"])
+        assert len(statuses) >= 1  # At least one status type
+
+
+@pytest.mark.integration
 class TestCheckInventory:
     """Test suite for check_inventory function using real Supabase database."""
 
@@ -29,18 +66,20 @@ class TestCheckInventory:
             for vehicle in result["vehicles"]:
                 assert vehicle["status"] == "available"
 
+    @pytest.mark.parametrize("kwargs,validator", [
+        ({"category": "sedan"}, _assert_sedans_only),
+        ({"min_price": 20000, "max_price": 40000}, _assert_within_price_range),
+        ({"status": "reserved"}, _assert_reserved_only),
+        ({"status": "all"}, _assert_any_status),
+    ], ids=["by_category", "by_price_range", "reserved_status", "all_statuses"])
     @pytest.mark.asyncio
-    async def test_check_inventory_by_category(self):
-        """Test inventory search filtered by category."""
-        result = await check_inventory(category="sedan")
+    async def test_check_inventory_filters(self, kwargs, validator):
+        """Test inventory search with a single filter applied."""
+        result = await check_inventory(**kwargs)
         
         assert isinstance(result, dict)
         assert "vehicles" in result
-        assert result["filters_applied"]["category"] == "sedan"
-        
-        # All returned vehicles should be sedans
-        for vehicle in result["vehicles"]:
-            assert vehicle["category"] == "sedan"
+        validator(result)
 
     @pytest.mark.asyncio
     async def test_check_inventory_by_model_name(self):
@@ -56,22 +95,6 @@ class TestCheckInventory:
             vehicle_text = f"{vehicle['brand']} {vehicle['model']}".lower()
             assert "toyota" in vehicle_text
 
-    @pytest.mark.asyncio
-    async def test_check_inventory_by_price_range(self):
-        """Test inventory search with price range filters."""
-        min_price = 20000
-        max_price = 40000
-        result = await check_inventory(min_price=min_price, max_price=max_price)
-        
-        assert isinstance(result, dict)
-        assert "vehicles" in result
-        assert result["filters_applied"]["min_price"] == min_price
-        assert result["filters_applied"]["max_price"] == max_price
-        
-        # All returned vehicles should be within price range
-        for vehicle in result["vehicles"]:
-            assert min_price <= vehicle["price"] <= max_price
-
     @pytest.mark.asyncio
     async def test_check_inventory_with_features(self):
         """Test inventory search requiring specific features."""
@@ -88,32 +111,6 @@ class TestCheckInventory:
             for required_feature in required_features:
                 assert required_feature in vehicle_features
 
-    @pytest.mark.asyncio
-    async def test_check_inventory_all_statuses(self):
-        """Test inventory search including all vehicle statuses."""
-        result = await check_inventory(status="all")
-        
-        assert isinstance(result, dict)
-        assert "vehicles" in result
-        
-        # Should include vehicles with different statuses
-        if result["vehicles"]:
-            statuses = set(vehicle["status"] for vehicle in result["vehicles"])
-            assert len(statuses) >= 1  # At least one status type
-
-    @pytest.mark.asyncio
-    async def test_check_inventory_reserved_status(self):
-        """Test inventory search for reserved vehicles only."""
-        result = await check_inventory(status="reserved")
-        
-        assert isinstance(result, dict)
-        assert "vehicles" in result
-        assert result["filters_applied"]["status"] == "reserved"
-        
-        # All returned vehicles should be reserved
-        for vehicle in result["vehicles"]:
-            assert vehicle["status"] == "reserved"
-
     @pytest.mark.asyncio
     async def test_check_inventory_combined_filters(self):
         """Test inventory search with multiple filters combined."""
@@ -157,37 +154,19 @@ class TestCheckInventory:
         assert result["total_count"] == 0
         assert len(result["vehicles"]) == 0
 
+    @pytest.mark.parametrize("kwargs,message", [
+        ({"category": "invalid_category"}, "Invalid category"),
+        ({"status": "invalid_status"}, "Invalid status"),
+        ({"min_price": -1000}, "Price cannot be negative"),
+        ({"min_price": 50000, "max_price": 30000}, "min_price cannot be greater than max_price"),
+    ], ids=["invalid_category", "invalid_status", "negative_price", "invalid_price_range"])
     @pytest.mark.asyncio
-    async def test_check_inventory_invalid_category(self):
-        """Test inventory search with invalid category."""
-        with pytest.raises(ValueError) as exc_info:
-            await check_inventory(category="invalid_category")
-        
-        assert "Invalid category" in str(exc_info.value)
-
-    @pytest.mark.asyncio
-    async def test_check_inventory_invalid_status(self):
-        """Test inventory search with invalid status."""
-        with pytest.raises(ValueError) as exc_info:
-            await check_inventory(status="invalid_status")
-        
-        assert "Invalid status" in str(exc_info.value)
-
-    @pytest.mark.asyncio
-    async def test_check_inventory_negative_price(self):
-        """Test inventory search with negative price values."""
-        with pytest.raises(ValueError) as exc_info:
-            await check_inventory(min_price=-1000)
-        
-        assert "Price cannot be negative" in str(exc_info.value)
-
-    @pytest.mark.asyncio
-    async def test_check_inventory_invalid_price_range(self):
-        """Test inventory search with min_price greater than max_price."""
+    async def test_check_inventory_invalid_inputs(self, kwargs, message):
+        """Test inventory search rejects invalid parameters."""
         with pytest.raises(ValueError) as exc_info:
-            await check_inventory(min_price=50000, max_price=30000)
+            await check_inventory(**kwargs)
         
-        assert "min_price cannot be greater than max_price" in str(exc_info.value)
+        assert message in str(exc_info.value)
 
     @pytest.mark.asyncio
     async def test_check_inventory_response_structure(self):
@@ -245,4 +224,181 @@ class TestCheckInventory:
         assert isinstance(result, dict)
         assert "vehicles" in result
         # Empty features list should not be included in filters_applied
-        assert "features" not in result["filters_applied"]
\ No newline at end of file
+        assert "features" not in result["filters_applied"]
+
+
+class TestCheckInventoryLocal:
+    """Test suite for check_inventory against local JSON fixtures (no network)."""
+
+    @pytest.mark.parametrize("kwargs,expected_ids", [
+        ({}, ["inv-001", "inv-003", "inv-005"]),
+        ({"category": "sedan"}, ["inv-001"]),
+        ({"category": "sedan", "status": "all"}, ["inv-001", "inv-002"]),
+        ({"model_name": "camry"}, ["inv-001"]),
+        ({"min_price": 30000, "max_price": 45000}, ["inv-003", "inv-005"]),
+        ({"features": ["All-Wheel Drive"], "status": "all"}, ["inv-003", "inv-005", "inv-004"]),
+        ({"status": "reserved"}, ["inv-002"]),
+        ({"category": "suv", "min_price": 40000}, []),
+    ], ids=[
+        "default_available", "by_category", "category_all_statuses", "by_model_name",
+        "by_price_range", "by_features", "reserved_status", "no_results"
+    ])
+    @pytest.mark.asyncio
+    async def test_check_inventory_filters(self, fake_supabase, kwargs, expected_ids):
+        """Test filters select the expected fixture rows, ordered by price."""
+        result = await check_inventory(**kwargs)
+        
+        assert [vehicle["inventory_id"] for vehicle in result["vehicles"]] == expected_ids
+        assert result["total_count"] == len(expected_ids)
+
+    @pytest.mark.parametrize("include_details", [False, True], ids=["summary", "include_details"])
+    @pytest.mark.asyncio
+    async def test_check_inventory_concurrent_categories(self, fake_supabase, monkeypatch, include_details):
+        """Test concurrent searches batched into one query each get their own category's rows."""
+        tables_queried = []
+        table = fake_supabase.table
+        monkeypatch.setattr(fake_supabase, "table", lambda name: tables_queried.append(name) or table(name))
+        
+        sedans, suvs, everything = await asyncio.gather(
+            check_inventory(category="sedan", status="all", include_details=include_details),
+            check_inventory(category="suv", status="all", include_details=include_details),
+            check_inventory(status="all", include_details=include_details)
+        )
+        
+        assert [vehicle["inventory_id"] for vehicle in sedans["vehicles"]] == ["inv-001", "inv-002"]
+        assert [vehicle["inventory_id"] for vehicle in suvs["vehicles"]] == ["inv-003", "inv-004"]
+        assert everything["total_count"] == 5
+        # The first search queries directly; the two arriving while it runs share one query
+        assert tables_queried == ["inventory", "inventory"]
+        
+        # Batched callers share the fetched rows; each must still get the full pricing block
+        if include_details:
+            for result in (sedans, everything):
+                camry = next(vehicle for vehicle in result["vehicles"] if vehicle["inventory_id"] == "inv-001")
+                assert camry["pricing"]["available_options"] == {"Sunroof": 1200}
+                assert camry["pricing"]["discount_applied_dollars"] == 500
+                assert camry["pricing"]["savings"] == 500
+
+    @pytest.mark.asyncio
+    async def test_check_inventory_lone_search_not_delayed(self, fake_supabase, monkeypatch):
+        """Test a search with no concurrent search of its shape skips the batch window."""
+        monkeypatch.setattr(inventory_module, "INVENTORY_BATCH_WINDOW_MS", 60_000)
+        
+        result = await asyncio.wait_for(check_inventory(category="sedan"), timeout=5)
+        
+        assert result["total_count"] == 1
+        assert inventory_module._PENDING_BATCHES == {}
+
+    @pytest.mark.asyncio
+    async def test_check_inventory_coalesces_identical_searches(self, fake_supabase, monkeypatch):
+        """Test concurrent identical searches share one query and leave no per-key lock behind."""
+        tables_queried = []
+        table = fake_supabase.table
+        monkeypatch.setattr(fake_supabase, "table", lambda name: tables_queried.append(name) or table(name))
+        
+        results = await asyncio.gather(*(check_inventory(category="sedan") for _ in range(3)))
+        
+        assert tables_queried == ["inventory"]
+        assert results[0] == results[1] == results[2]
+        # Each caller gets its own copy of the cached result
+        results[0]["vehicles"].clear()
+        assert (await check_inventory(category="sedan"))["total_count"] == 1
+        assert inventory_module._RESULT_CACHE._locks == {}
+
+    @pytest.mark.asyncio
+    async def test_check_inventory_failed_search_releases_lock(self, fake_supabase, monkeypatch):
+        """Test a search that raises is not cached and does not leak its per-key lock."""
+        outage = True
+        table = fake_supabase.table
+        
+        def flaky_table(name):
+            if outage:
+                raise RuntimeError("database unavailable")
+            return table(name)
+        
+        monkeypatch.setattr(fake_supabase, "table", flaky_table)
+        with pytest.raises(Exception, match="database unavailable"):
+            await check_inventory(category="sedan")
+        assert inventory_module._RESULT_CACHE._locks == {}
+        
+        outage = False
+        result = await check_inventory(category="sedan")
+        assert result["total_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_check_inventory_inactive_vehicles_excluded(self, fake_supabase):
+        """Test inventory rows for inactive vehicle models are never returned."""
+        result = await check_inventory(model_name="camry", status="all")
+        
+        assert [vehicle["inventory_id"] for vehicle in result["vehicles"]] == ["inv-001"]
+
+    @pytest.mark.asyncio
+    async def test_check_inventory_response_format(self, fake_supabase):
+        """Test rows are flattened and prices converted from cents to dollars."""
+        result = await check_inventory(category="sedan")
+        
+        assert result["vehicles"][0] == {
+            "inventory_id": "inv-001",
+            "vehicle_id": "veh-camry",
+            "brand": "Toyota",
+            "model": "Camry",
+            "category": "sedan",
+            "color": "White",
+            "features": ["Leather Seats", "Navigation System"],
+            "price": 28000,
+            "status": "available",
+            "delivery_date": "2025-09-01"
+        }
+        assert result["filters_applied"] == {"category": "sedan", "status": "available"}
+
+    @pytest.mark.asyncio
+    async def test_check_inventory_include_details(self, fake_supabase):
+        """Test include_details inlines the features and pricing blocks from the embedded pricing row."""
+        result = await check_inventory(category="sedan", include_details=True)
+        
+        vehicle = result["vehicles"][0]
+        assert vehicle["year"] == 2024
+        assert vehicle["feature_details"]["total_features"] == 2
+        assert vehicle["feature_details"]["feature_pricing_available"] is True
+        assert vehicle["pricing"]["base_price_dollars"] == 27500
+        assert vehicle["pricing"]["current_price_dollars"] == 28000
+        assert vehicle["pricing"]["discount_applied_dollars"] == 500
+        assert vehicle["pricing"]["available_options"] == {"Sunroof": 1200}
+        assert "include_details" not in result["filters_applied"]
+
+    @pytest.mark.asyncio
+    async def test_stream_inventory_pages(self, fake_supabase, monkeypatch):
+        """Test streaming yields the same vehicles as check_inventory across page boundaries."""
+        monkeypatch.setattr(inventory_module, "STREAM_PAGE_SIZE", 2)
+        
+        streamed = [vehicle async for vehicle in stream_inventory(status="all")]
+        result = await check_inventory(status="all")
+        
+        assert streamed == result["vehicles"]
+
+    @pytest.mark.asyncio
+    async def test_check_inventory_endpoints_compression(self, fake_supabase):
+        """Test the NDJSON stream is sent uncompressed while large JSON responses are gzipped."""
+        from api.app import create_app
+        
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1") as client:
+            streamed = await client.post(
+                "/inventory/check-inventory/stream", json={"status": "all", "include_details": True},
+                headers={"Accept-Encoding": "gzip"}
+            )
+            listed = await client.post(
+                "/inventory/check-inventory", json={"status": "all", "include_details": True},
+                headers={"Accept-Encoding": "gzip"}
+            )
+        
+        assert streamed.status_code == 200
+        assert "content-encoding" not in streamed.headers
+        assert len(streamed.text.splitlines()) == 5
+        assert listed.status_code == 200
+        assert listed.headers["content-encoding"] == "gzip"
+
+    def test_stream_inventory_validates_eagerly(self, fake_supabase):
+        """Test invalid filters raise before the stream is consumed."""
+        with pytest.raises(ValueError, match="Invalid status"):
+            stream_inventory(status="invalid_status")
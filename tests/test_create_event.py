@@ -4,74 +4,115 @@ Following TDD approach - these tests should initially fail, then guide implement
 """
 
 import pytest
+import pytest_asyncio
 import asyncio
+from unittest.mock import MagicMock
 from datetime import datetime, timedelta
-import os
-import sys
+from types import MappingProxyType
+from googleapiclient.errors import HttpError
 
-# Add the project root to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from calendar_tools.auth import create_service
 from calendar_tools.tools.create_event import create_event
-from calendar_tools.tools.delete_event import delete_event
 
 
-def get_test_service():
-    """Helper function to get authenticated service for testing."""
-    import os
-    email = os.getenv('EMAIL_FOR_TESTING')
-    if not email:
-        pytest.skip("EMAIL_FOR_TESTING environment variable not set")
-    return email
+# Calendar API batch requests accept at most 50 calls
+CALENDAR_BATCH_LIMIT = 50
+
+# Fixed clock for event times so request bodies are identical from run to run
+TEST_EVENT_START = datetime(2030, 1, 1, 12, 0, 0)
 
 
-async def create_and_cleanup_event(service, **kwargs):
+async def create_and_cleanup_event(service, cleanup_batch, **kwargs):
     """Helper function to create event and return both result and cleanup function."""
     created_event = await create_event(service, **kwargs)
     
     async def cleanup():
-        try:
-            await delete_event(
-                service,
-                event_id=created_event['event_id'],
-                send_notifications=False,  # Don't spam notifications during cleanup
-                force_delete=True  # Handle already-deleted gracefully
-            )
-        except Exception:
-            pass  # Ignore cleanup errors
+        # Deletion is deferred to the end-of-session batch requests sent by cleanup_batch
+        cleanup_batch.append((kwargs['calendar_id'], created_event['event_id']))
     
     return created_event, cleanup
 
 
+@pytest.fixture(scope="session")
+def cleanup_batch(service):
+    """Collect events created during the session and delete them in batch requests at teardown."""
+    pending = []
+    yield pending
+    
+    failures = []
+    
+    def collect_failure(request_id, response, exception):
+        # Events that are already gone (404 not found / 410 deleted) need no cleanup
+        if isinstance(exception, HttpError) and exception.resp.status in (404, 410):
+            return
+        if exception is not None:
+            failures.append(exception)
+    
+    for start in range(0, len(pending), CALENDAR_BATCH_LIMIT):
+        batch = service.new_batch_http_request(callback=collect_failure)
+        for calendar_id, event_id in pending[start:start + CALENDAR_BATCH_LIMIT]:
+            # Don't spam notifications during cleanup
+            batch.add(service.events().delete(calendarId=calendar_id, eventId=event_id, sendUpdates='none'))
+        batch.execute()
+    
+    # Surface every failed deletion so leaked test events don't go unnoticed
+    if failures:
+        raise ExceptionGroup(f"Failed to clean up {len(failures)} test events", failures)
+
+
 @pytest.fixture
+def mock_service():
+    """Stand-in Calendar service for validation tests that must fail before any API call."""
+    return MagicMock()
+
+
+@pytest.fixture(scope="module")
 def base_event_data():
-    """Base event data for testing."""
-    now = datetime.now()
-    start_time = now + timedelta(hours=1)
+    """Base event data for testing (read-only; shared by every test in the module)."""
+    start_time = TEST_EVENT_START
     end_time = start_time + timedelta(hours=1)
     
-    return {
+    return MappingProxyType({
         'calendar_id': 'primary',
         'summary': 'Test Event',
         'start_time': start_time.isoformat(),
         'end_time': end_time.isoformat()
-    }
+    })
 
 
-class TestCreateEventBasic:
-    """Test basic event creation functionality."""
+# Happy-path variants: each case adds kwargs on top of base_event_data (which targets
+# the primary calendar) and may name a response key that the option must produce
+HAPPY_CASES = [
+    pytest.param({}, None, id="minimal_params_primary"),
+    pytest.param({"description": "This is a test event description",
+                  "location": "123 Main St, Anytown, USA"}, None, id="description_and_location"),
+    pytest.param({"timezone": "America/New_York"}, None, id="timezone"),
+    pytest.param({"attendees": ["mihirsinh.parmar.social@gmail.com", "mihirsinh.parmar.it@gmail.com"],
+                  "send_notifications": "none"}, "attendees_notified", id="attendees"),
+    pytest.param({"attendees": ["mihirsinh.parmar.it@gmail.com"],
+                  "optional_attendees": ["mihirsinh.parmar.social@gmail.com"],
+                  "send_notifications": "none"}, None, id="optional_attendees"),
+    pytest.param({"attendees": ["mihirsinh.parmar.social@gmail.com"],
+                  "guests_can_invite_others": False, "guests_can_modify": True,
+                  "guests_can_see_others": False, "send_notifications": "none"}, None, id="guest_permissions"),
+    pytest.param({"create_google_meet": True}, "google_meet_link", id="google_meet"),
+    pytest.param({"create_google_meet": True, "location": "Conference Room A"},
+                 "google_meet_link", id="google_meet_and_location"),
+    pytest.param({"recurrence_rule": "FREQ=WEEKLY;COUNT=5"}, None, id="recurring_weekly"),
+    pytest.param({"recurrence_rule": "FREQ=DAILY;COUNT=3"}, None, id="recurring_daily"),
+]
+
+
+class TestCreateEventVariants:
+    """Test event creation with required parameters and each optional setting group."""
     
-    @pytest.mark.asyncio
-    async def test_create_basic_event_minimal_params(self, base_event_data):
-        """Test creating event with only required parameters."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        # Create event with cleanup helper
+    @pytest.mark.parametrize("extra,expected_key", HAPPY_CASES)
+    async def test_create_event_variants(self, service, cleanup_batch, base_event_data, extra, expected_key):
+        """Test creating an event with one combination of optional parameters."""
         result, cleanup = await create_and_cleanup_event(
             service,
-            **base_event_data
+            cleanup_batch,
+            **base_event_data,
+            **extra
         )
         
         try:
@@ -81,171 +122,76 @@ class TestCreateEventBasic:
             assert 'start_time' in result
             assert 'end_time' in result
             assert 'html_link' in result
-        finally:
-            # Clean up the created event
-            await cleanup()
-    
-    @pytest.mark.asyncio
-    async def test_create_event_with_description_and_location(self, base_event_data):
-        """Test creating event with description and location."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            description="This is a test event description",
-            location="123 Main St, Anytown, USA",
-            **base_event_data
-        )
-        
-        try:
-            assert result['summary'] == 'Test Event'
-            assert 'event_id' in result
-            assert 'html_link' in result
-        finally:
-            await cleanup()
-    
-    @pytest.mark.asyncio
-    async def test_create_event_with_timezone(self, base_event_data):
-        """Test creating event with explicit timezone."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            timezone="America/New_York",
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-            assert result['calendar_id'] == 'primary'
+            if expected_key:
+                assert expected_key in result
         finally:
             await cleanup()
 
 
-class TestCreateEventAttendees:
-    """Test attendee-related functionality."""
+class TestCreateEventProperties:
+    """Test reminder, visibility and color settings on one shared event."""
     
-    @pytest.mark.asyncio
-    async def test_create_event_with_attendees(self, base_event_data):
-        """Test creating event with attendees."""
-        email = get_test_service()
-        service = await create_service(email)
-        
+    @pytest_asyncio.fixture(scope="class")
+    async def properties_event(self, service, cleanup_batch, base_event_data):
+        """Create one event with every property set and fetch it back as stored by Calendar."""
         result, cleanup = await create_and_cleanup_event(
             service,
-            attendees=["mihirsinh.parmar.social@gmail.com", "mihirsinh.parmar.it@gmail.com"],
-            send_notifications="none",  # Don't spam test emails
+            cleanup_batch,
+            email_reminder_minutes=60,
+            popup_reminder_minutes=15,
+            use_default_reminders=False,
+            visibility='private',
+            color_id=5,
             **base_event_data
         )
-        
-        try:
-            assert 'event_id' in result
-            assert 'attendees_notified' in result or 'attendees' in result
-        finally:
-            await cleanup()
+        stored = service.events().get(calendarId='primary', eventId=result['event_id']).execute()
+        yield result, stored
+        await cleanup()
     
-    @pytest.mark.asyncio
-    async def test_create_event_with_optional_attendees(self, base_event_data):
-        """Test creating event with optional attendees."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            attendees=["mihirsinh.parmar.it@gmail.com"],
-            optional_attendees=["mihirsinh.parmar.social@gmail.com"],
-            send_notifications="none",
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-        finally:
-            await cleanup()
+    async def test_create_event_properties_result(self, properties_event):
+        """Test the formatted result of an event with optional properties set."""
+        result, _ = properties_event
+        
+        assert 'event_id' in result
+        assert result['calendar_id'] == 'primary'
+        assert result['summary'] == 'Test Event'
+        assert 'html_link' in result
     
-    @pytest.mark.asyncio
-    async def test_create_event_guest_permissions(self, base_event_data):
-        """Test creating event with guest permission settings."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            attendees=["mihirsinh.parmar.social@gmail.com"],
-            guests_can_invite_others=False,
-            guests_can_modify=True,
-            guests_can_see_others=False,
-            send_notifications="none",
-            **base_event_data
-        )
+    async def test_create_event_reminders(self, properties_event):
+        """Test email and popup reminder overrides replace the default reminders."""
+        _, stored = properties_event
         
-        try:
-            assert 'event_id' in result
-        finally:
-            await cleanup()
-
-
-class TestCreateEventGoogleMeet:
-    """Test Google Meet integration."""
+        assert stored['reminders']['useDefault'] is False
+        assert {'method': 'email', 'minutes': 60} in stored['reminders']['overrides']
+        assert {'method': 'popup', 'minutes': 15} in stored['reminders']['overrides']
     
-    @pytest.mark.asyncio
-    async def test_create_event_with_google_meet(self, base_event_data):
-        """Test creating event with Google Meet link."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        # Create Google Meet event with cleanup
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            create_google_meet=True,
-            **base_event_data
-        )
+    async def test_create_event_visibility_private(self, properties_event):
+        """Test the event is stored with private visibility."""
+        _, stored = properties_event
         
-        try:
-            assert 'event_id' in result
-            assert 'google_meet_link' in result or 'conference_link' in result
-        finally:
-            await cleanup()
+        assert stored['visibility'] == 'private'
     
-    @pytest.mark.asyncio
-    async def test_create_event_with_google_meet_and_location(self, base_event_data):
-        """Test creating event with both Google Meet and physical location."""
-        email = get_test_service()
-        service = await create_service(email)
+    async def test_create_event_color(self, properties_event):
+        """Test the event is stored with the requested color."""
+        _, stored = properties_event
         
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            create_google_meet=True,
-            location="Conference Room A",
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-            assert 'google_meet_link' in result or 'conference_link' in result
-        finally:
-            await cleanup()
+        assert stored['colorId'] == '5'
 
 
 class TestCreateEventAllDay:
     """Test all-day event functionality."""
     
-    @pytest.mark.asyncio
-    async def test_create_all_day_event(self):
+    async def test_create_all_day_event(self, service, cleanup_batch):
         """Test creating an all-day event."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        tomorrow = datetime.now().date() + timedelta(days=1)
-        day_after = tomorrow + timedelta(days=1)
+        event_day = TEST_EVENT_START.date()
+        day_after = event_day + timedelta(days=1)
         
         result, cleanup = await create_and_cleanup_event(
             service,
+            cleanup_batch,
             calendar_id='primary',
             summary='All Day Test Event',
-            start_time=tomorrow.isoformat(),
+            start_time=event_day.isoformat(),
             end_time=day_after.isoformat(),
             all_day=True
         )
@@ -257,150 +203,11 @@ class TestCreateEventAllDay:
             await cleanup()
 
 
-class TestCreateEventRecurrence:
-    """Test recurring event functionality."""
-    
-    @pytest.mark.asyncio
-    async def test_create_recurring_event_weekly(self, base_event_data):
-        """Test creating a weekly recurring event."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            recurrence_rule="FREQ=WEEKLY;COUNT=5",
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-        finally:
-            await cleanup()
-    
-    @pytest.mark.asyncio
-    async def test_create_recurring_event_daily(self, base_event_data):
-        """Test creating a daily recurring event."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            recurrence_rule="FREQ=DAILY;COUNT=3",
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-        finally:
-            await cleanup()
-
-
-class TestCreateEventReminders:
-    """Test reminder functionality."""
-    
-    @pytest.mark.asyncio
-    async def test_create_event_with_email_reminder(self, base_event_data):
-        """Test creating event with email reminder."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            email_reminder_minutes=60,
-            use_default_reminders=False,
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-        finally:
-            await cleanup()
-    
-    @pytest.mark.asyncio
-    async def test_create_event_with_popup_reminder(self, base_event_data):
-        """Test creating event with popup reminder."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            popup_reminder_minutes=15,
-            use_default_reminders=False,
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-        finally:
-            await cleanup()
-    
-    @pytest.mark.asyncio
-    async def test_create_event_with_multiple_reminders(self, base_event_data):
-        """Test creating event with both email and popup reminders."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            email_reminder_minutes=1440,  # 24 hours
-            popup_reminder_minutes=15,
-            use_default_reminders=False,
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-        finally:
-            await cleanup()
-
-
-class TestCreateEventProperties:
-    """Test event properties and metadata."""
-    
-    @pytest.mark.asyncio
-    async def test_create_event_with_visibility_private(self, base_event_data):
-        """Test creating private event."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            visibility="private",
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-        finally:
-            await cleanup()
-    
-    @pytest.mark.asyncio
-    async def test_create_event_with_color(self, base_event_data):
-        """Test creating event with custom color."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            color_id=5,  # Valid color ID
-            **base_event_data
-        )
-        
-        try:
-            assert 'event_id' in result
-        finally:
-            await cleanup()
-
-
 class TestCreateEventValidation:
     """Test parameter validation and error handling."""
     
-    @pytest.mark.asyncio
-    async def test_create_event_invalid_calendar_id(self, base_event_data):
+    async def test_create_event_invalid_calendar_id(self, service, base_event_data):
         """Test creating event with invalid calendar ID."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         with pytest.raises(Exception):  # Should raise HttpError or ValueError
             await create_event(
                 service,
@@ -408,87 +215,54 @@ class TestCreateEventValidation:
                 **base_event_data
             )
     
-    @pytest.mark.asyncio
-    async def test_create_event_invalid_time_format(self):
+    async def test_create_event_invalid_time_format(self, mock_service):
         """Test creating event with invalid datetime format."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         with pytest.raises(ValueError):
             await create_event(
-                service,
+                mock_service,
                 calendar_id='primary',
                 summary='Invalid Time Test',
                 start_time="invalid-datetime",
                 end_time="also-invalid"
             )
+        
+        mock_service.events.assert_not_called()
     
-    @pytest.mark.asyncio
-    async def test_create_event_end_before_start(self):
+    async def test_create_event_end_before_start(self, mock_service):
         """Test creating event where end time is before start time."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         now = datetime.now()
         start_time = now + timedelta(hours=2)
         end_time = now + timedelta(hours=1)  # Before start time
         
         with pytest.raises(ValueError):
             await create_event(
-                service,
+                mock_service,
                 calendar_id='primary',
                 summary='Invalid Time Range Test',
                 start_time=start_time.isoformat(),
                 end_time=end_time.isoformat()
             )
+        
+        mock_service.events.assert_not_called()
     
-    @pytest.mark.asyncio
-    async def test_create_event_invalid_color_id(self, base_event_data):
+    async def test_create_event_invalid_color_id(self, mock_service, base_event_data):
         """Test creating event with invalid color ID."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         with pytest.raises(ValueError):
             await create_event(
-                service,
+                mock_service,
                 color_id=99,  # Invalid color ID
                 **base_event_data
             )
+        
+        mock_service.events.assert_not_called()
     
-    @pytest.mark.asyncio
-    async def test_create_event_invalid_send_notifications(self, base_event_data):
+    async def test_create_event_invalid_send_notifications(self, mock_service, base_event_data):
         """Test creating event with invalid send_notifications value."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         with pytest.raises(ValueError):
             await create_event(
-                service,
+                mock_service,
                 send_notifications="invalid_option",
                 **base_event_data
             )
-
-
-class TestCreateEventDifferentCalendars:
-    """Test creating events in different calendars."""
-    
-    @pytest.mark.asyncio
-    async def test_create_event_in_primary_calendar(self, base_event_data):
-        """Test creating event in primary calendar explicitly."""
-        email = get_test_service()
-        service = await create_service(email)
-        
-        # Remove calendar_id from base_event_data to avoid conflict
-        event_data = base_event_data.copy()
-        event_data['calendar_id'] = 'primary'
-        
-        result, cleanup = await create_and_cleanup_event(
-            service,
-            **event_data
-        )
         
-        try:
-            assert 'event_id' in result
-            assert result['calendar_id'] == 'primary'
-        finally:
-            await cleanup()
\ No newline at end of file
+        mock_service.events.assert_not_called()
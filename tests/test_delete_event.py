@@ -7,31 +7,14 @@ import pytest
 import pytest_asyncio
 import asyncio
 from datetime import datetime, timedelta
-import os
-import sys
 
-# Add the project root to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from calendar_tools.auth import create_service
 from calendar_tools.tools.create_event import create_event
 from calendar_tools.tools.delete_event import delete_event
 
 
-def get_test_service():
-    """Helper function to get authenticated service for testing."""
-    email = os.getenv('EMAIL_FOR_TESTING')
-    if not email:
-        pytest.skip("EMAIL_FOR_TESTING environment variable not set")
-    return email
-
-
 @pytest_asyncio.fixture
-async def test_event():
+async def test_event(service):
     """Create a test event that can be deleted."""
-    email = get_test_service()
-    service = await create_service(email)
-    
     # Create a test event in the future
     now = datetime.now()
     start_time = now + timedelta(hours=24)  # Tomorrow
@@ -84,11 +67,8 @@ class TestDeleteEventBasic:
         assert result['notifications_sent'] is False
     
     @pytest.mark.asyncio
-    async def test_delete_event_default_calendar(self):
+    async def test_delete_event_default_calendar(self, service):
         """Test deleting event using default primary calendar."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         # Create event to delete
         now = datetime.now()
         start_time = now + timedelta(hours=25)
@@ -115,11 +95,8 @@ class TestDeleteEventErrorHandling:
     """Test error handling and edge cases."""
     
     @pytest.mark.asyncio
-    async def test_delete_nonexistent_event(self):
+    async def test_delete_nonexistent_event(self, service):
         """Test deleting an event that doesn't exist."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         with pytest.raises(Exception):  # Should raise HttpError with 404
             await delete_event(
                 service,
@@ -127,11 +104,8 @@ class TestDeleteEventErrorHandling:
             )
     
     @pytest.mark.asyncio
-    async def test_delete_nonexistent_event_force(self):
+    async def test_delete_nonexistent_event_force(self, service):
         """Test deleting nonexistent event with force_delete=True."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         result = await delete_event(
             service,
             event_id="nonexistent_event_id_12345",
@@ -164,11 +138,8 @@ class TestDeleteEventErrorHandling:
         assert result2['was_missing'] is True
     
     @pytest.mark.asyncio
-    async def test_delete_invalid_calendar_id(self):
+    async def test_delete_invalid_calendar_id(self, service):
         """Test deleting event with invalid calendar ID."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         with pytest.raises(Exception):  # Should raise HttpError
             await delete_event(
                 service,
@@ -177,11 +148,8 @@ class TestDeleteEventErrorHandling:
             )
     
     @pytest.mark.asyncio
-    async def test_delete_empty_event_id(self):
+    async def test_delete_empty_event_id(self, service):
         """Test validation with empty event ID."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         with pytest.raises(ValueError) as exc_info:
             await delete_event(
                 service,
@@ -191,11 +159,8 @@ class TestDeleteEventErrorHandling:
         assert "event_id is required" in str(exc_info.value)
     
     @pytest.mark.asyncio
-    async def test_delete_empty_calendar_id(self):
+    async def test_delete_empty_calendar_id(self, service):
         """Test validation with empty calendar ID."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         with pytest.raises(ValueError) as exc_info:
             await delete_event(
                 service,
@@ -210,11 +175,8 @@ class TestDeleteEventWithAttendees:
     """Test deletion of events with attendees."""
     
     @pytest.mark.asyncio
-    async def test_delete_event_with_attendees_notify(self):
+    async def test_delete_event_with_attendees_notify(self, service):
         """Test deleting event with attendees and sending notifications."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         # Create event with attendees
         now = datetime.now()
         start_time = now + timedelta(hours=26)
@@ -239,11 +201,8 @@ class TestDeleteEventWithAttendees:
         assert result['notifications_sent'] is True
     
     @pytest.mark.asyncio
-    async def test_delete_event_with_attendees_no_notify(self):
+    async def test_delete_event_with_attendees_no_notify(self, service):
         """Test deleting event with attendees without notifications."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         # Create event with attendees
         now = datetime.now()
         start_time = now + timedelta(hours=27)
@@ -272,11 +231,8 @@ class TestDeleteRecurringEvents:
     """Test deletion of recurring events."""
     
     @pytest.mark.asyncio
-    async def test_delete_recurring_event_series(self):
+    async def test_delete_recurring_event_series(self, service):
         """Test deleting an entire recurring event series."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         # Create recurring event
         now = datetime.now()
         start_time = now + timedelta(hours=28)
@@ -302,11 +258,8 @@ class TestDeleteSpecialEvents:
     """Test deletion of special event types."""
     
     @pytest.mark.asyncio
-    async def test_delete_all_day_event(self):
+    async def test_delete_all_day_event(self, service):
         """Test deleting an all-day event."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         # Create all-day event
         tomorrow = (datetime.now() + timedelta(days=2)).date()
         day_after = tomorrow + timedelta(days=1)
@@ -329,11 +282,8 @@ class TestDeleteSpecialEvents:
         assert result['success'] is True
     
     @pytest.mark.asyncio
-    async def test_delete_google_meet_event(self):
+    async def test_delete_google_meet_event(self, service):
         """Test deleting event with Google Meet."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         # Create Google Meet event
         now = datetime.now()
         start_time = now + timedelta(hours=29)
@@ -359,11 +309,8 @@ class TestIntegratedCreateDelete:
     """Test create-then-delete workflow for clean testing."""
     
     @pytest.mark.asyncio
-    async def test_create_and_delete_workflow(self):
+    async def test_create_and_delete_workflow(self, service):
         """Test complete create-then-delete workflow."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         # Create event
         now = datetime.now()
         start_time = now + timedelta(hours=30)
@@ -401,11 +348,8 @@ class TestIntegratedCreateDelete:
         assert delete_result2['was_missing'] is True
     
     @pytest.mark.asyncio 
-    async def test_batch_create_delete(self):
+    async def test_batch_create_delete(self, service):
         """Test creating and deleting multiple events."""
-        email = get_test_service()
-        service = await create_service(email)
-        
         created_events = []
         
         # Create multiple test events
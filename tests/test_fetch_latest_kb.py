@@ -1,16 +1,83 @@
 """
 Test suite for fetch_latest_kb tool - GitHub integration
 Following TDD methodology: write comprehensive tests first
+
+Requests go through the shared GitHub client from http_clients, with its
+transport replaced by an httpx.MockTransport (see the github_transport fixture).
 """
 
 import pytest
 import httpx
-from unittest.mock import AsyncMock, patch, MagicMock
-from datetime import datetime
+import functools
+import importlib
+import json
+import time
+import zlib
+from datetime import datetime, timedelta
 import asyncio
-import os
 
-from kb_tools.fetch_latest_kb import fetch_latest_kb
+import http_clients
+from kb_tools.fetch_latest_kb import fetch_latest_kb, GitHubRateLimitError
+
+# The kb_tools package re-exports fetch_latest_kb, shadowing the module attribute
+fetch_module = importlib.import_module("kb_tools.fetch_latest_kb")
+
+
+class FakeGitHub:
+    """Serves GitHub raw URLs from memory and records every request it receives."""
+    
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.handler = self.serve_file
+        self.in_flight = 0
+        self.peak_in_flight = 0
+    
+    async def __call__(self, request):
+        self.requests.append(request)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await self.handler(request)
+        finally:
+            self.in_flight -= 1
+    
+    async def serve_file(self, request):
+        content = self.files.get(str(request.url))
+        if content is None:
+            return httpx.Response(404)
+        etag = f'"{zlib.crc32(content.encode("utf-8")):08x}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, text=content, headers={"ETag": etag})
+
+
+@pytest.fixture
+def github_transport(monkeypatch):
+    """Route the shared GitHub client through a FakeGitHub and start with empty KB caches."""
+    github = FakeGitHub()
+    
+    # Build the real shared client (headers, limits, timeouts) on a mock transport
+    monkeypatch.setattr(http_clients, "_github_client", None)
+    with monkeypatch.context() as patched:
+        patched.setattr(
+            httpx, "AsyncClient",
+            functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(github))
+        )
+        http_clients.get_github_client()
+    
+    monkeypatch.setattr(fetch_module, "_RESULT_CACHE", {})
+    monkeypatch.setattr(fetch_module, "_KB_CACHE", {})
+    monkeypatch.setattr(fetch_module, "_KB_LOCKS", {})
+    monkeypatch.setattr(fetch_module, "_RESULT_LOCKS", {})
+    monkeypatch.setattr(fetch_module, "_disk_cache_loaded_from", None)
+    # Retry transient failures immediately instead of backing off
+    monkeypatch.setattr(http_clients, "_retry_delay", lambda *args: 0)
+    
+    for name in ("KB_CACHE_DURATION_MINUTES", "KB_MAX_FILE_SIZE_MB", "KB_TIMEOUT_SECONDS",
+                 "KB_MAX_CONCURRENCY", "KB_CACHE_DIR", "GITHUB_TOKEN"):
+        monkeypatch.delenv(name, raising=False)
+    return github
 
 
 class TestFetchLatestKB:
@@ -36,282 +103,406 @@ class TestFetchLatestKB:
             "current-offers.md": "# Current Offers\n\nSeptember 2025 Special Promotions..."
         }
 
+    @pytest.fixture
+    def kb_files(self, github_transport, mock_urls, mock_markdown_content, monkeypatch):
+        """Serve every sample file and configure GITHUB_RAW_URLS with all of them."""
+        for url in mock_urls:
+            github_transport.files[url] = mock_markdown_content[url.split('/')[-1]]
+        monkeypatch.setenv("GITHUB_RAW_URLS", ",".join(mock_urls))
+        return github_transport
+
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_success_all_files(self, mock_urls, mock_markdown_content):
+    async def test_fetch_latest_kb_success_all_files(self, kb_files, mock_urls, mock_markdown_content):
         """Test successful fetching of all knowledge base files"""
-        # Mock httpx.AsyncClient responses
-        mock_responses = []
-        for url in mock_urls:
-            filename = url.split('/')[-1]
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.text = mock_markdown_content[filename]
-            mock_response.headers = {"content-length": str(len(mock_markdown_content[filename]))}
-            mock_responses.append(mock_response)
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(side_effect=mock_responses)
-            
-            result = await fetch_latest_kb(github_raw_urls=mock_urls)
-            
-            # Verify structure
-            assert "files" in result
-            assert "total_files" in result
-            assert "last_updated" in result
-            assert "fetch_duration_ms" in result
-            
-            # Verify content
-            assert result["total_files"] == 4
-            assert len(result["files"]) == 4
-            
-            # Check each file
-            for i, file_data in enumerate(result["files"]):
-                expected_filename = mock_urls[i].split('/')[-1]
-                assert file_data["filename"] == expected_filename
-                assert file_data["content"] == mock_markdown_content[expected_filename]
-                assert file_data["size_bytes"] == len(mock_markdown_content[expected_filename])
-                assert file_data["url"] == mock_urls[i]
-                assert "fetch_time" in file_data
+        result = await fetch_latest_kb()
+        
+        # Verify structure
+        assert "files" in result
+        assert "total_files" in result
+        assert "last_updated" in result
+        assert "fetch_duration_ms" in result
+        
+        # Verify content
+        assert result["total_files"] == 4
+        assert len(result["files"]) == 4
+        
+        # Check each file
+        for i, file_data in enumerate(result["files"]):
+            expected_filename = mock_urls[i].split('/')[-1]
+            assert file_data["filename"] == expected_filename
+            assert file_data["content"] == mock_markdown_content[expected_filename]
+            assert file_data["size_bytes"] == len(mock_markdown_content[expected_filename])
+            assert file_data["url"] == mock_urls[i]
+            assert "fetch_time" in file_data
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_single_file(self, mock_markdown_content):
+    async def test_fetch_latest_kb_single_file(self, kb_files, mock_urls, monkeypatch):
         """Test fetching single file"""
-        single_url = ["https://raw.githubusercontent.com/test/repo/main/about-company.md"]
-        
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = mock_markdown_content["about-company.md"]
-        mock_response.headers = {"content-length": "50"}
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
-            result = await fetch_latest_kb(github_raw_urls=single_url)
-            
-            assert result["total_files"] == 1
-            assert len(result["files"]) == 1
-            assert result["files"][0]["filename"] == "about-company.md"
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        
+        result = await fetch_latest_kb()
+        
+        assert result["total_files"] == 1
+        assert len(result["files"]) == 1
+        assert result["files"][0]["filename"] == "about-company.md"
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_with_cache_duration(self, mock_urls, mock_markdown_content):
+    async def test_fetch_latest_kb_with_cache_duration(self, kb_files, monkeypatch):
         """Test fetch with custom cache duration"""
-        mock_responses = []
-        for url in mock_urls:
-            filename = url.split('/')[-1]
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.text = mock_markdown_content[filename]
-            mock_response.headers = {"content-length": "100"}
-            mock_responses.append(mock_response)
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(side_effect=mock_responses)
-            
-            result = await fetch_latest_kb(
-                github_raw_urls=mock_urls,
-                cache_duration_minutes=60
-            )
-            
-            assert result["total_files"] == 4
-            # Cache duration should be stored for future use
-            assert "cache_duration_minutes" in result
-            assert result["cache_duration_minutes"] == 60
+        monkeypatch.setenv("KB_CACHE_DURATION_MINUTES", "60")
+        
+        result = await fetch_latest_kb()
+        
+        assert result["total_files"] == 4
+        # Cache duration should be stored for future use
+        assert "cache_duration_minutes" in result
+        assert result["cache_duration_minutes"] == 60
+        assert len(kb_files.requests) == 4
+        
+        # Within the cache window the result is served without any request
+        cached = await fetch_latest_kb()
+        assert cached["cached"] is True
+        assert len(kb_files.requests) == 4
+        
+        # Once the window has passed, files are revalidated with their ETags
+        monkeypatch.setenv("KB_CACHE_DURATION_MINUTES", "0")
+        revalidated = await fetch_latest_kb()
+        
+        conditional_requests = kb_files.requests[4:]
+        assert len(conditional_requests) == 4
+        assert all(request.headers.get("If-None-Match") for request in conditional_requests)
+        assert revalidated["unchanged"] is True
+        assert [f["content"] for f in revalidated["files"]] == [f["content"] for f in result["files"]]
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_http_error(self, mock_urls):
+    async def test_fetch_latest_kb_http_error(self, github_transport, mock_urls, monkeypatch):
         """Test handling of HTTP errors"""
-        mock_response = MagicMock()
-        mock_response.status_code = 404
-        mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
-            "Not Found", request=MagicMock(), response=mock_response
-        )
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
-            with pytest.raises(Exception) as exc_info:
-                await fetch_latest_kb(github_raw_urls=mock_urls[:1])
-            
-            assert "Failed to fetch" in str(exc_info.value)
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        
+        with pytest.raises(Exception) as exc_info:
+            await fetch_latest_kb()
+        
+        assert "Failed to fetch" in str(exc_info.value)
+        assert "HTTP 404" in str(exc_info.value)
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_network_error(self, mock_urls):
+    async def test_fetch_latest_kb_network_error(self, github_transport, mock_urls, monkeypatch):
         """Test handling of network errors"""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-                side_effect=httpx.NetworkError("Connection failed")
-            )
-            
-            with pytest.raises(Exception) as exc_info:
-                await fetch_latest_kb(github_raw_urls=mock_urls[:1])
-            
-            # Should contain either "Network error" or "Network connection failed"
-            error_msg = str(exc_info.value).lower()
-            assert "network" in error_msg
+        async def refuse_connection(request):
+            raise httpx.ConnectError("Connection failed", request=request)
+        
+        github_transport.handler = refuse_connection
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        
+        with pytest.raises(Exception) as exc_info:
+            await fetch_latest_kb()
+        
+        # Should contain either "Network error" or "Network connection failed"
+        error_msg = str(exc_info.value).lower()
+        assert "network" in error_msg
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_empty_urls(self):
+    async def test_fetch_latest_kb_empty_urls(self, github_transport, monkeypatch):
         """Test handling of empty URL list"""
+        monkeypatch.setenv("GITHUB_RAW_URLS", "")
+        
         with pytest.raises(ValueError) as exc_info:
-            await fetch_latest_kb(github_raw_urls=[])
+            await fetch_latest_kb()
         
-        assert "at least one URL" in str(exc_info.value)
+        assert "GITHUB_RAW_URLS environment variable is required" in str(exc_info.value)
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_invalid_urls(self):
+    async def test_fetch_latest_kb_invalid_urls(self, github_transport, monkeypatch):
         """Test handling of invalid URLs"""
-        invalid_urls = ["not-a-url", "http://"]
+        monkeypatch.setenv("GITHUB_RAW_URLS", "not-a-url,http://")
         
         with pytest.raises(ValueError) as exc_info:
-            await fetch_latest_kb(github_raw_urls=invalid_urls)
+            await fetch_latest_kb()
         
         assert "Invalid URL" in str(exc_info.value)
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_large_file_warning(self, mock_urls):
+    async def test_fetch_latest_kb_large_file_warning(self, github_transport, mock_urls, monkeypatch):
         """Test warning for large files"""
-        large_content = "x" * (10 * 1024 * 1024 + 1)  # 10MB + 1 byte
-        
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = large_content
-        mock_response.headers = {"content-length": str(len(large_content))}
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
-            result = await fetch_latest_kb(
-                github_raw_urls=mock_urls[:1],
-                max_file_size_mb=10
-            )
-            
-            # Should include warning but still process
-            assert "warnings" in result
-            assert any("large file" in warning.lower() for warning in result["warnings"])
+        github_transport.files[mock_urls[0]] = "x" * (10 * 1024 * 1024 + 1)  # 10MB + 1 byte
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        monkeypatch.setenv("KB_MAX_FILE_SIZE_MB", "10")
+        
+        result = await fetch_latest_kb()
+        
+        # Should include warning but still process
+        assert "warnings" in result
+        assert any("large file" in warning.lower() for warning in result["warnings"])
+        assert result["files"][0]["size_bytes"] == 10 * 1024 * 1024 + 1
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_oversized_stream_aborted(self, github_transport, mock_urls, monkeypatch):
+        """Test a download without Content-Length stops streaming once past the hard size limit"""
+        chunk = b"x" * (1024 * 1024)
+        chunks_sent = 0
+        
+        async def stream_body():
+            nonlocal chunks_sent
+            for _ in range(20):
+                chunks_sent += 1
+                yield chunk
+        
+        async def huge_file(request):
+            return httpx.Response(200, content=stream_body())
+        
+        github_transport.handler = huge_file
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        monkeypatch.setenv("KB_MAX_FILE_SIZE_MB", "1")
+        
+        with pytest.raises(Exception) as exc_info:
+            await fetch_latest_kb()
+        
+        assert "File too large" in str(exc_info.value)
+        # 1MB limit x HARD_SIZE_LIMIT_MULTIPLIER: the rest of the 20MB body is never read
+        assert chunks_sent == fetch_module.HARD_SIZE_LIMIT_MULTIPLIER + 1
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_oversized_content_length_rejected(self, github_transport, mock_urls, monkeypatch):
+        """Test a declared Content-Length past the hard size limit is rejected before reading the body"""
+        async def huge_file(request):
+            return httpx.Response(200, headers={"Content-Length": str(50 * 1024 * 1024)}, content=b"")
+        
+        github_transport.handler = huge_file
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        monkeypatch.setenv("KB_MAX_FILE_SIZE_MB", "1")
+        
+        with pytest.raises(Exception) as exc_info:
+            await fetch_latest_kb()
+        
+        assert "File too large: 50.0MB" in str(exc_info.value)
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_size_counts_bytes(self, github_transport, mock_urls, monkeypatch):
+        """Test size_bytes is the downloaded byte count, not the decoded character count"""
+        github_transport.files[mock_urls[0]] = "# Café Financing\n\nPrices in €"
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        
+        result = await fetch_latest_kb()
+        
+        file_data = result["files"][0]
+        assert file_data["content"] == "# Café Financing\n\nPrices in €"
+        assert file_data["size_bytes"] == len("# Café Financing\n\nPrices in €".encode("utf-8"))
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_malformed_disk_cache_entries(self, kb_files, mock_urls, tmp_path, monkeypatch):
+        """Test malformed or old-format disk cache entries are cache misses, not errors"""
+        fetched_at = (datetime.now() - timedelta(hours=1)).isoformat()
+        entries = {
+            mock_urls[0]: {
+                "fetched_at": fetched_at,
+                "etag": '"stale"',
+                "last_modified": None,
+                "file_data": {"filename": "about-company.md", "content": "# Old", "size_bytes": 5}
+            },
+            mock_urls[1]: {"etag": '"no-timestamp"'},
+            mock_urls[2]: {"fetched_at": "yesterday", "etag": '"bad-timestamp"', "file_data": {}},
+            mock_urls[3]: [fetched_at, '"old-format"']
+        }
+        (tmp_path / fetch_module.KB_CACHE_FILE_NAME).write_text(json.dumps(entries))
+        monkeypatch.setenv("KB_CACHE_DIR", str(tmp_path))
+        
+        result = await fetch_latest_kb()
+        
+        assert result["total_files"] == 4
+        assert "errors" not in result
+        # Only the valid entry is revalidated; the rest are fetched from scratch
+        conditional = {str(request.url): request.headers.get("If-None-Match") for request in kb_files.requests}
+        assert conditional == {mock_urls[0]: '"stale"', mock_urls[1]: None, mock_urls[2]: None, mock_urls[3]: None}
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_concurrent_requests(self, mock_urls, mock_markdown_content):
+    async def test_fetch_latest_kb_concurrent_requests(self, kb_files):
         """Test concurrent fetching of multiple files"""
-        mock_responses = []
-        for url in mock_urls:
-            filename = url.split('/')[-1]
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.text = mock_markdown_content[filename]
-            mock_response.headers = {"content-length": "100"}
-            mock_responses.append(mock_response)
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(side_effect=mock_responses)
-            
-            start_time = datetime.now()
-            result = await fetch_latest_kb(github_raw_urls=mock_urls)
-            end_time = datetime.now()
-            
-            # Should complete relatively quickly due to concurrent requests
-            duration_ms = (end_time - start_time).total_seconds() * 1000
-            assert duration_ms < 1000  # Should be much faster than sequential
-            
-            assert result["total_files"] == 4
-            assert len(result["files"]) == 4
+        async def slow_file(request):
+            await asyncio.sleep(0.2)
+            return await kb_files.serve_file(request)
+        
+        kb_files.handler = slow_file
+        
+        start_time = datetime.now()
+        result = await fetch_latest_kb()
+        end_time = datetime.now()
+        
+        # Four 200ms downloads overlap instead of taking 800ms back to back
+        duration_ms = (end_time - start_time).total_seconds() * 1000
+        assert duration_ms < 600
+        assert kb_files.peak_in_flight == 4
+        
+        assert result["total_files"] == 4
+        assert len(result["files"]) == 4
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_partial_failure(self, mock_urls, mock_markdown_content):
-        """Test handling when some files fail to fetch"""
-        # First file succeeds, second fails, third succeeds
-        mock_responses = [
-            # Success
-            MagicMock(status_code=200, text=mock_markdown_content["about-company.md"], headers={"content-length": "100"}),
-            # Failure
-            None,  # Will cause exception
-            # Success  
-            MagicMock(status_code=200, text=mock_markdown_content["services-provided.md"], headers={"content-length": "100"}),
-        ]
+    async def test_fetch_latest_kb_concurrent_callers_share_fetch(self, kb_files):
+        """Test concurrent calls for the same URLs share one fetch and release its lock"""
+        results = await asyncio.gather(*(fetch_latest_kb() for _ in range(3)))
         
-        def side_effect(*args, **kwargs):
-            response = mock_responses.pop(0)
-            if response is None:
-                raise httpx.NetworkError("Failed to fetch")
-            return response
+        assert len(kb_files.requests) == 4
+        assert all(result["total_files"] == 4 for result in results)
+        assert fetch_module._RESULT_LOCKS == {}
 
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(side_effect=side_effect)
-            
-            # Should raise exception on any failure for data integrity
-            with pytest.raises(Exception):
-                await fetch_latest_kb(github_raw_urls=mock_urls[:3])
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_results_do_not_share_state(self, kb_files):
+        """Test mutating a returned result changes neither the cached result nor later hits"""
+        first = await fetch_latest_kb()
+        expected_files = [dict(file_data) for file_data in first["files"]]
+        
+        first["files"][0]["content"] = "changed"
+        first["files"].pop()
+        
+        cached = await fetch_latest_kb()
+        assert cached["cached"] is True
+        assert cached["files"] == expected_files
+        
+        cached["files"][0]["content"] = "changed again"
+        assert (await fetch_latest_kb())["files"] == expected_files
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_timeout_handling(self, mock_urls):
+    async def test_fetch_latest_kb_different_urls_not_serialized(self, kb_files, mock_urls, monkeypatch):
+        """Test calls for different URL sets fetch concurrently instead of queueing on one lock"""
+        async def slow_file(request):
+            await asyncio.sleep(0.2)
+            return await kb_files.serve_file(request)
+        
+        kb_files.handler = slow_file
+        
+        # Each call reads GITHUB_RAW_URLS when it starts
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        first = asyncio.create_task(fetch_latest_kb())
+        await asyncio.sleep(0)
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[1])
+        second = asyncio.create_task(fetch_latest_kb())
+        
+        results = await asyncio.gather(first, second)
+        
+        assert kb_files.peak_in_flight == 2
+        assert [result["files"][0]["url"] for result in results] == mock_urls[:2]
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_failed_fetch_releases_lock(self, github_transport, mock_urls, monkeypatch):
+        """Test a fetch that raises does not leave its lock behind"""
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        
+        with pytest.raises(Exception):
+            await fetch_latest_kb()
+        
+        assert fetch_module._RESULT_LOCKS == {}
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_max_concurrency(self, kb_files, monkeypatch):
+        """Test KB_MAX_CONCURRENCY bounds the number of downloads in flight"""
+        async def slow_file(request):
+            await asyncio.sleep(0.05)
+            return await kb_files.serve_file(request)
+        
+        kb_files.handler = slow_file
+        monkeypatch.setenv("KB_MAX_CONCURRENCY", "2")
+        
+        result = await fetch_latest_kb()
+        
+        assert kb_files.peak_in_flight == 2
+        assert result["total_files"] == 4
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_partial_failure(self, kb_files, mock_urls):
+        """Test handling when some files fail to fetch"""
+        # First file succeeds, second fails, the rest succeed
+        del kb_files.files[mock_urls[1]]
+        
+        result = await fetch_latest_kb()
+        
+        # Successful files are kept and the failure is reported per URL
+        assert [file_data["url"] for file_data in result["files"]] == [mock_urls[0]] + mock_urls[2:]
+        assert result["errors"] == [{"url": mock_urls[1], "error": "HTTP 404: Not Found"}]
+        assert result["unchanged"] is False
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_timeout_handling(self, github_transport, mock_urls, monkeypatch):
         """Test handling of request timeouts"""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-                side_effect=httpx.TimeoutException("Request timed out")
-            )
-            
-            with pytest.raises(Exception) as exc_info:
-                await fetch_latest_kb(github_raw_urls=mock_urls[:1])
-            
-            assert "timeout" in str(exc_info.value).lower()
+        async def time_out(request):
+            raise httpx.ReadTimeout("Request timed out", request=request)
+        
+        github_transport.handler = time_out
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        
+        with pytest.raises(Exception) as exc_info:
+            await fetch_latest_kb()
+        
+        assert "timeout" in str(exc_info.value).lower()
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_custom_timeout(self, mock_urls, mock_markdown_content):
+    async def test_fetch_latest_kb_custom_timeout(self, kb_files, mock_urls, monkeypatch):
         """Test custom timeout configuration"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = mock_markdown_content["about-company.md"]
-        mock_response.headers = {"content-length": "100"}
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
-            result = await fetch_latest_kb(
-                github_raw_urls=mock_urls[:1],
-                timeout_seconds=30
-            )
-            
-            assert result["total_files"] == 1
-            
-            # Verify timeout was passed to client
-            mock_client.assert_called_once()
-            call_kwargs = mock_client.call_args[1]
-            assert call_kwargs["timeout"] == 30
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        monkeypatch.setenv("KB_TIMEOUT_SECONDS", "12")
+        
+        result = await fetch_latest_kb()
+        
+        assert result["total_files"] == 1
+        
+        # Timeout is applied per request on the shared client
+        request_timeout = kb_files.requests[0].extensions["timeout"]
+        assert request_timeout == {"connect": 12, "read": 12, "write": 12, "pool": 12}
 
     @pytest.mark.asyncio
-    async def test_fetch_latest_kb_user_agent(self, mock_urls, mock_markdown_content):
+    async def test_fetch_latest_kb_user_agent(self, kb_files, mock_urls, monkeypatch):
         """Test proper User-Agent header is set"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = mock_markdown_content["about-company.md"]
-        mock_response.headers = {"content-length": "100"}
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_get = AsyncMock(return_value=mock_response)
-            mock_client.return_value.__aenter__.return_value.get = mock_get
-            
-            await fetch_latest_kb(github_raw_urls=mock_urls[:1])
-            
-            # Verify User-Agent header was set in client initialization
-            mock_client.assert_called_once()
-            call_kwargs = mock_client.call_args[1]
-            assert "headers" in call_kwargs
-            assert "User-Agent" in call_kwargs["headers"]
-            assert "Elite Motors KB Sync" in call_kwargs["headers"]["User-Agent"]
-
-    @pytest.mark.asyncio  
-    async def test_fetch_latest_kb_github_rate_limit(self, mock_urls):
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        
+        await fetch_latest_kb()
+        
+        # Verify User-Agent header comes from the shared client
+        assert "Elite Motors KB Sync" in kb_files.requests[0].headers["User-Agent"]
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_reuses_shared_client(self, kb_files, monkeypatch):
+        """Test every fetch goes through the one shared GitHub client"""
+        client = http_clients.get_github_client()
+        monkeypatch.setenv("KB_CACHE_DURATION_MINUTES", "0")
+        
+        await fetch_latest_kb()
+        await fetch_latest_kb()
+        
+        assert http_clients.get_github_client() is client
+        assert len(kb_files.requests) == 8
+
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_github_rate_limit(self, github_transport, mock_urls, monkeypatch):
         """Test handling of GitHub API rate limits"""
-        mock_response = MagicMock()
-        mock_response.status_code = 403
-        mock_response.headers = {"X-RateLimit-Remaining": "0"}
-        mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
-            "Rate limit exceeded", request=MagicMock(), response=mock_response
-        )
+        async def rate_limited(request):
+            return httpx.Response(403, headers={"X-RateLimit-Remaining": "0"})
+        
+        github_transport.handler = rate_limited
+        monkeypatch.setenv("GITHUB_RAW_URLS", mock_urls[0])
+        
+        with pytest.raises(Exception) as exc_info:
+            await fetch_latest_kb()
+        
+        assert "rate limit" in str(exc_info.value).lower()
 
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
-            with pytest.raises(Exception) as exc_info:
-                await fetch_latest_kb(github_raw_urls=mock_urls[:1])
-            
-            assert "rate limit" in str(exc_info.value).lower()
+    @pytest.mark.asyncio
+    async def test_fetch_latest_kb_rate_limit_cancels_other_downloads(self, kb_files, mock_urls):
+        """Test an exhausted rate limit aborts the batch without waiting for the other files"""
+        async def rate_limit_first_file(request):
+            if str(request.url) == mock_urls[0]:
+                reset_at = int(time.time()) + 3600
+                return httpx.Response(403, headers={
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset": str(reset_at)
+                })
+            await asyncio.sleep(5)
+            return await kb_files.serve_file(request)
+        
+        kb_files.handler = rate_limit_first_file
+        
+        start_time = datetime.now()
+        with pytest.raises(GitHubRateLimitError):
+            await fetch_latest_kb()
+        duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        
+        # The slow downloads were cancelled rather than awaited
+        assert duration_ms < 1000
+        assert kb_files.in_flight == 0
@@ -1,14 +1,85 @@
 """
 Tests for get_similar_vehicles tool.
 
-Tests use real Supabase database integration following TDD methodology.
+TestGetSimilarVehicles uses real Supabase database integration following TDD methodology.
+TestGetSimilarVehiclesLocal pages through tests/fixtures/inventory_rows.json via the
+fake_supabase fixture, with a Python stand-in for the similar_vehicle_candidates function.
 """
 
 import pytest
 import asyncio
+import importlib
 from inventory.get_similar_vehicles import get_similar_vehicles
 
 
+def _fake_similar_vehicle_candidates(tables, params):
+    """Python stand-in for the similar_vehicle_candidates Postgres function."""
+    reference_features = set(params['p_features'])
+    candidates = [
+        row for row in tables['inventory']
+        if row['vehicles']['is_active']
+        and row['vehicle_id'] != params['p_reference_vehicle_id']
+        and params['p_price_min'] <= row['current_price'] <= params['p_price_max']
+        and (params['p_include_unavailable'] or row['status'] == 'available')
+    ]
+    same_category = [row for row in candidates if row['vehicles']['category'] == params['p_category']]
+    
+    ranked = []
+    for row in same_category or candidates:
+        vehicle = row['vehicles']
+        features = set(row['features'])
+        score = 40 if vehicle['category'] == params['p_category'] else 0
+        score += 25 if vehicle['brand'].lower() == params['p_brand'].lower() else 0
+        score += {0: 15, 1: 10.5, 2: 6, 3: 3}.get(abs(vehicle['year'] - params['p_year']), 0)
+        if reference_features:
+            score += 20 * len(reference_features & features) / len(reference_features)
+        else:
+            score += 10 if features else 20
+        ranked.append({
+            'inventory_id': row['id'],
+            'vehicle_id': row['vehicle_id'],
+            'vin': row['vin'],
+            'color': row['color'],
+            'features': row['features'],
+            'current_price': row['current_price'],
+            'status': row['status'],
+            'expected_delivery_date': row['expected_delivery_date'],
+            'location': row.get('location', 'main_dealership'),
+            'brand': vehicle['brand'],
+            'model': vehicle['model'],
+            'year': vehicle['year'],
+            'category': vehicle['category'],
+            'base_price': vehicle['base_price'],
+            'similarity_score': float(score)
+        })
+    
+    after = params.get('p_after_score'), params.get('p_after_id')
+    if after[0] is not None:
+        ranked = [row for row in ranked if (row['similarity_score'], row['inventory_id']) < after]
+    ranked.sort(key=lambda row: (row['similarity_score'], row['inventory_id']), reverse=True)
+    return ranked[:params['p_limit']]
+
+
+@pytest.fixture
+def similar_supabase(fake_supabase, monkeypatch):
+    """Extend fake_supabase with vehicles/pricing tables and the candidates function."""
+    inventory_rows = fake_supabase.tables['inventory']
+    vehicles = {row['vehicle_id']: row['vehicles'] for row in inventory_rows}
+    fake_supabase.tables['vehicles'] = list(vehicles.values())
+    fake_supabase.tables['pricing'] = [
+        dict(pricing, vehicle_id=vehicle_id)
+        for vehicle_id, vehicle in vehicles.items()
+        for pricing in vehicle.get('pricing', [])
+    ]
+    fake_supabase.functions['similar_vehicle_candidates'] = _fake_similar_vehicle_candidates
+    # The tool module imported get_supabase_client by name
+    monkeypatch.setattr(
+        importlib.import_module("inventory.get_similar_vehicles"),
+        "get_supabase_client", lambda: fake_supabase
+    )
+    return fake_supabase
+
+
 class TestGetSimilarVehicles:
     """Test suite for get_similar_vehicles function using real Supabase database."""
 
@@ -322,4 +393,46 @@ class TestGetSimilarVehicles:
         assert "same_category" in search_criteria
         expected_keys = ["same_category", "price_range_tolerance", "availability_filter"]
         for key in expected_keys:
-            assert key in search_criteria
\ No newline at end of file
+            assert key in search_criteria
+
+
+class TestGetSimilarVehiclesLocal:
+    """Test cursor pagination against local JSON fixtures (no network)."""
+
+    @pytest.mark.parametrize("page_size", [1, 2, 3])
+    @pytest.mark.asyncio
+    async def test_get_similar_vehicles_cursor_pages(self, similar_supabase, page_size):
+        """Test following next_cursor returns the full ranking once, in order, across page boundaries."""
+        # No other trucks, so every category is ranked; RAV4/X5 and Camry/Accord tie on score
+        search = {"reference_vehicle_id": "veh-f150", "price_tolerance_percent": 100, "include_unavailable": True}
+        full = await get_similar_vehicles(max_results=20, **search)
+        assert [v["inventory_id"] for v in full["alternatives"]] == ["inv-004", "inv-003", "inv-002", "inv-001"]
+        assert full["next_cursor"] is None
+        
+        paged = []
+        cursor = None
+        while True:
+            page = await get_similar_vehicles(max_results=page_size, cursor=cursor, **search)
+            assert len(page["alternatives"]) <= page_size
+            paged.extend(page["alternatives"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        
+        assert paged == full["alternatives"]
+
+    @pytest.mark.asyncio
+    async def test_get_similar_vehicles_last_full_page_has_no_cursor(self, similar_supabase):
+        """Test a page that ends exactly at the last alternative does not offer another page."""
+        result = await get_similar_vehicles(
+            "veh-f150", max_results=4, price_tolerance_percent=100, include_unavailable=True
+        )
+        
+        assert result["total_found"] == 4
+        assert result["next_cursor"] is None
+
+    @pytest.mark.asyncio
+    async def test_get_similar_vehicles_invalid_cursor(self, similar_supabase):
+        """Test a malformed cursor is rejected as invalid input."""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            await get_similar_vehicles("veh-f150", cursor="not-a-cursor")
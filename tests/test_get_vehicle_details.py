@@ -1,12 +1,43 @@
 """
 Tests for get_vehicle_details tool.
 
-Tests use real Supabase database integration following TDD methodology.
+TestGetVehicleDetails uses real Supabase database integration following TDD methodology.
+TestGetVehicleDetailsLocal serves tests/fixtures/inventory_rows.json via the
+fake_supabase fixture.
 """
 
 import pytest
 import asyncio
-from inventory.get_vehicle_details import get_vehicle_details
+import importlib
+from inventory._cache import ResultCache
+from inventory.get_vehicle_details import get_vehicle_details, get_vehicle_details_bulk
+
+# The inventory package re-exports get_vehicle_details, shadowing the module attribute
+details_module = importlib.import_module("inventory.get_vehicle_details")
+
+
+@pytest.fixture
+def details_supabase(fake_supabase, monkeypatch):
+    """Extend fake_supabase with vehicles/pricing tables and start with an empty response cache."""
+    inventory_rows = [dict(row, location='main_dealership') for row in fake_supabase.tables['inventory']]
+    # Vehicle rows also embed their inventory units, for queries selecting inventory(...)
+    vehicles = {}
+    for row in inventory_rows:
+        vehicle = vehicles.setdefault(row['vehicle_id'], dict(row['vehicles'], inventory=[]))
+        vehicle['inventory'].append({key: value for key, value in row.items() if key != 'vehicles'})
+    fake_supabase.tables['inventory'] = inventory_rows
+    fake_supabase.tables['vehicles'] = list(vehicles.values())
+    fake_supabase.tables['pricing'] = [
+        dict(pricing, vehicle_id=vehicle_id)
+        for vehicle_id, vehicle in vehicles.items()
+        for pricing in vehicle.get('pricing', [])
+    ]
+    # The tool module imported get_supabase_client by name
+    monkeypatch.setattr(details_module, "get_supabase_client", lambda: fake_supabase)
+    monkeypatch.setattr(details_module, "_RESULT_CACHE", ResultCache(
+        details_module.RESULT_CACHE_TTL_SECONDS, details_module.RESULT_CACHE_MAX_ENTRIES
+    ))
+    return fake_supabase
 
 
 class TestGetVehicleDetails:
@@ -351,4 +382,96 @@ class TestGetVehicleDetails:
             assert "fuel_economy_highway_mpg" in specifications
             assert specifications["fuel_economy_city_mpg"] > 0
             assert specifications["fuel_economy_highway_mpg"] > 0
-            assert specifications["fuel_economy_highway_mpg"] >= specifications["fuel_economy_city_mpg"]
\ No newline at end of file
+            assert specifications["fuel_economy_highway_mpg"] >= specifications["fuel_economy_city_mpg"]
+
+    @pytest.mark.asyncio
+    async def test_get_vehicle_details_bulk(self):
+        """Test bulk vehicle details keep request order and report unknown IDs."""
+        vehicle_ids = [
+            "550e8400-e29b-41d4-a716-446655440004",  # Toyota RAV4
+            "550e8400-e29b-41d4-a716-446655440001",  # Toyota Camry
+            "550e8400-e29b-41d4-a716-999999999999"   # Does not exist
+        ]
+        result = await get_vehicle_details_bulk(vehicle_ids=vehicle_ids)
+        
+        assert result["total_vehicles"] == 2
+        assert [v["vehicle"]["id"] for v in result["vehicles"]] == vehicle_ids[:2]
+        assert result["not_found"] == vehicle_ids[2:]
+        
+        for details in result["vehicles"]:
+            assert "specifications" in details
+            assert "availability" in details
+            assert "pricing" in details
+
+    @pytest.mark.asyncio
+    async def test_get_vehicle_details_bulk_empty_ids(self):
+        """Test bulk vehicle details rejects an empty ID list."""
+        with pytest.raises(ValueError) as exc_info:
+            await get_vehicle_details_bulk(vehicle_ids=[])
+        
+        assert "at least one" in str(exc_info.value)
+
+
+class TestGetVehicleDetailsLocal:
+    """Test response caching against local JSON fixtures (no network)."""
+
+    @pytest.mark.asyncio
+    async def test_get_vehicle_details_responses_do_not_share_state(self, details_supabase):
+        """Test mutating a response changes neither cached responses nor the cached derived info."""
+        first = await get_vehicle_details(vehicle_id="veh-camry")
+        expected_specs = dict(first["specifications"])
+        expected_warranty = dict(first["additional_info"]["warranty"])
+        
+        first["vehicle"]["brand"] = "Changed"
+        first["specifications"]["doors"] = 99
+        first["additional_info"]["warranty"]["basic_years"] = 0
+        
+        # Served from the response cache
+        cached = await get_vehicle_details(vehicle_id="veh-camry")
+        assert cached["vehicle"]["brand"] == "Toyota"
+        assert cached["specifications"] == expected_specs
+        assert cached["additional_info"]["warranty"] == expected_warranty
+        
+        # A different cache key still builds from the same cached spec helpers
+        by_inventory = await get_vehicle_details(inventory_id="inv-001")
+        assert by_inventory["specifications"] == expected_specs
+        assert by_inventory["additional_info"]["warranty"] == expected_warranty
+        assert type(by_inventory["additional_info"]["maintenance"]) is dict
+
+    @pytest.mark.asyncio
+    async def test_get_vehicle_details_falls_back_to_unavailable_unit(self, details_supabase):
+        """Test a vehicle with no available unit is shown with one of its other units."""
+        result = await get_vehicle_details(vehicle_id="veh-accord")
+        
+        assert result["inventory"]["inventory_id"] == "inv-002"
+        assert result["availability"]["status"] == "reserved"
+
+    @pytest.mark.asyncio
+    async def test_get_vehicle_details_bulk_picks_unit_and_current_price(self, details_supabase, monkeypatch):
+        """Test bulk details keep one available unit and the current price per vehicle, falling back for the rest."""
+        vehicles = {row['id']: row for row in details_supabase.tables['vehicles']}
+        camry = vehicles['veh-camry']
+        camry['inventory'].insert(0, dict(camry['inventory'][0], id="inv-000", status="sold", vin="4T1C11AK5RU000000"))
+        camry['pricing'].insert(0, {
+            "id": "price-camry-old", "base_price": 2700000, "feature_prices": {},
+            "discount_amount": 0, "is_current": False, "effective_date": "2025-01-01"
+        })
+        
+        queried_tables = []
+        table = details_supabase.table
+        monkeypatch.setattr(details_supabase, "table", lambda name: queried_tables.append(name) or table(name))
+        
+        result = await get_vehicle_details_bulk(["veh-camry", "veh-accord", "veh-rav4", "veh-missing"])
+        
+        assert [v["vehicle"]["id"] for v in result["vehicles"]] == ["veh-camry", "veh-accord", "veh-rav4"]
+        assert result["not_found"] == ["veh-missing"]
+        camry_details, accord_details, rav4_details = result["vehicles"]
+        # The available unit and the current price row win over the sold unit and older price
+        assert camry_details["inventory"]["inventory_id"] == "inv-001"
+        assert camry_details["pricing"]["base_price_dollars"] == 27500
+        assert camry_details["pricing"]["discount_applied_dollars"] == 500
+        # A vehicle with no available unit falls back to its other unit
+        assert accord_details["inventory"]["inventory_id"] == "inv-002"
+        assert rav4_details["inventory"]["inventory_id"] == "inv-003"
+        # One embedded vehicles query, plus one fallback for every vehicle without an available unit
+        assert queried_tables == ["vehicles", "vehicles"]
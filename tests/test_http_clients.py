@@ -0,0 +1,111 @@
+"""
+Test suite for the shared HTTP client retry helper (http_clients.with_retries).
+
+Backoff delays are recorded by the retry_delays fixture instead of slept.
+"""
+
+import pytest
+import httpx
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import http_clients
+from http_clients import with_retries
+
+
+def _status_error(status_code, headers=None):
+    """HTTPStatusError as raised by raise_for_status() for a response with status_code."""
+    request = httpx.Request("GET", "https://api.vapi.ai/file")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        return e
+
+
+class FlakyRequest:
+    """Zero-argument request function that raises the queued errors, then returns "ok"."""
+    
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def retry_delays(monkeypatch):
+    """Record each computed backoff delay and retry immediately instead of sleeping."""
+    delays = []
+    retry_delay = http_clients._retry_delay
+    
+    def record_delay(*args):
+        delays.append(retry_delay(*args))
+        return 0
+    
+    monkeypatch.setattr(http_clients, "_retry_delay", record_delay)
+    return delays
+
+
+class TestWithRetries:
+    """Test with_retries retry decisions and backoff delays"""
+
+    @pytest.mark.asyncio
+    async def test_with_retries_recovers_from_transient_errors(self, retry_delays):
+        """Test retryable statuses and network errors are retried until a call succeeds"""
+        request_fn = FlakyRequest(
+            _status_error(503),
+            httpx.ConnectError("Connection failed"),
+            httpx.ReadTimeout("Request timed out")
+        )
+        
+        assert await with_retries(request_fn) == "ok"
+        assert request_fn.calls == 4
+        # Full jitter: each delay is drawn from [0, min(cap, base * 2 ** attempt)]
+        for attempt, delay in enumerate(retry_delays):
+            assert 0 <= delay <= min(http_clients.RETRY_CAP_SECONDS, http_clients.RETRY_BASE_SECONDS * 2 ** attempt)
+
+    @pytest.mark.asyncio
+    async def test_with_retries_gives_up_after_attempts(self, retry_delays):
+        """Test the last error is raised once every attempt has failed"""
+        request_fn = FlakyRequest(*(_status_error(502) for _ in range(5)))
+        
+        with pytest.raises(httpx.HTTPStatusError) as exc_info:
+            await with_retries(request_fn, attempts=3)
+        
+        assert exc_info.value.response.status_code == 502
+        assert request_fn.calls == 3
+        assert len(retry_delays) == 2
+
+    @pytest.mark.parametrize("status_code", [400, 401, 403, 404])
+    @pytest.mark.asyncio
+    async def test_with_retries_client_errors_not_retried(self, retry_delays, status_code):
+        """Test non-retryable statuses are raised on the first attempt"""
+        request_fn = FlakyRequest(_status_error(status_code))
+        
+        with pytest.raises(httpx.HTTPStatusError):
+            await with_retries(request_fn)
+        
+        assert request_fn.calls == 1
+        assert retry_delays == []
+
+    @pytest.mark.asyncio
+    async def test_with_retries_honors_retry_after_seconds(self, retry_delays):
+        """Test a 429 with Retry-After in seconds waits exactly that long"""
+        request_fn = FlakyRequest(_status_error(429, headers={"Retry-After": "7"}))
+        
+        assert await with_retries(request_fn) == "ok"
+        assert retry_delays == [7.0]
+
+    @pytest.mark.asyncio
+    async def test_with_retries_honors_retry_after_date(self, retry_delays):
+        """Test a 429 with an HTTP-date Retry-After waits until that time"""
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        request_fn = FlakyRequest(_status_error(429, headers={"Retry-After": format_datetime(retry_at, usegmt=True)}))
+        
+        assert await with_retries(request_fn) == "ok"
+        assert 25 <= retry_delays[0] <= 30
@@ -1,30 +1,100 @@
 """
 Test suite for sync_knowledge_base tool - Complete Vapi workflow
 Following TDD methodology: write comprehensive tests first
+
+Requests go through the shared Vapi client from http_clients, with its transport
+replaced by an httpx.MockTransport (see the vapi_transport fixture), and the
+knowledge base fetch is replaced by a canned fetch_latest_kb result.
 """
 
 import pytest
 import httpx
-from unittest.mock import AsyncMock, patch, MagicMock
-from datetime import datetime
-import asyncio
-import os
+import functools
+import importlib
+import json
+import re
+
+import http_clients
+from kb_tools.sync_knowledge_base import sync_knowledge_base, _kb_file_name
+
+# The kb_tools package re-exports the tools, shadowing the module attributes
+sync_module = importlib.import_module("kb_tools.sync_knowledge_base")
+fetch_module = importlib.import_module("kb_tools.fetch_latest_kb")
+
+VAPI_BASE_URL = "https://api.vapi.ai"
+TOOL_ID = "tool_kb_456"
+API_KEY = "test_vapi_key_123"
+
 
-from kb_tools.sync_knowledge_base import sync_knowledge_base
+class FakeVapi:
+    """Serves the Vapi file and tool endpoints from memory and records every request."""
+    
+    def __init__(self):
+        self.files = {}
+        self.tool_file_ids = None
+        self.requests = []
+        self.handler = self.serve
+        self.next_id = 1
+    
+    async def __call__(self, request):
+        self.requests.append(request)
+        return await self.handler(request)
+    
+    def add_file(self, name):
+        file_id = f"file_{self.next_id:03d}"
+        self.next_id += 1
+        self.files[file_id] = {"id": file_id, "name": name, "status": "done"}
+        return file_id
+    
+    async def serve(self, request):
+        path = request.url.path
+        if request.method == "GET" and path == "/file":
+            return httpx.Response(200, json=list(self.files.values()))
+        if request.method == "POST" and path == "/file":
+            name = re.search(rb'filename="([^"]+)"', await request.aread()).group(1).decode()
+            return httpx.Response(201, json=self.files[self.add_file(name)])
+        if request.method == "DELETE" and path.startswith("/file/"):
+            if self.files.pop(path.removeprefix("/file/"), None) is None:
+                return httpx.Response(404)
+            return httpx.Response(200, json={})
+        if request.method == "PATCH" and path == f"/tool/{TOOL_ID}":
+            self.tool_file_ids = json.loads(await request.aread())["fileIds"]
+            return httpx.Response(200, json={"id": TOOL_ID})
+        return httpx.Response(404)
+    
+    def calls(self):
+        """(method, path) of every request received."""
+        return [(request.method, request.url.path) for request in self.requests]
+
+
+@pytest.fixture
+def vapi_transport(monkeypatch):
+    """Route the shared Vapi client through a FakeVapi and configure the sync environment."""
+    vapi = FakeVapi()
+    
+    # Build the real shared client (base URL, headers, limits) on a mock transport
+    monkeypatch.setattr(http_clients, "_vapi_clients", {})
+    with monkeypatch.context() as patched:
+        patched.setattr(
+            httpx, "AsyncClient",
+            functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(vapi))
+        )
+        http_clients.get_vapi_client(VAPI_BASE_URL)
+    
+    monkeypatch.setattr(sync_module, "_SYNCED_FILE_NAMES", {})
+    # Retry transient failures immediately instead of backing off
+    monkeypatch.setattr(http_clients, "_retry_delay", lambda *args: 0)
+    
+    monkeypatch.setenv("VAPI_API_KEY", API_KEY)
+    monkeypatch.setenv("VAPI_KNOWLEDGE_BASE_TOOL_ID", TOOL_ID)
+    for name in ("KB_FILE_NAME_PREFIX", "VAPI_BASE_URL", "KB_TIMEOUT_SECONDS"):
+        monkeypatch.delenv(name, raising=False)
+    return vapi
 
 
 class TestSyncKnowledgeBase:
     """Test sync_knowledge_base Vapi integration functionality"""
 
-    @pytest.fixture
-    def mock_vapi_credentials(self):
-        """Sample Vapi credentials for testing"""
-        return {
-            "vapi_api_key": "test_vapi_key_123",
-            "knowledge_base_tool_id": "tool_kb_456",
-            "vapi_base_url": "https://api.vapi.ai"
-        }
-
     @pytest.fixture
     def mock_markdown_files(self):
         """Sample markdown files from fetch_latest_kb"""
@@ -32,433 +102,262 @@ class TestSyncKnowledgeBase:
             {
                 "filename": "about-company.md",
                 "content": "# About Elite Motors\n\nWe are a family-owned dealership...",
-                "size_bytes": 5120,
                 "url": "https://raw.githubusercontent.com/test/repo/main/about-company.md"
             },
             {
-                "filename": "financing-options.md", 
+                "filename": "financing-options.md",
                 "content": "# Financing Options\n\nWe offer comprehensive financing...",
-                "size_bytes": 8192,
                 "url": "https://raw.githubusercontent.com/test/repo/main/financing-options.md"
             },
             {
                 "filename": "services-provided.md",
                 "content": "# Services Provided\n\nComplete automotive solutions...",
-                "size_bytes": 12288,
                 "url": "https://raw.githubusercontent.com/test/repo/main/services-provided.md"
             },
             {
                 "filename": "current-offers.md",
                 "content": "# Current Offers\n\nSeptember 2025 Special Promotions...",
-                "size_bytes": 6144,
                 "url": "https://raw.githubusercontent.com/test/repo/main/current-offers.md"
             }
         ]
 
     @pytest.fixture
-    def mock_existing_files(self):
-        """Sample existing files in Vapi"""
-        return [
-            {
-                "id": "file_old_001",
-                "name": "dealership_kb_about-company.md",
-                "originalName": "about-company.md",
-                "status": "done",
-                "bytes": 4096,
-                "createdAt": "2025-01-13T10:00:00Z"
-            },
-            {
-                "id": "file_old_002", 
-                "name": "dealership_kb_financing-options.md",
-                "originalName": "financing-options.md",
-                "status": "done",
-                "bytes": 7168,
-                "createdAt": "2025-01-13T10:00:00Z"
-            },
-            {
-                "id": "file_unrelated_003",
-                "name": "some_other_file.pdf",
-                "originalName": "other.pdf",
-                "status": "done", 
-                "bytes": 1024,
-                "createdAt": "2025-01-13T09:00:00Z"
-            }
-        ]
+    def kb_result(self, mock_markdown_files, monkeypatch):
+        """Serve a canned fetch_latest_kb result (mutable per test)."""
+        result = {"files": mock_markdown_files, "unchanged": False}
+        
+        async def fake_fetch_latest_kb():
+            return dict(result, files=list(result["files"]))
+        
+        monkeypatch.setattr(fetch_module, "fetch_latest_kb", fake_fetch_latest_kb)
+        return result
 
     @pytest.fixture
-    def mock_new_file_uploads(self):
-        """Sample successful file upload responses"""
-        return [
-            {
-                "id": "file_new_001",
-                "name": "dealership_kb_about-company.md",
-                "originalName": "about-company.md",
-                "status": "processing",
-                "bytes": 5120,
-                "createdAt": "2025-01-14T10:30:00Z"
-            },
-            {
-                "id": "file_new_002",
-                "name": "dealership_kb_financing-options.md", 
-                "originalName": "financing-options.md",
-                "status": "processing",
-                "bytes": 8192,
-                "createdAt": "2025-01-14T10:30:00Z"
-            },
-            {
-                "id": "file_new_003",
-                "name": "dealership_kb_services-provided.md",
-                "originalName": "services-provided.md", 
-                "status": "processing",
-                "bytes": 12288,
-                "createdAt": "2025-01-14T10:30:00Z"
-            },
-            {
-                "id": "file_new_004",
-                "name": "dealership_kb_current-offers.md",
-                "originalName": "current-offers.md",
-                "status": "processing", 
-                "bytes": 6144,
-                "createdAt": "2025-01-14T10:30:00Z"
-            }
+    def synced_vapi(self, vapi_transport, mock_markdown_files):
+        """A FakeVapi already holding every sample file plus an unrelated file."""
+        for file_data in mock_markdown_files:
+            vapi_transport.add_file(_kb_file_name("kb_", file_data))
+        vapi_transport.add_file("some_other_file.pdf")
+        return vapi_transport
+
+    @pytest.mark.asyncio
+    async def test_sync_knowledge_base_initial_upload(self, vapi_transport, kb_result, mock_markdown_files):
+        """Test an empty knowledge base gets every file uploaded and the tool pointed at them"""
+        result = await sync_knowledge_base()
+        
+        assert result["success"] is True
+        assert result["files_uploaded"] == 4
+        assert result["files_deleted"] == 0
+        assert result["tool_updated"] is True
+        assert result["skipped"] is False
+        assert result["knowledge_base_tool_id"] == TOOL_ID
+        assert "sync_duration_ms" in result
+        
+        # Uploads keep input order and are named {prefix}{content_hash}_{filename}
+        assert [vapi_transport.files[file_id]["name"] for file_id in result["new_file_ids"]] == [
+            _kb_file_name("kb_", file_data) for file_data in mock_markdown_files
         ]
+        assert vapi_transport.tool_file_ids == result["new_file_ids"]
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_success_full_workflow(
-        self, mock_vapi_credentials, mock_markdown_files, mock_existing_files, mock_new_file_uploads
-    ):
-        """Test complete successful sync workflow"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list, \
-             patch('kb_tools.sync_knowledge_base._delete_existing_files') as mock_delete, \
-             patch('kb_tools.sync_knowledge_base._upload_markdown_files') as mock_upload, \
-             patch('kb_tools.sync_knowledge_base._update_knowledge_base_tool') as mock_update:
-            
-            # Mock the helper functions
-            mock_list.return_value = mock_existing_files
-            mock_delete.return_value = 2  # 2 files deleted
-            mock_upload.return_value = ["file_new_001", "file_new_002", "file_new_003", "file_new_004"]
-            mock_update.return_value = None
-            
-            result = await sync_knowledge_base(
-                vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                markdown_files=mock_markdown_files,
-                file_name_prefix="dealership_kb_"
-            )
-            
-            # Verify result structure
-            assert result["success"] is True
-            assert result["files_deleted"] == 2
-            assert result["files_uploaded"] == 4
-            assert result["tool_updated"] is True
-            assert result["knowledge_base_tool_id"] == "tool_kb_456"
-            assert len(result["new_file_ids"]) == 4
-            assert "sync_duration_ms" in result
-            
-            # Verify helper functions were called
-            mock_list.assert_called_once()
-            mock_delete.assert_called_once()
-            mock_upload.assert_called_once()
-            mock_update.assert_called_once()
+    async def test_sync_knowledge_base_no_change_skipped(self, synced_vapi, kb_result):
+        """Test nothing is uploaded, deleted or patched when Vapi already holds every file"""
+        result = await sync_knowledge_base()
+        
+        assert result["skipped"] is True
+        assert result["tool_updated"] is False
+        assert result["files_unchanged"] == 4
+        assert result["files_uploaded"] == 0
+        assert result["files_deleted"] == 0
+        assert synced_vapi.calls() == [("GET", "/file")]
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_no_existing_files(
-        self, mock_vapi_credentials, mock_markdown_files, mock_new_file_uploads
-    ):
-        """Test sync when no existing knowledge base files"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list, \
-             patch('kb_tools.sync_knowledge_base._delete_existing_files') as mock_delete, \
-             patch('kb_tools.sync_knowledge_base._upload_markdown_files') as mock_upload, \
-             patch('kb_tools.sync_knowledge_base._update_knowledge_base_tool') as mock_update:
-            
-            # Mock empty file list
-            mock_list.return_value = []
-            mock_delete.return_value = 0  # No files deleted
-            mock_upload.return_value = ["file_new_001", "file_new_002", "file_new_003", "file_new_004"]
-            mock_update.return_value = None
-            
-            result = await sync_knowledge_base(
-                vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                markdown_files=mock_markdown_files
-            )
-            
-            assert result["success"] is True
-            assert result["files_deleted"] == 0  # No files to delete
-            assert result["files_uploaded"] == 4
-            assert result["tool_updated"] is True
-            
-            # Should not call delete since no KB files exist
-            mock_delete.assert_not_called()
+    async def test_sync_knowledge_base_one_changed_file(self, synced_vapi, kb_result, mock_markdown_files):
+        """Test a single changed file costs one upload and one delete, keeping the others"""
+        old_name = _kb_file_name("kb_", mock_markdown_files[3])
+        old_file_id = next(file_id for file_id, file in synced_vapi.files.items() if file["name"] == old_name)
+        kept_file_ids = [file_id for file_id in synced_vapi.files if file_id != old_file_id][:3]
+        kb_result["files"] = mock_markdown_files[:3] + [
+            dict(mock_markdown_files[3], content="# Current Offers\n\nOctober 2025 Special Promotions...")
+        ]
+        
+        result = await sync_knowledge_base()
+        
+        assert result["files_uploaded"] == 1
+        assert result["files_deleted"] == 1
+        assert result["files_unchanged"] == 3
+        assert sorted(synced_vapi.calls()) == sorted([
+            ("GET", "/file"), ("POST", "/file"), ("PATCH", f"/tool/{TOOL_ID}"), ("DELETE", f"/file/{old_file_id}")
+        ])
+        # The tool is repointed before the stale file is deleted
+        assert synced_vapi.calls()[-1] == ("DELETE", f"/file/{old_file_id}")
+        assert synced_vapi.tool_file_ids == kept_file_ids + result["new_file_ids"]
+        # Files outside the prefix are never touched
+        assert "some_other_file.pdf" in [file["name"] for file in synced_vapi.files.values()]
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_empty_markdown_files(self, mock_vapi_credentials):
-        """Test sync with empty markdown files list"""
-        with pytest.raises(ValueError) as exc_info:
-            await sync_knowledge_base(
-                vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                markdown_files=[]
-            )
+    async def test_sync_knowledge_base_unchanged_fetch_skips_listing(self, vapi_transport, kb_result):
+        """Test an unchanged fetch of the files last synced makes no Vapi requests"""
+        await sync_knowledge_base()
+        requests_after_first_sync = len(vapi_transport.requests)
+        
+        kb_result["unchanged"] = True
+        result = await sync_knowledge_base()
         
-        assert "at least one markdown file" in str(exc_info.value)
+        assert result["skipped"] is True
+        assert result["files_unchanged"] == 4
+        assert len(vapi_transport.requests) == requests_after_first_sync
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_invalid_credentials(self, mock_markdown_files):
-        """Test sync with invalid credentials"""
-        with pytest.raises(ValueError) as exc_info:
-            await sync_knowledge_base(
-                vapi_api_key="",
-                knowledge_base_tool_id="tool_123",
-                markdown_files=mock_markdown_files
-            )
+    async def test_sync_knowledge_base_partial_fetch_refused(self, synced_vapi, kb_result, mock_markdown_files):
+        """Test a fetch with failed files never syncs, so their Vapi copies are not deleted as stale"""
+        kb_result["files"] = mock_markdown_files[:3]
+        kb_result["errors"] = [{"url": mock_markdown_files[3]["url"], "error": "HTTP 404: Not Found"}]
+        
+        with pytest.raises(Exception) as exc_info:
+            await sync_knowledge_base()
         
-        assert "API key" in str(exc_info.value)
+        assert "Failed to fetch" in str(exc_info.value)
+        assert mock_markdown_files[3]["url"] in str(exc_info.value)
+        assert synced_vapi.requests == []
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_list_files_error(self, mock_vapi_credentials, mock_markdown_files):
-        """Test handling of file listing errors"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list:
-            # Mock list files error
-            mock_list.side_effect = Exception("Failed to list files: HTTP 403")
-            
-            with pytest.raises(Exception) as exc_info:
-                await sync_knowledge_base(
-                    vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                    knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                    markdown_files=mock_markdown_files
-                )
-            
-            assert "list files" in str(exc_info.value).lower()
+    async def test_sync_knowledge_base_empty_markdown_files(self, vapi_transport, kb_result):
+        """Test sync with empty markdown files list"""
+        kb_result["files"] = []
+        
+        with pytest.raises(Exception) as exc_info:
+            await sync_knowledge_base()
+        
+        assert "No markdown files found" in str(exc_info.value)
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_delete_file_error(
-        self, mock_vapi_credentials, mock_markdown_files, mock_existing_files
-    ):
-        """Test handling of file deletion errors"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list, \
-             patch('kb_tools.sync_knowledge_base._delete_existing_files') as mock_delete:
-            
-            # Mock successful file listing
-            mock_list.return_value = mock_existing_files
-            # Mock delete error
-            mock_delete.side_effect = Exception("Failed to delete file file_old_001: HTTP 404")
-            
-            with pytest.raises(Exception) as exc_info:
-                await sync_knowledge_base(
-                    vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                    knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                    markdown_files=mock_markdown_files,
-                    file_name_prefix="dealership_kb_"
-                )
-            
-            assert "delete file" in str(exc_info.value).lower()
+    async def test_sync_knowledge_base_missing_api_key(self, vapi_transport, kb_result, monkeypatch):
+        """Test sync without VAPI_API_KEY"""
+        monkeypatch.delenv("VAPI_API_KEY")
+        
+        with pytest.raises(ValueError) as exc_info:
+            await sync_knowledge_base()
+        
+        assert "VAPI_API_KEY" in str(exc_info.value)
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_upload_file_error(
-        self, mock_vapi_credentials, mock_markdown_files
-    ):
-        """Test handling of file upload errors"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list, \
-             patch('kb_tools.sync_knowledge_base._delete_existing_files') as mock_delete, \
-             patch('kb_tools.sync_knowledge_base._upload_markdown_files') as mock_upload:
-            
-            # Mock successful file listing (no existing files)
-            mock_list.return_value = []
-            mock_delete.return_value = 0
-            # Mock upload error
-            mock_upload.side_effect = Exception("Failed to upload file about-company.md: HTTP 400")
-            
-            with pytest.raises(Exception) as exc_info:
-                await sync_knowledge_base(
-                    vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                    knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                    markdown_files=mock_markdown_files
-                )
-            
-            assert "upload file" in str(exc_info.value).lower()
+    async def test_sync_knowledge_base_missing_tool_id(self, vapi_transport, kb_result, monkeypatch):
+        """Test sync without VAPI_KNOWLEDGE_BASE_TOOL_ID"""
+        monkeypatch.delenv("VAPI_KNOWLEDGE_BASE_TOOL_ID")
+        
+        with pytest.raises(ValueError) as exc_info:
+            await sync_knowledge_base()
+        
+        assert "VAPI_KNOWLEDGE_BASE_TOOL_ID" in str(exc_info.value)
 
+    @pytest.mark.parametrize("method,path,message", [
+        ("GET", "/file", "Failed to list files: HTTP 403"),
+        ("POST", "/file", "upload file"),
+        ("PATCH", f"/tool/{TOOL_ID}", f"Failed to update tool {TOOL_ID}: HTTP 403"),
+        ("DELETE", "/file/file_001", "Failed to delete file file_001: HTTP 403"),
+    ], ids=["list", "upload", "update_tool", "delete"])
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_tool_update_error(
-        self, mock_vapi_credentials, mock_markdown_files, mock_new_file_uploads
-    ):
-        """Test handling of tool update errors"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list, \
-             patch('kb_tools.sync_knowledge_base._delete_existing_files') as mock_delete, \
-             patch('kb_tools.sync_knowledge_base._upload_markdown_files') as mock_upload, \
-             patch('kb_tools.sync_knowledge_base._update_knowledge_base_tool') as mock_update:
-            
-            # Mock successful file operations
-            mock_list.return_value = []
-            mock_delete.return_value = 0
-            mock_upload.return_value = ["file_new_001", "file_new_002", "file_new_003", "file_new_004"]
-            # Mock tool update error
-            mock_update.side_effect = Exception("Failed to update tool tool_kb_456: HTTP 404")
-            
-            with pytest.raises(Exception) as exc_info:
-                await sync_knowledge_base(
-                    vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                    knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                    markdown_files=mock_markdown_files
-                )
-            
-            assert "update tool" in str(exc_info.value).lower()
+    async def test_sync_knowledge_base_http_errors(self, vapi_transport, kb_result, method, path, message):
+        """Test a failing Vapi call surfaces which step failed"""
+        vapi_transport.add_file("kb_stale_about-company.md")
+        
+        async def forbidden(request):
+            if (request.method, request.url.path) == (method, path):
+                return httpx.Response(403)
+            return await vapi_transport.serve(request)
+        
+        vapi_transport.handler = forbidden
+        
+        with pytest.raises(Exception) as exc_info:
+            await sync_knowledge_base()
+        
+        assert message in str(exc_info.value)
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_custom_prefix(
-        self, mock_vapi_credentials, mock_markdown_files, mock_new_file_uploads
-    ):
-        """Test sync with custom file name prefix"""
-        custom_prefix = "custom_kb_"
-        
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list, \
-             patch('kb_tools.sync_knowledge_base._delete_existing_files') as mock_delete, \
-             patch('kb_tools.sync_knowledge_base._upload_markdown_files') as mock_upload, \
-             patch('kb_tools.sync_knowledge_base._update_knowledge_base_tool') as mock_update:
-            
-            # Mock file listing with custom prefix files
-            existing_files = [
-                {
-                    "id": "file_custom_001",
-                    "name": f"{custom_prefix}about-company.md",
-                    "status": "done"
-                }
-            ]
-            mock_list.return_value = existing_files
-            mock_delete.return_value = 1  # One custom prefix file deleted
-            mock_upload.return_value = ["file_new_001", "file_new_002", "file_new_003", "file_new_004"]
-            mock_update.return_value = None
-            
-            result = await sync_knowledge_base(
-                vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                markdown_files=mock_markdown_files,
-                file_name_prefix=custom_prefix
-            )
-            
-            assert result["success"] is True
-            assert result["files_deleted"] == 1  # One custom prefix file deleted
+    async def test_sync_knowledge_base_retries_idempotent_requests(self, vapi_transport, kb_result):
+        """Test a transient failure listing files is retried"""
+        async def unavailable_once(request):
+            if len(vapi_transport.requests) == 1:
+                return httpx.Response(503)
+            return await vapi_transport.serve(request)
+        
+        vapi_transport.handler = unavailable_once
+        
+        result = await sync_knowledge_base()
+        
+        assert result["files_uploaded"] == 4
+        assert vapi_transport.calls()[:2] == [("GET", "/file"), ("GET", "/file")]
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_network_error(self, mock_vapi_credentials, mock_markdown_files):
-        """Test handling of network errors"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list:
-            # Mock network error in list files
-            mock_list.side_effect = Exception("Network error during sync: Connection failed")
-            
-            with pytest.raises(Exception) as exc_info:
-                await sync_knowledge_base(
-                    vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                    knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                    markdown_files=mock_markdown_files
-                )
-            
-            error_msg = str(exc_info.value).lower()
-            assert "network" in error_msg
+    async def test_sync_knowledge_base_upload_not_retried(self, vapi_transport, kb_result, mock_markdown_files):
+        """Test a failed upload POST is not retried, since Vapi may already have stored the file"""
+        kb_result["files"] = mock_markdown_files[:1]
+        
+        async def upload_unavailable(request):
+            if request.method == "POST":
+                return httpx.Response(503)
+            return await vapi_transport.serve(request)
+        
+        vapi_transport.handler = upload_unavailable
+        
+        with pytest.raises(Exception) as exc_info:
+            await sync_knowledge_base()
+        
+        assert "Failed to upload file about-company.md: HTTP 503" in str(exc_info.value)
+        assert vapi_transport.calls() == [("GET", "/file"), ("POST", "/file")]
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_timeout_error(self, mock_vapi_credentials, mock_markdown_files):
-        """Test handling of timeout errors"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list:
-            # Mock timeout error in list files
-            mock_list.side_effect = Exception("Request timeout during sync: Request timed out")
-            
-            with pytest.raises(Exception) as exc_info:
-                await sync_knowledge_base(
-                    vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                    knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                    markdown_files=mock_markdown_files
-                )
-            
-            error_msg = str(exc_info.value).lower()
-            assert "timeout" in error_msg
+    async def test_sync_knowledge_base_network_error(self, vapi_transport, kb_result):
+        """Test handling of network errors"""
+        async def refuse_connection(request):
+            raise httpx.ConnectError("Connection failed", request=request)
+        
+        vapi_transport.handler = refuse_connection
+        
+        with pytest.raises(Exception) as exc_info:
+            await sync_knowledge_base()
+        
+        assert "Failed to list files: Connection failed" in str(exc_info.value)
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_partial_upload_failure(
-        self, mock_vapi_credentials, mock_markdown_files
-    ):
-        """Test handling when some file uploads fail"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list, \
-             patch('kb_tools.sync_knowledge_base._delete_existing_files') as mock_delete, \
-             patch('kb_tools.sync_knowledge_base._upload_markdown_files') as mock_upload:
-            
-            # Mock successful file operations leading to upload failure
-            mock_list.return_value = []
-            mock_delete.return_value = 0
-            # Mock upload failure (simulating partial failure)
-            mock_upload.side_effect = Exception("Failed to upload file financing-options.md: HTTP 400")
-            
-            with pytest.raises(Exception) as exc_info:
-                await sync_knowledge_base(
-                    vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                    knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                    markdown_files=mock_markdown_files
-                )
-            
-            # Should fail on first upload error for data integrity
-            assert "upload file" in str(exc_info.value).lower()
+    async def test_sync_knowledge_base_timeout_error(self, vapi_transport, kb_result):
+        """Test handling of timeout errors"""
+        async def time_out(request):
+            raise httpx.ReadTimeout("Request timed out", request=request)
+        
+        vapi_transport.handler = time_out
+        
+        with pytest.raises(Exception) as exc_info:
+            await sync_knowledge_base()
+        
+        assert "timed out" in str(exc_info.value).lower()
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_authentication_headers(
-        self, mock_vapi_credentials, mock_markdown_files
-    ):
-        """Test proper authentication headers are set"""
-        with patch('httpx.AsyncClient') as mock_client, \
-             patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list, \
-             patch('kb_tools.sync_knowledge_base._delete_existing_files') as mock_delete, \
-             patch('kb_tools.sync_knowledge_base._upload_markdown_files') as mock_upload, \
-             patch('kb_tools.sync_knowledge_base._update_knowledge_base_tool') as mock_update:
-            
-            # Mock successful operations
-            mock_list.return_value = []
-            mock_delete.return_value = 0
-            mock_upload.return_value = ["file_001"]
-            mock_update.return_value = None
-            
-            # Mock the async context manager
-            mock_client.return_value.__aenter__ = AsyncMock()
-            mock_client.return_value.__aexit__ = AsyncMock()
-            
-            await sync_knowledge_base(
-                vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                markdown_files=mock_markdown_files[:1]  # Just one file for simplicity
-            )
-            
-            # Verify authentication headers were passed to client
-            mock_client.assert_called_once()
-            call_kwargs = mock_client.call_args[1]
-            assert "headers" in call_kwargs
-            assert "Authorization" in call_kwargs["headers"]
-            assert f"Bearer {mock_vapi_credentials['vapi_api_key']}" in call_kwargs["headers"]["Authorization"]
+    async def test_sync_knowledge_base_authentication_headers(self, vapi_transport, kb_result, monkeypatch):
+        """Test every request carries the API key and the configured timeout"""
+        monkeypatch.setenv("KB_TIMEOUT_SECONDS", "12")
+        
+        await sync_knowledge_base()
+        
+        assert vapi_transport.requests
+        for request in vapi_transport.requests:
+            assert request.headers["Authorization"] == f"Bearer {API_KEY}"
+            assert request.extensions["timeout"] == {"connect": 12, "read": 12, "write": 12, "pool": 12}
 
     @pytest.mark.asyncio
-    async def test_sync_knowledge_base_file_name_formatting(
-        self, mock_vapi_credentials, mock_markdown_files, mock_new_file_uploads
-    ):
-        """Test proper file name formatting for uploads"""
-        with patch('kb_tools.sync_knowledge_base._list_existing_files') as mock_list, \
-             patch('kb_tools.sync_knowledge_base._delete_existing_files') as mock_delete, \
-             patch('kb_tools.sync_knowledge_base._upload_markdown_files') as mock_upload, \
-             patch('kb_tools.sync_knowledge_base._update_knowledge_base_tool') as mock_update:
-            
-            # Mock operations
-            mock_list.return_value = []
-            mock_delete.return_value = 0
-            mock_upload.return_value = ["file_new_001", "file_new_002", "file_new_003", "file_new_004"]
-            mock_update.return_value = None
-            
-            await sync_knowledge_base(
-                vapi_api_key=mock_vapi_credentials["vapi_api_key"],
-                knowledge_base_tool_id=mock_vapi_credentials["knowledge_base_tool_id"],
-                markdown_files=mock_markdown_files,
-                file_name_prefix="kb_"
-            )
-            
-            # Verify upload was called with correct parameters
-            mock_upload.assert_called_once()
-            call_args = mock_upload.call_args[0]
-            # Should be called with client, markdown_files, and file_name_prefix
-            assert len(call_args) == 3
-            assert call_args[1] == mock_markdown_files  # markdown_files
-            assert call_args[2] == "kb_"  # file_name_prefix
+    async def test_sync_knowledge_base_custom_prefix(self, vapi_transport, kb_result, monkeypatch):
+        """Test sync with custom file name prefix"""
+        monkeypatch.setenv("KB_FILE_NAME_PREFIX", "custom_kb_")
+        stale_file_id = vapi_transport.add_file("custom_kb_0000dead_about-company.md")
+        default_prefix_file_id = vapi_transport.add_file("kb_0000dead_about-company.md")
+        
+        result = await sync_knowledge_base()
+        
+        assert result["files_deleted"] == 1
+        assert stale_file_id not in vapi_transport.files
+        assert default_prefix_file_id in vapi_transport.files
+        assert all(
+            vapi_transport.files[file_id]["name"].startswith("custom_kb_")
+            for file_id in result["new_file_ids"]
+        )
@@ -159,6 +159,10 @@ class VapiToolManager:
                                 "type": "boolean",
                                 "default": False,
                                 "description": "AVAILABILITY FILTER: Use FALSE for buying customers (default). Use TRUE only if customer specifically asks 'what was similar to the sold one?' or for research purposes."
+                            },
+                            "cursor": {
+                                "type": "string",
+                                "description": "NEXT PAGE: Pass next_cursor from a previous find_similar_vehicles result (same reference and filters) when customer asks 'show me more'. Omit for the first page."
                             }
                         },
                         "required": ["reference_vehicle_id"]